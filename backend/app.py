@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, render_template_string, Response
+from flask import Flask, request, jsonify, render_template_string
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
@@ -9,21 +9,30 @@ import math
 from db import Base, engine, get_db, SessionLocal
 from models import Club, ImportProfile, Match, Event, User  # incluye Event para bulk_update
 from werkzeug.utils import secure_filename
-from importer import import_match_from_excel, import_match_from_json, import_match_from_xml, detect_teams_in_events
+from importer import import_match_from_json, import_match_from_xml, detect_teams_in_events
 from normalizer import normalize_excel_to_json, normalize_xml_to_json
+from import_jobs import run_file_import, submit_import_job, wants_async, wants_force
+from events_cache import bump_events_version
+from json_encoding import APIJSONProvider
+from import_cache import (save_upload, find_imported_match, import_scope, already_imported_response,
+                          preview_cache_key, load_preview, store_preview, touch_preview)
 import traceback
 from register_routes import register_routes
 from auth_utils import hash_password
 from sqlalchemy import text
+from log_config import configure_logging
 
 print("🔍 DEBUG: app.py se está cargando")
 
 # Carga las variables de entorno desde el archivo .env
 load_dotenv()
+configure_logging()
 
 # Configura tu clave de API de OpenAI
 openai.api_key = os.getenv("OPENAI_API_KEY")
 app = Flask(__name__)
+# Todas las respuestas JSON pasan por json_encoding (numpy, NaN, fechas, orjson si está)
+app.json = APIJSONProvider(app)
 Base.metadata.create_all(bind=engine)
 
 
@@ -48,6 +57,43 @@ def migrate_club_branding_columns():
 migrate_club_branding_columns()
 
 
+def migrate_match_source_hash_column():
+    """Ensure matches.source_file_hash (upload dedup) and events_version exist on legacy databases."""
+    stmts = [
+        "ALTER TABLE matches ADD COLUMN IF NOT EXISTS source_file_hash VARCHAR(64)",
+        "CREATE INDEX IF NOT EXISTS ix_matches_source_file_hash ON matches (source_file_hash)",
+        "ALTER TABLE matches ADD COLUMN IF NOT EXISTS events_version INTEGER NOT NULL DEFAULT 0",
+    ]
+    try:
+        with engine.begin() as conn:
+            for stmt in stmts:
+                conn.execute(text(stmt))
+        print("✅ Migración de source_file_hash y events_version en matches verificada")
+    except Exception as e:
+        print(f"⚠️ No se pudo migrar source_file_hash/events_version en matches automáticamente: {e}")
+
+
+migrate_match_source_hash_column()
+
+
+def migrate_event_indexes():
+    """Índices para leer los eventos de un partido filtrados y paginados por id."""
+    stmts = [
+        "CREATE INDEX IF NOT EXISTS ix_events_match_id_id ON events (match_id, id)",
+        "CREATE INDEX IF NOT EXISTS ix_events_match_id_event_type ON events (match_id, event_type)",
+    ]
+    try:
+        with engine.begin() as conn:
+            for stmt in stmts:
+                conn.execute(text(stmt))
+        print("✅ Índices de events verificados")
+    except Exception as e:
+        print(f"⚠️ No se pudieron crear los índices de events automáticamente: {e}")
+
+
+migrate_event_indexes()
+
+
 def bootstrap_super_admin():
     email = os.getenv("INITIAL_ADMIN_EMAIL")
     password = os.getenv("INITIAL_ADMIN_PASSWORD")
@@ -163,22 +209,6 @@ def load_df_partidos():
 
 
 # Función para calcular el origen de los tries
-def calcular_origen_tries(df):
-    if 'POINTS' not in df.columns:
-        raise KeyError("La columna 'POINTS' no existe en el DataFrame")
-
-    origin_categories = ["TURNOVER+", "SCRUM", "LINEOUT", "KICKOFF"]
-    tries_events = df[df['POINTS'] == "TRY"]
-
-    def get_origin_event(try_event):
-        try_time = try_event['SECOND']
-        relevant_events = df[(df['CATEGORY'].isin(origin_categories)) & (df['SECOND'] < try_time)]
-        return relevant_events.iloc[-1]['CATEGORY'] if not relevant_events.empty else None
-
-    df['TRY_ORIGIN'] = df.apply(lambda event: get_origin_event(event) if event['POINTS'] == "TRY" else None, axis=1)
-    return df
-
-
 def mmss_to_seconds_py(val):
     try:
         if val is None:
@@ -811,7 +841,7 @@ def import_file():
         return {"error": "Empty filename"}, 400
     filename = secure_filename(file.filename)
     save_path = os.path.join(UPLOAD_FOLDER, filename)
-    file.save(save_path)
+    file_hash = save_upload(file, save_path)
 
     profile_name = request.args.get("profile")
     if not profile_name:
@@ -835,17 +865,26 @@ def import_file():
             else:
                 return {"error": "No se pudo detectar el tipo de archivo. Extensión no soportada."}, 400
 
-        if file_type == 'xml':
-            result = normalize_xml_to_json(save_path, settings)
-            if not result or 'match' not in result or 'events' not in result:
-                return {"error": "Datos faltantes en archivo XML"}, 400
-            import_match_from_json(result, settings)
-        elif file_type in ['xls', 'xlsx']:
-            result = normalize_excel_to_json(save_path, settings)
-            import_match_from_excel(save_path, {'settings': settings})
-        else:
+        if file_type not in ['xml', 'xls', 'xlsx']:
             return {"error": "Tipo de archivo no soportado"}, 400
 
+        # El mismo archivo (aunque venga con otro nombre) ya se importó: respuesta idempotente
+        existing = None if wants_force(request) else find_imported_match(db, file_hash, **import_scope(db))
+        if existing:
+            print(f"♻️ Archivo ya importado como partido {existing.id}, se omite el import")
+            return already_imported_response(existing), 200
+
+        # Modo job: se responde de inmediato y el progreso se consulta en /api/import/jobs/<id>
+        if wants_async(request):
+            job = submit_import_job("file", {"path": save_path, "file_type": file_type, "settings": settings,
+                                             "source_file_hash": file_hash})
+            return {"job_id": job["id"], "status": job["status"], "status_url": f"/api/import/jobs/{job['id']}"}, 202
+
+        try:
+            run_file_import(save_path, file_type, settings, source_file_hash=file_hash)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
         return {"message": f"Archivo importado usando perfil '{profile_name}'"}, 200
     except Exception as e:
         return {"error": str(e)}, 500
@@ -869,7 +908,7 @@ def preview_file():
     
     filename = secure_filename(file.filename)
     save_path = os.path.join(UPLOAD_FOLDER, filename)
-    file.save(save_path)
+    file_hash = save_upload(file, save_path)
     
     print(f"👉 Archivo guardado en: {save_path}")
     print(f"👉 Archivo existe: {os.path.exists(save_path)}")
@@ -895,22 +934,40 @@ def preview_file():
             else:
                 return {"error": "No se pudo detectar el tipo de archivo. Extensión no soportada."}, 400
 
-        if file_type == 'xml':
-            result = normalize_xml_to_json(save_path, settings)
-            if not result or 'match' not in result or 'events' not in result:
-                return {"error": "Datos faltantes en archivo XML"}, 400
-        elif file_type in ['xls', 'xlsx']:
-            result = normalize_excel_to_json(save_path, settings)
-        else:
+        if file_type not in ['xml', 'xls', 'xlsx']:
             return {"error": "Tipo de archivo no soportado"}, 400
 
-        match = result.get('match')
-        events = result.get('events', [])
+        # Mismo archivo + mismo perfil → se reutiliza la normalización guardada
+        preview_token = preview_cache_key(file_hash, file_type, settings)
+        cached = load_preview(preview_token)
+        if cached:
+            print(f"♻️ Preview servida desde cache ({preview_token[:12]})")
+            touch_preview(preview_token)
+        else:
+            if file_type == 'xml':
+                result = normalize_xml_to_json(save_path, settings)
+                if not result or 'match' not in result or 'events' not in result:
+                    return {"error": "Datos faltantes en archivo XML"}, 400
+            else:
+                result = normalize_excel_to_json(save_path, settings)
+
+            cached = {
+                'profile': profile_name,
+                'file_type': file_type,
+                'source_file_hash': file_hash,
+                'match': result.get('match'),
+                'events': result.get('events', []),
+            }
+            store_preview(preview_token, cached)
+
+        match = cached.get('match')
+        events = cached.get('events', [])
         event_types = sorted(set(str(ev.get('event_type', 'Desconocido')) for ev in events))
         players = sorted(set(str(ev.get('player')) for ev in events if ev.get('player')))
 
         # Detectar equipos únicos en los eventos
         team_detection = detect_teams_in_events(events)
+        existing = find_imported_match(db, file_hash, **import_scope(db))
 
         response_data = {
             'match_info': match,
@@ -918,42 +975,37 @@ def preview_file():
             'event_count': len(events),
             'event_types': event_types,
             'players': players,
-            'team_detection': team_detection  # Nuevo: información de equipos detectados
+            'team_detection': team_detection,  # Nuevo: información de equipos detectados
+            'preview_token': preview_token,
+            # Si el archivo ya se importó, el wizard puede avisar antes de confirmar
+            'already_imported_match_id': existing.id if existing else None
         }
-        return Response(json.dumps(convert_json_safe(response_data)), mimetype='application/json'), 200
+        return jsonify(response_data), 200
     except Exception as e:
         return {"error": str(e)}, 500
     finally:
         db.close()
 
 
-def convert_json_safe(data):
-    """Convierte datos que pueden contener tipos no serializables a JSON"""
-    import numpy as np
-    import pandas as pd
-    from datetime import datetime, date, time
-    
-    if isinstance(data, dict):
-        return {k: convert_json_safe(v) for k, v in data.items()}
-    elif isinstance(data, list):
-        return [convert_json_safe(item) for item in data]
-    elif isinstance(data, (np.integer, np.floating)):
-        return float(data)
-    elif isinstance(data, np.ndarray):
-        return data.tolist()
-    elif isinstance(data, (datetime, date, time)):
-        return data.isoformat()
-    elif pd.isna(data):
-        return None
-    else:
-        return data
-
-
 @app.route("/api/save_match", methods=["POST"])
 def save_match():
     print("👉 SAVE_MATCH: Iniciando importación")
     data = request.get_json()
 
+    # Con preview_token los eventos salen de la cache de la previsualización;
+    # el navegador solo envía lo que cambió (match, discard_categories, mapping...)
+    if data and data.get('preview_token') and 'events' not in data:
+        cached = load_preview(data['preview_token'])
+        if not cached:
+            return jsonify({"error": "La previsualización expiró. Vuelve a subir el archivo."}), 410
+        discarded = set(data.get('discard_categories') or [])
+        data['events'] = [ev for ev in cached.get('events', []) if ev.get('event_type') not in discarded]
+        # El match se usa tal como lo envía el navegador (p. ej. sin el team de
+        # texto del archivo cuando no se eligió team_id); de la cache solo el hash
+        data['match'] = dict(data.get('match') or {})
+        data['match']['source_file_hash'] = cached.get('source_file_hash')
+        data.pop('discard_categories', None)
+
     if not data or 'match' not in data or 'events' not in data:
         return jsonify({"error": "Faltan datos"}), 400
 
@@ -968,6 +1020,14 @@ def save_match():
             return jsonify({"error": f"Perfil '{profile_name}' no encontrado"}), 404
 
         settings = safe_profile_settings(profile)
+
+        team_id = data.get('team_id') or data['match'].get('team_id')
+        existing = None if wants_force(request) else find_imported_match(
+            db, data['match'].get('source_file_hash'), **import_scope(db, team_id))
+        if existing:
+            print(f"♻️ Archivo ya importado como partido {existing.id}, se omite el import")
+            return jsonify(already_imported_response(existing)), 200
+
         mapping = data.get('mapping') or settings.get('mapping')
         events_to_import = data.get('events', [])
 
@@ -1006,6 +1066,10 @@ def save_match():
         if data.get("team_id") is None and data.get("match", {}).get("team_id") is not None:
             data["team_id"] = data["match"].get("team_id")
 
+        if wants_async(request):
+            job = submit_import_job("match", {"data": data, "settings": settings})
+            return jsonify({"job_id": job["id"], "status": job["status"], "status_url": f"/api/import/jobs/{job['id']}"}), 202
+
         import_match_from_json(data, settings)
         return jsonify({"message": "Importación exitosa"}), 200
     except Exception as e:
@@ -1053,6 +1117,8 @@ def bulk_update_events(match_id: int):
                 else:
                     setattr(ev, key, val)
             updated += 1
+        if updated:
+            bump_events_version(db, match_id)
         db.commit()
         return jsonify({"message": f"Actualizados {updated} eventos"}), 200
     except Exception as e:
@@ -0,0 +1,253 @@
+"""
+Import masivo de archivos (p. ej. una temporada completa de exportaciones XML).
+
+Recibe una lista de archivos, o un directorio, con un perfil por archivo. La
+normalización (parseo del XML/Excel, la parte cara) se reparte en un pool de
+procesos; el proceso principal inserta cada partido en cuanto su archivo está
+normalizado, a través del mismo importer que usan /api/import y /api/save_match.
+Las inserciones son por archivo: una llamada al importer y una transacción por
+partido (con sus eventos en bloque, insert_event_rows), sin lotes entre archivos.
+
+Desde la API solo se aceptan rutas dentro de /app/uploads (ver
+resolve_upload_path); la CLI acepta cualquier ruta local.
+
+Los archivos cuyo contenido ya se importó se omiten salvo force=True.
+
+Uso:
+    - POST /api/import/bulk (como job, ver import_jobs)
+    - python scripts/bulk_import.py /app/uploads/temporada --profile "Sportscode XML"
+"""
+import os
+import json
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from db import SessionLocal
+from models import ImportProfile
+from import_cache import file_sha256, find_imported_match
+
+BULK_IMPORT_WORKERS = int(os.getenv("BULK_IMPORT_WORKERS", str(os.cpu_count() or 2)))
+BULK_UPLOAD_DIR = "/app/uploads"
+BULK_EXTENSIONS = (".xml", ".xls", ".xlsx")
+
+
+def detect_file_type(path, settings):
+    """Tipo de archivo según el perfil o, si no lo indica, según la extensión"""
+    file_type = (settings.get("file_type") or "").lower()
+    if file_type:
+        return file_type
+    lower = path.lower()
+    if lower.endswith(".xml"):
+        return "xml"
+    if lower.endswith((".xls", ".xlsx")):
+        return "xlsx"
+    return None
+
+
+def resolve_upload_path(path, root=BULK_UPLOAD_DIR):
+    """
+    Ruta real de path (relativa a /app/uploads si no es absoluta), con los
+    enlaces simbólicos y los .. resueltos.
+
+    Con root, la ruta debe quedar dentro de root; si no, ValueError.
+    """
+    full = os.path.realpath(os.path.join(BULK_UPLOAD_DIR, path))
+    if root:
+        base = os.path.realpath(root)
+        if os.path.commonpath([base, full]) != base:
+            raise ValueError(f"Ruta fuera de {root}: {path}")
+    return full
+
+
+def collect_bulk_files(files=None, directory=None, profile=None, root=None):
+    """
+    Arma la lista de archivos a importar.
+
+    Args:
+        files: lista de rutas o de dicts {"path"|"filename", "profile", "match"}.
+               Las rutas relativas se resuelven contra /app/uploads.
+        directory: directorio del que se toman todos los .xml/.xls/.xlsx
+        profile: perfil por defecto para los archivos que no indican uno
+        root: si se indica, todas las rutas deben quedar dentro de root
+              (ValueError si no); la API pasa /app/uploads
+
+    Returns:
+        list[dict]: [{"path", "profile", "match"}] en orden estable
+    """
+    entries = []
+    for item in files or []:
+        if isinstance(item, str):
+            item = {"path": item}
+        path = item.get("path") or item.get("filename")
+        if not path:
+            continue
+        entries.append({"path": resolve_upload_path(path, root), "profile": item.get("profile") or profile,
+                        "match": item.get("match") or {}})
+
+    if directory:
+        directory = resolve_upload_path(directory, root)
+        for name in sorted(os.listdir(directory)):
+            if name.lower().endswith(BULK_EXTENSIONS):
+                path = resolve_upload_path(os.path.join(directory, name), root)
+                entries.append({"path": path, "profile": profile, "match": {}})
+    return entries
+
+
+def _profile_settings(profile):
+    settings = getattr(profile, "settings", None)
+    if isinstance(settings, str):
+        try:
+            return json.loads(settings)
+        except ValueError:
+            return {}
+    return settings if isinstance(settings, dict) else {}
+
+
+def _load_profiles(names):
+    """Settings de todos los perfiles usados en el lote, en una sola consulta"""
+    names = {n for n in names if n}
+    if not names:
+        return {}
+    db = SessionLocal()
+    try:
+        profiles = db.query(ImportProfile).filter(ImportProfile.name.in_(names)).all()
+        return {p.name: _profile_settings(p) for p in profiles}
+    finally:
+        db.close()
+
+
+def _normalize_file(path, file_type, settings):
+    """Se ejecuta en el pool: normaliza un archivo y mide cuánto tardó"""
+    from normalizer import normalize_excel_to_json, normalize_xml_to_json
+
+    start = time.perf_counter()
+    if file_type == "xml":
+        data = normalize_xml_to_json(path, settings)
+    else:
+        data = normalize_excel_to_json(path, settings)
+    if not data or "match" not in data or "events" not in data:
+        raise ValueError("El archivo no contiene match/events tras normalizar")
+    return data, time.perf_counter() - start
+
+
+def _insert_normalized(data, file_type, settings, source_file_hash):
+    """Inserta un archivo ya normalizado con el importer compartido"""
+    from importer import import_match_from_excel_data, import_match_from_json
+
+    if file_type == "xml":
+        data["match"]["source_file_hash"] = source_file_hash
+        return import_match_from_json(data, settings)
+    return import_match_from_excel_data(data, {"settings": settings}, source_file_hash=source_file_hash)
+
+
+def run_bulk_import(entries, force=False, workers=None, progress=None, club_ids=None):
+    """
+    Importa varios archivos: normalización en paralelo, inserción en el proceso actual.
+
+    Args:
+        entries: salida de collect_bulk_files
+        force: reimportar también los archivos ya importados
+        workers: procesos del pool de normalización (BULK_IMPORT_WORKERS por defecto)
+        progress: callback opcional progress(stage, **info)
+        club_ids: clubs en los que buscar archivos ya importados (ver
+            import_cache.import_scope; None = todos, p. ej. desde la CLI)
+
+    Returns:
+        dict: resumen con el estado de cada archivo y el throughput (eventos/seg)
+    """
+    start = time.perf_counter()
+    profiles = _load_profiles(e.get("profile") for e in entries)
+    results = []
+    pending = []
+    seen_hashes = {}
+
+    # Validación y deduplicación (un hash por archivo) antes de normalizar nada
+    db = SessionLocal()
+    try:
+        for entry in entries:
+            status = {"file": os.path.basename(entry["path"]), "path": entry["path"],
+                      "profile": entry.get("profile"), "status": "pending"}
+            results.append(status)
+
+            if not os.path.exists(entry["path"]):
+                status.update(status="failed", error="El archivo no existe")
+                continue
+            if entry.get("profile") not in profiles:
+                status.update(status="failed", error=f"Perfil '{entry.get('profile')}' no encontrado")
+                continue
+            settings = profiles[entry["profile"]]
+            file_type = detect_file_type(entry["path"], settings)
+            if file_type not in ("xml", "xls", "xlsx"):
+                status.update(status="failed", error="Tipo de archivo no soportado")
+                continue
+
+            file_hash = file_sha256(entry["path"])
+            if file_hash in seen_hashes:
+                status.update(status="skipped", error=f"Mismo contenido que {seen_hashes[file_hash]}")
+                continue
+            seen_hashes[file_hash] = status["file"]
+            team_id = (entry.get("match") or {}).get("team_id")
+            existing = None if force else find_imported_match(db, file_hash, team_id=team_id, club_ids=club_ids)
+            if existing:
+                status.update(status="already_imported", match_id=existing.id)
+                continue
+
+            pending.append((status, entry, settings, file_type, file_hash))
+    finally:
+        db.close()
+
+    total_files = len(entries)
+    done = total_files - len(pending)
+    total_events = 0
+
+    def report(stage):
+        if progress:
+            progress(stage, files_done=done, files_total=total_files, events=total_events)
+
+    report("queued")
+    if pending:
+        max_workers = max(1, min(workers or BULK_IMPORT_WORKERS, len(pending)))
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {
+                pool.submit(_normalize_file, entry["path"], file_type, settings): (status, entry, settings, file_type, file_hash)
+                for status, entry, settings, file_type, file_hash in pending
+            }
+            # Cada partido se inserta en cuanto su archivo termina de normalizarse
+            for future in as_completed(futures):
+                status, entry, settings, file_type, file_hash = futures[future]
+                try:
+                    data, normalize_seconds = future.result()
+                    if entry.get("match"):
+                        data["match"] = {**data["match"], **entry["match"]}
+                    insert_start = time.perf_counter()
+                    result = _insert_normalized(data, file_type, settings, file_hash)
+                    if not result:
+                        raise RuntimeError("El import no se completó (ver logs)")
+                    n_events = len(result.get("events") or [])
+                    total_events += n_events
+                    status.update(status="imported", match_id=result.get("match_id"), events=n_events,
+                                  normalize_seconds=round(normalize_seconds, 3),
+                                  insert_seconds=round(time.perf_counter() - insert_start, 3))
+                    print(f"✅ {status['file']}: {n_events} eventos → partido {status['match_id']}")
+                except Exception as e:
+                    status.update(status="failed", error=str(e))
+                    print(f"❌ {status['file']}: {e}")
+                done += 1
+                report("importing")
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "files": results,
+        "total_files": total_files,
+        "imported": sum(1 for r in results if r["status"] == "imported"),
+        "already_imported": sum(1 for r in results if r["status"] in ("already_imported", "skipped")),
+        "failed": sum(1 for r in results if r["status"] == "failed"),
+        "events": total_events,
+        "elapsed_seconds": round(elapsed, 3),
+        "events_per_sec": round(total_events / elapsed, 1) if elapsed > 0 else None,
+    }
+    print(f"📦 Import masivo: {summary['imported']}/{total_files} archivos, "
+          f"{total_events} eventos en {elapsed:.1f}s ({summary['events_per_sec']} eventos/s)")
+    return summary
@@ -3,8 +3,26 @@ Enricher Module - VideoAnalysis
 Enriquece eventos de rugby con cálculos de Game_Time, detección de períodos y grupos de tiempo.
 """
 
+import logging
+import os
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
 import pandas as pd
 
+from event_frame import EventFrame
+
+logger = logging.getLogger(__name__)
+
+# ENRICH_PROFILE=1: registra el tiempo de cada etapa de enrich_events
+ENRICH_PROFILE = os.getenv("ENRICH_PROFILE", "0").lower() in ("1", "true", "yes")
+
+# ENRICH_COLUMNAR=0: vuelve al enriquecimiento evento por evento (lista de dicts)
+ENRICH_COLUMNAR = os.getenv("ENRICH_COLUMNAR", "1").lower() in ("1", "true", "yes")
+
 # Mapeo de campos en español a inglés para estandarizar
 SPANISH_TO_ENGLISH_MAPPING = {
     'AVANCE': 'ADVANCE',
@@ -71,33 +89,36 @@ def translate_fields_to_english(event_data):
     
     return translated_data
 
+def _penalty_descriptor(event):
+    """DESCRIPTOR de un penal (extra_data o, por compatibilidad, campo directo), en mayúsculas"""
+    descriptor = event.get('extra_data', {}).get('DESCRIPTOR', '')
+    if not descriptor:
+        descriptor = event.get('DESCRIPTOR', '')
+    return str(descriptor).strip().upper()
+
+
+def _penalty_player(event):
+    """Jugador de un penal: primero de players (XML) o player/PLAYER de extra_data"""
+    players_list = event.get('players')
+    if isinstance(players_list, list) and len(players_list) > 0:
+        player = players_list[0]
+    else:
+        # Intentar obtener jugador desde extra_data['player'] (normalizado)
+        player = event.get('extra_data', {}).get('player', '')
+        if not player:
+            # Fallback a PLAYER en extra_data
+            player = event.get('extra_data', {}).get('PLAYER', '')
+    return str(player).strip() if player else ''
+
+
 def process_penalty_events(event):
     """Procesa eventos PENALTY para extraer tarjetas"""
     if event.get('event_type', '').upper() == 'PENALTY':
         if 'extra_data' not in event:
             event['extra_data'] = {}
-            
-        # Intentar obtener descriptor desde extra_data
-        descriptor = event.get('extra_data', {}).get('DESCRIPTOR', '')
-        
-        # También intentar obtener desde campos directos (por compatibilidad)
-        if not descriptor:
-            descriptor = event.get('DESCRIPTOR', '')
-        
-        descriptor = str(descriptor).strip().upper()
-        
-        # Soporte para XML: lista de jugadores
-        players_list = event.get('players')
-        if isinstance(players_list, list) and len(players_list) > 0:
-            player = players_list[0]
-        else:
-            # Intentar obtener jugador desde extra_data['player'] (normalizado)
-            player = event.get('extra_data', {}).get('player', '')
-            if not player:
-                # Fallback a PLAYER en extra_data
-                player = event.get('extra_data', {}).get('PLAYER', '')
-        
-        player = str(player).strip() if player else ''
+
+        descriptor = _penalty_descriptor(event)
+        player = _penalty_player(event)
 
         # Procesar según el descriptor
         if descriptor == 'NEUTRAL':
@@ -117,10 +138,9 @@ def process_penalty_events(event):
     
     return event
 
-def process_lineout_events(event):
-    """Procesa eventos LINEOUT para extraer lanzador y receptor"""
-    if 'extra_data' not in event:
-        event['extra_data'] = {}
+def lineout_fields(event):
+    """PLAYER, LINE_THROWER y LINE_RECEIVER de un LINEOUT (sin modificar el evento)"""
+    extra_data = event.get('extra_data', {})
 
     # Soporte para XML: lista de jugadores en event['players']
     players_list = event.get('players')
@@ -136,16 +156,16 @@ def process_lineout_events(event):
         if receiver_candidates:
             receiver = receiver_candidates[0]
         # Guardar ambos en PLAYER sin el prefijo T-
-        event['extra_data']['PLAYER'] = [thrower, receiver] if thrower and receiver else [p[2:] if p.startswith('T-') else p for p in players_list]
+        player_field = [thrower, receiver] if thrower and receiver else [p[2:] if p.startswith('T-') else p for p in players_list]
     else:
         # Soporte para Excel: campos PLAYER y PLAYER_2
         # Intentar obtener el jugador desde extra_data['player'] (normalizado)
-        player = event.get('extra_data', {}).get('player', '')
+        player = extra_data.get('player', '')
         if not player:
             # Fallback a PLAYER en extra_data
-            player = event.get('extra_data', {}).get('PLAYER', '')
+            player = extra_data.get('PLAYER', '')
         
-        player_2 = event.get('extra_data', {}).get('PLAYER_2', '')
+        player_2 = extra_data.get('PLAYER_2', '')
         
         # Convertir a string para procesar
         player = str(player).strip() if player else ''
@@ -164,31 +184,62 @@ def process_lineout_events(event):
         
         # Crear lista de jugadores válidos
         players = [p for p in [thrower, receiver] if p and p.lower() != 'nan']
-        event['extra_data']['PLAYER'] = players if players else [thrower] if thrower else None
+        player_field = players if players else [thrower] if thrower else None
 
-    # Actualizar campos específicos
-    event['extra_data']['LINE_THROWER'] = thrower
-    event['extra_data']['LINE_RECEIVER'] = receiver
+    return {'PLAYER': player_field, 'LINE_THROWER': thrower, 'LINE_RECEIVER': receiver}
 
+def process_lineout_events(event):
+    """Procesa eventos LINEOUT para extraer lanzador y receptor"""
+    if 'extra_data' not in event:
+        event['extra_data'] = {}
+    event['extra_data'].update(lineout_fields(event))
     return event
 
+def tackle_fields(event):
+    """PLAYER y Team_Tackle_Count de un TACKLE (sin modificar el evento)"""
+    extra_data = event.get('extra_data', {})
+    # Soporte para XML: lista de jugadores
+    players_list = event.get('players')
+    if isinstance(players_list, list) and len(players_list) > 0:
+        players = [p for p in players_list if p and p.lower() != 'nan']
+    else:
+        player = str(extra_data.get('PLAYER', '')).strip() if extra_data.get('PLAYER') else None
+        player_2 = str(extra_data.get('PLAYER_2', '')).strip() if extra_data.get('PLAYER_2') else None
+        players = [p for p in [player, player_2] if p and p.lower() != 'nan']
+    return {'PLAYER': players[0] if len(players) == 1 else (players if players else None), 'Team_Tackle_Count': 1}
+
 def process_tackle_events(event):
     """Procesa eventos TACKLE para contar tackles"""
     if event.get('event_type', '').upper() == 'TACKLE':
         if 'extra_data' not in event:
             event['extra_data'] = {}
-        # Soporte para XML: lista de jugadores
-        players_list = event.get('players')
-        if isinstance(players_list, list) and len(players_list) > 0:
-            players = [p for p in players_list if p and p.lower() != 'nan']
-        else:
-            player = str(event.get('extra_data', {}).get('PLAYER', '')).strip() if event.get('extra_data', {}).get('PLAYER') else None
-            player_2 = str(event.get('extra_data', {}).get('PLAYER_2', '')).strip() if event.get('extra_data', {}).get('PLAYER_2') else None
-            players = [p for p in [player, player_2] if p and p.lower() != 'nan']
-        event['extra_data']['PLAYER'] = players[0] if len(players) == 1 else (players if players else None)
-        event['extra_data']['Team_Tackle_Count'] = 1
+        event['extra_data'].update(tackle_fields(event))
     return event
 
+# Descriptores que pueden conservar varios valores (tackles dobles, etc.)
+MULTI_VALUE_DESCRIPTORS = {'JUGADOR', 'PLAYER', 'ENCUADRE-TACKLE'}
+
+_DROP = object()
+
+
+def _consolidate_list(key, value):
+    """Quita duplicados y vacíos de un descriptor con varios valores (_DROP si no queda ninguno)"""
+    unique_values = []
+    for v in value:
+        if v not in unique_values and v is not None and str(v).strip() != '':
+            unique_values.append(v)
+
+    if key in MULTI_VALUE_DESCRIPTORS and len(unique_values) > 1:
+        return unique_values
+    if len(unique_values) == 1:
+        return unique_values[0]
+    if len(unique_values) > 1:
+        # Para otros campos, tomar el primer valor único
+        logger.debug("🔍 Consolidando %s: %s -> %s", key, value, unique_values[0])
+        return unique_values[0]
+    return _DROP
+
+
 def consolidate_descriptors(event):
     """Consolida descriptores duplicados en extra_data"""
     if 'extra_data' not in event:
@@ -199,47 +250,35 @@ def consolidate_descriptors(event):
     
     for key, value in extra_data.items():
         if isinstance(value, list):
-            # Remover duplicados manteniendo orden
-            unique_values = []
-            for v in value:
-                if v not in unique_values and v is not None and str(v).strip() != '':
-                    unique_values.append(v)
-            
-            # Para ciertos campos, permitir múltiples valores (tackles dobles, etc.)
-            if key in ['JUGADOR', 'PLAYER', 'ENCUADRE-TACKLE'] and len(unique_values) > 1:
-                consolidated[key] = unique_values
-            elif len(unique_values) == 1:
-                consolidated[key] = unique_values[0]
-            elif len(unique_values) > 1:
-                # Para otros campos, tomar el primer valor único
-                consolidated[key] = unique_values[0]
-                print(f"🔍 Consolidando {key}: {value} -> {unique_values[0]}")
-        else:
-            consolidated[key] = value
+            value = _consolidate_list(key, value)
+            if value is _DROP:
+                continue
+        consolidated[key] = value
     
     event['extra_data'] = consolidated
     return event
 
+def _is_valid_value(value):
+    """False para None, 'undefined', NaN y listas vacías (lo que clean_row descarta)"""
+    if isinstance(value, str):
+        return value != 'undefined'
+    if isinstance(value, float):
+        return value == value  # NaN != NaN
+    if isinstance(value, list):
+        return len(value) > 0
+    return value is not None
+
 def clean_row(row):
     """Limpia evento removiendo valores inválidos"""
     cleaned = {}
     for k, v in row.items():
         if k == 'extra_data':
             if isinstance(v, dict):
-                cleaned_extra = {}
-                for ek, ev in v.items():
-                    if ev is not None and ev != 'undefined':
-                        if isinstance(ev, float) and pd.isna(ev):
-                            continue
-                        if isinstance(ev, list) and len(ev) == 0:
-                            continue
-                        cleaned_extra[ek] = ev
-                cleaned[k] = cleaned_extra
+                cleaned[k] = {ek: ev for ek, ev in v.items() if _is_valid_value(ev)}
             else:
                 cleaned[k] = v
-        else:
-            if v is not None and v != 'undefined' and (not isinstance(v, list) or len(v) > 0) and (not (isinstance(v, float) and pd.isna(v))):
-                cleaned[k] = v
+        elif _is_valid_value(v):
+            cleaned[k] = v
     return cleaned
 
 def calculate_game_time_from_zero_backup(events, match_info=None, profile=None):
@@ -247,9 +286,9 @@ def calculate_game_time_from_zero_backup(events, match_info=None, profile=None):
     Calcula Game_Time desde cero de forma simple y clara.
     Game_Time es el tiempo acumulado de juego desde el inicio del partido.
     """
-    print(f"DEBUG BACKUP: Procesando {len(events)} eventos")
+    logger.debug("Backup: procesando %d eventos", len(events))
     if events:
-        print(f"DEBUG BACKUP: Primer evento: {events[0]}")
+        logger.debug("Backup: primer evento: %s", events[0])
     
     events_df = pd.DataFrame(events)
     
@@ -302,7 +341,8 @@ def calculate_game_time_from_zero_backup(events, match_info=None, profile=None):
                 end_2_ts = end_ts
                 break
     
-    print(f"DEBUG BACKUP: Hitos detectados - kick_off_1: {kick_off_1_ts}, end_1: {end_1_ts}, kick_off_2: {kick_off_2_ts}, end_2: {end_2_ts}")
+    logger.debug("Backup: hitos detectados - kick_off_1: %s, end_1: %s, kick_off_2: %s, end_2: %s",
+                 kick_off_1_ts, end_1_ts, kick_off_2_ts, end_2_ts)
     
     # Calcular duración del primer tiempo
     first_half_duration = 2400  # 40 minutos por defecto
@@ -312,7 +352,7 @@ def calculate_game_time_from_zero_backup(events, match_info=None, profile=None):
         # Estimar basándose en el segundo kick off (descanso típico de 15 min)
         first_half_duration = kick_off_2_ts - kick_off_1_ts - 900  # Restar 15 min de descanso
     
-    print(f"DEBUG BACKUP: Duración del primer tiempo: {first_half_duration}")
+    logger.debug("Backup: duración del primer tiempo: %s", first_half_duration)
     
     # Procesar cada evento
     enriched_events = []
@@ -406,8 +446,15 @@ def calculate_game_time_from_zero_backup(events, match_info=None, profile=None):
     
     return enriched_events
 
-def calculate_game_time_from_zero(events, match_info=None, profile=None):
-    """Calcula Game_Time usando configuración del perfil: manual, category_based o event_based."""
+def resolve_game_time_bounds(events, profile):
+    """
+    Lee time_mapping del perfil (manual, category_based o event_based) y resuelve
+    los delays y los hitos del partido.
+
+    Returns:
+        dict: global_delay, event_delays, kick_off_1, end_1, kick_off_2, end_2
+        y first_half_duration
+    """
     # Validar que el perfil sea un diccionario válido
 
     if not profile or not isinstance(profile, dict):
@@ -452,8 +499,7 @@ def calculate_game_time_from_zero(events, match_info=None, profile=None):
         kick_off_2_ts = manual.get('kick_off_2', 2700)
         end_2_ts = manual.get('end_2', 4800)
         
-        print(f"🔍 DEBUG enricher: method=manual, manual_times={manual}")
-        print(f"🔍 DEBUG enricher: kick_off_1_ts={kick_off_1_ts}, end_1_ts={end_1_ts}, kick_off_2_ts={kick_off_2_ts}, end_2_ts={end_2_ts}")
+        logger.debug("🔍 method=manual, manual_times=%s", manual)
     else:
         # Detectar hitos según categoría o descriptor
         conf = {
@@ -463,6 +509,7 @@ def calculate_game_time_from_zero(events, match_info=None, profile=None):
             'end_2': time_mapping.get('end_2', {}),
         }
         
+        unparseable = 0
         for ev in events:
             cat = ev.get(col_event_type, '').upper()
             extra = ev.get('extra_data', {})
@@ -474,7 +521,7 @@ def calculate_game_time_from_zero(events, match_info=None, profile=None):
             try:
                 ts = float(ts)
             except (ValueError, TypeError):
-                print(f"WARNING: No se pudo convertir timestamp {ts} a float, saltando evento")
+                unparseable += 1
                 continue
             
             for key, cfg in conf.items():
@@ -490,11 +537,13 @@ def calculate_game_time_from_zero(events, match_info=None, profile=None):
                     if desc and val and str(extra.get(desc, '')).upper() == val.upper():
                         if locals().get(f"{key}_ts") is None:
                             locals()[f"{key}_ts"] = ts
+        if unparseable:
+            logger.warning("⚠️ %d eventos con timestamp no numérico ignorados al detectar hitos", unparseable)
         
 
     # Validar que al menos kick_off_1_ts esté definido
     if kick_off_1_ts is None:
-        print("WARNING: No se detectó kick_off_1_ts, usando fallback")
+        logger.warning("⚠️ No se detectó kick_off_1_ts, se usa el primer evento como referencia")
         # Fallback: usar el timestamp del primer evento como referencia
         first_event_ts = min(ev.get(col_time, 0) for ev in events if ev.get(col_time) is not None)
         kick_off_1_ts = float(first_event_ts) if first_event_ts is not None else 0
@@ -526,19 +575,41 @@ def calculate_game_time_from_zero(events, match_info=None, profile=None):
     # Validar hitos manuales
     if method == 'manual':
         if not all([kick_off_1_ts is not None, end_1_ts is not None, kick_off_2_ts is not None, end_2_ts is not None]):
-            print(f"ERROR: Hitos manuales incompletos: kick_off_1_ts={kick_off_1_ts}, end_1_ts={end_1_ts}, kick_off_2_ts={kick_off_2_ts}, end_2_ts={end_2_ts}")
+            logger.error("❌ Hitos manuales incompletos: kick_off_1_ts=%s, end_1_ts=%s, kick_off_2_ts=%s, end_2_ts=%s",
+                         kick_off_1_ts, end_1_ts, kick_off_2_ts, end_2_ts)
             raise ValueError("Los hitos manuales no están completamente definidos en el perfil.")
 
-    # Validar eventos antes de procesar
-    for ev in events:
-        if col_time not in ev or ev[col_time] is None:
-            print(f"WARNING: Evento sin timestamp válido: {ev}")
-        if col_event_type not in ev or not ev[col_event_type]:
-            print(f"WARNING: Evento sin tipo válido: {ev}")
+    # Validar eventos antes de procesar (un resumen, no una línea por evento)
+    missing_time = sum(1 for ev in events if ev.get(col_time) is None)
+    missing_type = sum(1 for ev in events if not ev.get(col_event_type))
+    if missing_time or missing_type:
+        logger.warning("⚠️ Eventos sin timestamp válido: %d, sin tipo válido: %d", missing_time, missing_type)
+    logger.debug("🔍 Hitos: kick_off_1=%s, end_1=%s, kick_off_2=%s, end_2=%s (método %s)",
+                 kick_off_1_ts, end_1_ts, kick_off_2_ts, end_2_ts, method)
 
-    # Depuración de períodos detectados
+    return {
+        'global_delay': global_delay,
+        'event_delays': event_delays,
+        'kick_off_1': kick_off_1_ts,
+        'end_1': end_1_ts,
+        'kick_off_2': kick_off_2_ts,
+        'end_2': end_2_ts,
+        'first_half_duration': first_half_duration,
+    }
 
-    # Depuración de hitos manuales
+
+def calculate_game_time_from_zero(events, match_info=None, profile=None):
+    """Calcula Game_Time usando configuración del perfil: manual, category_based o event_based."""
+    bounds = resolve_game_time_bounds(events, profile)
+    global_delay = bounds['global_delay']
+    event_delays = bounds['event_delays']
+    kick_off_1_ts = bounds['kick_off_1']
+    kick_off_2_ts = bounds['kick_off_2']
+    first_half_duration = bounds['first_half_duration']
+
+    # Los eventos ya están normalizados, usar nombres estándar
+    col_time = 'timestamp_sec'
+    col_event_type = 'event_type'
 
     # Iterar eventos para asignar Game_Time, DETECTED_PERIOD y Time_Group
     enriched_events = []
@@ -621,9 +692,50 @@ def calculate_game_time_from_zero(events, match_info=None, profile=None):
     return enriched_events
 
 
+# Ventana (segundos) para buscar el origen de un try y el resultado de un quiebre
+TRY_BREAK_WINDOW_SEC = 120
+
+# Categorías que pueden iniciar una secuencia ofensiva
+TRY_ORIGIN_CATEGORIES = {"TURNOVER", "SCRUM", "LINEOUT", "KICKOFF", "PENALTY", "TURNOVER+", "KICK OFF"}
+
+
+def event_timestamp(event):
+    """timestamp_sec numérico del evento (0 si falta), o None si no es usable"""
+    value = event.get('timestamp_sec', 0)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:
+        return None
+    return value
+
+
+def _timeline(items):
+    """Ordena [(tiempo, índice, ...)] y devuelve (items, tiempos) para usar con bisect"""
+    items.sort(key=lambda item: (item[0], item[1]))
+    return items, [item[0] for item in items]
+
+
+def _latest_in_window(timeline, try_time):
+    """
+    Último evento con 0 <= try_time - t <= ventana (a igualdad de tiempo, el primero
+    de la lista). Devuelve (tiempo, índice) o None.
+    """
+    items, times = timeline
+    pos = bisect_right(times, try_time)
+    if pos == 0:
+        return None
+    best_time = times[pos - 1]
+    if try_time - best_time > TRY_BREAK_WINDOW_SEC:
+        return None
+    first = items[bisect_left(times, best_time)]
+    return first[0], first[1]
+
+
 def calculate_try_origin_and_phases(events):
     """
     Calcula el origen y fases de cada try analizando la secuencia de eventos previos.
+
+    Los eventos de origen y los rucks se indexan una sola vez por equipo y por
+    tiempo; cada try se resuelve con búsquedas binarias en lugar de recorrer la
+    lista completa.
     
     Args:
         events: Lista de eventos ya normalizados y enriquecidos
@@ -633,10 +745,7 @@ def calculate_try_origin_and_phases(events):
     """
     if not events:
         return events
-    
-    # Categorías que pueden iniciar una secuencia ofensiva
-    origin_categories = ["TURNOVER", "SCRUM", "LINEOUT", "KICKOFF", "PENALTY"]
-    
+
     # Función para detectar si un evento es un try
     def is_try_event(event):
         if event.get('event_type', '').upper() != 'POINTS':
@@ -650,95 +759,128 @@ def calculate_try_origin_and_phases(events):
                       extra_data.get('TIPO-PERDIDA/RECUPERACIN') or  # A veces está mal etiquetado
                       extra_data.get('POINTS_TYPE'))
         
-        is_try = points_type and str(points_type).upper() == 'TRY'
-        if is_try:
-            print(f"🔍 DEBUG: Try detectado en {event.get('timestamp_sec'):.1f}s, team={event.get('team', 'N/A')}")
-        return is_try
-    
-    # Función para encontrar el evento de origen más cercano
-    def find_origin_event(try_event, all_events):
-        try_time = try_event.get('timestamp_sec', 0)
-        try_team = try_event.get('team', '')
-        
-        # Buscar eventos de origen en ventana de 2 minutos (120 segundos) antes del try
-        max_time_window = 120
-        
-        # Buscar eventos de origen previos
-        candidates = []
-        for event in all_events:
-            event_time = event.get('timestamp_sec', 0)
-            time_diff = try_time - event_time
-            
-            # Solo eventos dentro de la ventana de tiempo
-            if time_diff < 0 or time_diff > max_time_window:
-                continue
-                
-            event_type = event.get('event_type', '').upper()
-            
-            # Buscar eventos de origen (TURNOVER+, SCRUM, LINEOUT, KICK OFF, PENALTY a favor)
-            if event_type in origin_categories or event_type in ['TURNOVER+', 'KICK OFF', 'KICKOFF']:
-                # Si tenemos info de equipo, verificar que sea del mismo equipo
-                if try_team and event.get('team') and event.get('team') != try_team:
-                    continue
-                candidates.append(event)
-        
-        if not candidates:
-            print(f"⚠️  DEBUG: No se encontró origen para try en {try_time:.1f}s")
-            return None
-        
-        # Retornar el evento más cercano al try
-        origin = max(candidates, key=lambda x: x.get('timestamp_sec', 0))
-        print(f"✅ DEBUG: Origen encontrado: {origin.get('event_type')} en {origin.get('timestamp_sec'):.1f}s")
-        return origin
-    
-    # Función para contar fases (rucks + 1) entre origen y try
-    def count_phases(try_event, origin_event, all_events):
-        if not origin_event:
-            return 1
-        
-        try_time = try_event.get('timestamp_sec', 0)
-        origin_time = origin_event.get('timestamp_sec', 0)
-        try_team = try_event.get('team', '')
-        
-        # Contar eventos RUCK entre origen y try del mismo equipo
-        ruck_count = 0
-        for event in all_events:
-            event_time = event.get('timestamp_sec', 0)
-            if (event.get('event_type', '').upper() == 'RUCK' and
-                origin_time < event_time < try_time and
-                event.get('team', '') == try_team):
-                ruck_count += 1
-        
-        return ruck_count + 1  # Fases = rucks + 1
-    
-    # Procesar todos los eventos
-    for event in events:
-        if is_try_event(event):
-            # Encontrar origen
-            origin_event = find_origin_event(event, events)
-            
-            # Calcular fases
-            phases = count_phases(event, origin_event, events)
-            
-            # Añadir datos calculados a extra_data
-            if 'extra_data' not in event:
-                event['extra_data'] = {}
-            
-            if origin_event:
-                event['extra_data']['TRY_ORIGIN'] = origin_event.get('event_type', '').upper()
-                print(f"DEBUG: Try en {event.get('timestamp_sec'):.1f}s - origen: {origin_event.get('event_type')} en {origin_event.get('timestamp_sec'):.1f}s, fases: {phases}")
+        return points_type and str(points_type).upper() == 'TRY'
+
+    tries = []
+    origins_all, origins_no_team, origins_by_team = [], [], {}
+    rucks_by_team = {}
+    for index, event in enumerate(events):
+        event_time = event_timestamp(event)
+        if event_time is None:
+            continue
+        event_type = event.get('event_type', '').upper()
+        team = event.get('team', '')
+        if event_type in TRY_ORIGIN_CATEGORIES:
+            entry = (event_time, index)
+            origins_all.append(entry)
+            if team:
+                origins_by_team.setdefault(team, []).append(entry)
             else:
-                event['extra_data']['TRY_ORIGIN'] = 'UNKNOWN'
-                print(f"DEBUG: Try en {event.get('timestamp_sec'):.1f}s - sin origen identificado, fases: {phases}")
-            
-            event['extra_data']['TRY_PHASES'] = phases
-    
+                origins_no_team.append(entry)
+        elif event_type == 'RUCK':
+            rucks_by_team.setdefault(team, []).append(event_time)
+        elif event_type == 'POINTS' and is_try_event(event):
+            tries.append((index, event_time))
+
+    if not tries:
+        return events
+
+    origins_all = _timeline(origins_all)
+    origins_no_team = _timeline(origins_no_team)
+    origins_by_team = {team: _timeline(items) for team, items in origins_by_team.items()}
+    for times in rucks_by_team.values():
+        times.sort()
+
+    debug = logger.isEnabledFor(logging.DEBUG)
+    origins_found = Counter()
+    for index, try_time in tries:
+        event = events[index]
+        try_team = event.get('team', '')
+
+        # Origen: el evento de origen más cercano (hacia atrás) dentro de la ventana.
+        # Si el try tiene equipo solo valen los orígenes de ese equipo o sin equipo.
+        if try_team:
+            found = [_latest_in_window(origins_no_team, try_time)]
+            if try_team in origins_by_team:
+                found.append(_latest_in_window(origins_by_team[try_team], try_time))
+            found = [f for f in found if f]
+            origin = min(found, key=lambda f: (-f[0], f[1])) if found else None
+        else:
+            origin = _latest_in_window(origins_all, try_time)
+
+        # Fases = rucks del mismo equipo estrictamente entre el origen y el try + 1
+        phases = 1
+        if origin:
+            ruck_times = rucks_by_team.get(try_team, [])
+            phases = bisect_left(ruck_times, try_time) - bisect_right(ruck_times, origin[0]) + 1
+            phases = max(phases, 1)
+
+        if 'extra_data' not in event:
+            event['extra_data'] = {}
+
+        if origin:
+            event['extra_data']['TRY_ORIGIN'] = events[origin[1]].get('event_type', '').upper()
+        else:
+            event['extra_data']['TRY_ORIGIN'] = 'UNKNOWN'
+        event['extra_data']['TRY_PHASES'] = phases
+
+        origins_found[event['extra_data']['TRY_ORIGIN']] += 1
+        if debug:
+            logger.debug("Try en %.1fs (team=%s) - origen: %s, fases: %d",
+                         try_time, try_team or 'N/A', event['extra_data']['TRY_ORIGIN'], phases)
+
+    logger.info("🏉 Tries: %d, orígenes: %s", len(tries), dict(origins_found))
     return events
 
 
+def _break_outcome(event, break_team):
+    """Resultado que aporta un evento posterior a un quiebre de break_team (o None)"""
+    event_type = event.get('event_type', '').upper()
+    event_team = event.get('team', '')
+    extra_data = event.get('extra_data', {})
+
+    # TRY - Puntos anotados (del mismo equipo del quiebre)
+    if event_type == 'POINTS':
+        points_type = (extra_data.get('TIPO-PUNTOS') or 
+                     extra_data.get('TIPO_PUNTOS') or 
+                     extra_data.get('POINTS_TYPE') or '').upper()
+        if points_type == 'TRY' and event_team == break_team:
+            return 'TRY'
+
+    # PENALTY - Penal concedido (cualquier equipo)
+    if event_type == 'PENALTY':
+        if event_team == break_team:
+            return 'PENALTY_FOR'
+        elif event_team and event_team != break_team:
+            return 'PENALTY_AGAINST'
+
+    # TURNOVER - Pérdida de posesión del equipo del quiebre
+    if event_type in ['TURNOVER-', 'TURNOVER']:
+        turnover_type = extra_data.get('TIPO-PERDIDA/RECUPERACION') or extra_data.get('TURNOVER_TYPE') or ''
+        if event_team == break_team:
+            return f'TURNOVER_{turnover_type}'
+
+    # KICK - Patada en juego
+    if event_type == 'KICK' and event_team == break_team:
+        return 'KICK'
+
+    # GOAL-KICK - Patada a los palos
+    if event_type == 'GOAL-KICK' and event_team == break_team:
+        return 'GOAL_KICK_ATTEMPT'
+
+    return None
+
+
+BREAK_RESULT_CATEGORIES = {'POINTS', 'PENALTY', 'TURNOVER-', 'TURNOVER', 'KICK', 'GOAL-KICK'}
+
+
 def calculate_break_result(events):
     """
     Calcula el resultado de cada quiebre analizando los eventos posteriores.
+
+    El resultado es el primer evento (en orden de la lista) de los 120 segundos
+    siguientes que decide el quiebre. Los candidatos se indexan por equipo y por
+    tiempo, así cada quiebre solo revisa los eventos de su ventana.
     
     Args:
         events: Lista de eventos ya normalizados y enriquecidos
@@ -748,122 +890,346 @@ def calculate_break_result(events):
     """
     if not events:
         return events
-    
-    # Función para detectar si un evento es un quiebre
-    def is_break_event(event):
-        return event.get('event_type', '').upper() == 'BREAK'
-    
-    # Función para determinar el resultado del quiebre
-    def find_break_result(break_event, all_events):
-        break_time = break_event.get('timestamp_sec', 0)
-        break_team = break_event.get('team', '')
+
+    breaks = []
+    candidates_by_team = {}
+    penalties_with_team = []
+    for index, event in enumerate(events):
+        event_time = event_timestamp(event)
+        if event_time is None:
+            continue
+        event_type = event.get('event_type', '').upper()
+        if event_type == 'BREAK':
+            breaks.append((index, event_time))
+        if event_type in BREAK_RESULT_CATEGORIES:
+            team = event.get('team', '')
+            candidates_by_team.setdefault(team, []).append((event_time, index))
+            # Un penal con equipo decide cualquier quiebre (a favor o en contra)
+            if event_type == 'PENALTY' and team:
+                penalties_with_team.append((event_time, index))
+
+    if not breaks:
+        return events
+
+    candidates_by_team = {team: _timeline(items) for team, items in candidates_by_team.items()}
+    penalties_with_team = _timeline(penalties_with_team)
+
+    def window(timeline, break_time):
+        """Candidatos con 0 < t - break_time <= ventana"""
+        items, times = timeline
+        lo = bisect_right(times, break_time)
+        hi = bisect_right(times, break_time + TRY_BREAK_WINDOW_SEC)
+        # Ajuste por redondeo: el criterio es la diferencia, no la suma
+        while hi < len(times) and times[hi] - break_time <= TRY_BREAK_WINDOW_SEC:
+            hi += 1
+        while hi > lo and times[hi - 1] - break_time > TRY_BREAK_WINDOW_SEC:
+            hi -= 1
+        return items[lo:hi]
+
+    empty_timeline = ([], [])
+    debug = logger.isEnabledFor(logging.DEBUG)
+    results = Counter()
+    for index, break_time in breaks:
+        event = events[index]
+        break_team = event.get('team', '')
+
+        candidates = window(candidates_by_team.get(break_team, empty_timeline), break_time)
+        candidates += window(penalties_with_team, break_time)
+
+        result, time_to_result = 'CONTINUES', None
+        for candidate_time, candidate_index in sorted(candidates, key=lambda c: c[1]):
+            outcome = _break_outcome(events[candidate_index], break_team)
+            if outcome:
+                result, time_to_result = outcome, candidate_time - break_time
+                break
+
+        # Añadir datos calculados a extra_data
+        if 'extra_data' not in event:
+            event['extra_data'] = {}
         
-        # Ventana de 120 segundos después del quiebre
-        max_time_window = 120
+        event['extra_data']['BREAK_RESULT'] = result
+        if time_to_result:
+            event['extra_data']['BREAK_RESULT_TIME'] = round(time_to_result, 1)
         
-        # Buscar eventos posteriores
-        for event in all_events:
-            event_time = event.get('timestamp_sec', 0)
-            time_diff = event_time - break_time
-            
-            # Solo eventos dentro de la ventana de tiempo
-            if time_diff <= 0 or time_diff > max_time_window:
+        results[result] += 1
+        if debug:
+            logger.debug("Break en %.1fs - resultado: %s%s", break_time, result,
+                         f" ({time_to_result:.1f}s después)" if time_to_result else "")
+
+    logger.info("⚡ Quiebres: %d, resultados: %s", len(breaks), dict(results))
+    return events
+
+
+# --- Enriquecimiento columnar --------------------------------------------------
+#
+# Mismo resultado que el recorrido evento por evento (calculate_game_time_from_zero
+# + consolidate_descriptors + process_*_events), pero Game_Time, período y grupo
+# se calculan con arrays sobre un EventFrame, los campos de PENALTY/LINEOUT/TACKLE
+# se calculan por tipo (máscara sobre type_codes) antes de armar la salida y cada
+# evento de salida se arma una sola vez, sin mutarlo después. En el recorrido por
+# dicts, translate_fields_to_english y el clean_row final trabajan sobre copias que
+# se descartan, así que aquí no se aplican.
+
+TIME_GROUPS = ("Primer cuarto", "Segundo cuarto", "Tercer cuarto", "Cuarto cuarto")
+
+# Claves de extra_data que leen los procesadores de PENALTY, LINEOUT y TACKLE
+PROCESSOR_KEYS = ('DESCRIPTOR', 'player', 'PLAYER', 'PLAYER_2')
+
+
+def compute_game_time_columns(frame, bounds):
+    """
+    Game_Time, DETECTED_PERIOD y Time_Group de todos los eventos a la vez.
+
+    Args:
+        frame: EventFrame del partido
+        bounds: salida de resolve_game_time_bounds
+
+    Returns:
+        dict de listas alineadas con frame.events: valid (False → "Sin datos"),
+        timestamp (con delay), delay, game_time, period y time_group
+    """
+    upper_types = [event_type.upper() for event_type in frame.types]
+    global_delay = bounds['global_delay']
+    event_delays = bounds['event_delays']
+    # Sin delay se guarda el entero 0, como en el recorrido por dicts (aunque la suma dé 0.0)
+    type_delays = []
+    for t in upper_types:
+        delay = global_delay + event_delays[t] if t in event_delays else global_delay
+        type_delays.append(delay if delay != 0 else 0)
+    delays = frame.per_type(type_delays, dtype=object)
+
+    valid = frame.has_time & frame.per_type([bool(t) for t in upper_types], dtype=bool)
+    timestamp = frame.timestamp + frame.per_type(type_delays, dtype=np.float64)
+
+    kick_off_1 = bounds['kick_off_1']
+    kick_off_2 = bounds['kick_off_2']
+    first_half = bounds['first_half_duration']
+    second_period = timestamp >= kick_off_2
+    game_time = np.where(second_period, first_half + (timestamp - kick_off_2), timestamp - kick_off_1)
+    # Como max(0, t): los negativos y NaN quedan en 0
+    game_time = np.where(game_time > 0, game_time, 0.0)
+
+    group_codes = np.select(
+        [game_time < first_half / 2, game_time < first_half, game_time < first_half + first_half / 2],
+        [0, 1, 2], default=3
+    )
+    # Un formato MM:SS por segundo distinto (round y rint redondean igual, al par)
+    seconds, inverse = np.unique(np.rint(game_time), return_inverse=True)
+    labels = np.array([seconds_to_mmss(s) for s in seconds.tolist()], dtype=object)
+
+    return {
+        'valid': valid.tolist(),
+        'timestamp': timestamp.tolist(),
+        'delay': delays.tolist(),
+        'game_time': labels[inverse.reshape(-1)].tolist() if frame.size else [],
+        'period': np.where(second_period, 2, 1).tolist(),
+        'time_group': np.asarray(TIME_GROUPS, dtype=object)[group_codes].tolist() if frame.size else [],
+    }
+
+
+def _final_value(key, value, clean):
+    """Valor de extra_data[key] tras clean_row (si clean) y consolidate_descriptors, o _DROP"""
+    if clean and not _is_valid_value(value):
+        return _DROP
+    if isinstance(value, list):
+        return _consolidate_list(key, value)
+    return value
+
+
+def _build_extra(extra_data, overrides, clean, fields=None):
+    """
+    extra_data con los valores de overrides, limpio (si clean) y con descriptores
+    consolidados; al final, los campos de los procesadores (fields), sin limpiar
+    """
+    result = {}
+    for key, value in extra_data.items():
+        if key in overrides:
+            value = overrides[key]
+        # Textos y números son la gran mayoría: se resuelven sin llamar a _final_value
+        cls = value.__class__
+        if cls is str:
+            if clean and value == 'undefined':
                 continue
-            
-            event_type = event.get('event_type', '').upper()
-            event_team = event.get('team', '')
-            extra_data = event.get('extra_data', {})
-            
-            # TRY - Puntos anotados (del mismo equipo del quiebre)
-            if event_type == 'POINTS':
-                points_type = (extra_data.get('TIPO-PUNTOS') or 
-                             extra_data.get('TIPO_PUNTOS') or 
-                             extra_data.get('POINTS_TYPE') or '').upper()
-                if points_type == 'TRY' and event_team == break_team:
-                    return 'TRY', time_diff
-            
-            # PENALTY - Penal concedido (cualquier equipo)
-            if event_type == 'PENALTY':
-                # Si es penal a favor (del equipo del quiebre)
-                if event_team == break_team:
-                    return 'PENALTY_FOR', time_diff
-                # Si es penal en contra
-                elif event_team and event_team != break_team:
-                    return 'PENALTY_AGAINST', time_diff
-            
-            # TURNOVER - Pérdida de posesión
-            if event_type in ['TURNOVER-', 'TURNOVER']:
-                turnover_type = extra_data.get('TIPO-PERDIDA/RECUPERACION') or extra_data.get('TURNOVER_TYPE') or ''
-                # Si es pérdida del equipo del quiebre
-                if event_team == break_team:
-                    return f'TURNOVER_{turnover_type}', time_diff
-            
-            # KICK - Patada en juego
-            if event_type == 'KICK':
-                if event_team == break_team:
-                    return 'KICK', time_diff
-            
-            # GOAL-KICK - Patada a los palos
-            if event_type == 'GOAL-KICK':
-                if event_team == break_team:
-                    return 'GOAL_KICK_ATTEMPT', time_diff
-        
-        # Si no se encontró resultado específico
-        return 'CONTINUES', None
+        elif cls is float:
+            if clean and value != value:
+                continue
+        else:
+            value = _final_value(key, value, clean)
+            if value is _DROP:
+                continue
+        result[key] = value
+    for key, value in overrides.items():
+        if key not in extra_data:
+            result[key] = value
+    if fields:
+        result.update(fields)
+    return result
+
+
+def _processor_view(event, clean):
+    """
+    Lo que leen los procesadores de un evento (players, DESCRIPTOR y PROCESSOR_KEYS
+    de extra_data), con los valores que tendrá en la salida
+    """
+    extra_data = event.get('extra_data', {})
+    view_extra = {}
+    for key in PROCESSOR_KEYS:
+        if key in extra_data:
+            value = _final_value(key, extra_data[key], clean)
+            if value is not _DROP:
+                view_extra[key] = value
+    view = {'extra_data': view_extra}
+    for key in ('players', 'DESCRIPTOR'):
+        if key in event and (not clean or _is_valid_value(event[key])):
+            view[key] = event[key]
+    return view
+
+
+def penalty_card_columns(descriptors, players):
+    """YELLOW-CARD y RED-CARD de varios penales a la vez: NEUTRAL → amarilla, NEGATIVE → roja"""
+    descriptors = np.asarray(descriptors, dtype=object)
+    players = np.asarray(players, dtype=object)
+    yellow = np.where(descriptors == 'NEUTRAL', players, None)
+    red = np.where(descriptors == 'NEGATIVE', players, None)
+    return yellow.tolist(), red.tolist()
+
+
+def compute_descriptor_fields(frame, valid):
+    """
+    Campos que agregan los procesadores de PENALTY, LINEOUT y TACKLE, por tipo.
+
+    Cada tipo se selecciona con su máscara sobre type_codes. Las tarjetas de los
+    penales se deciden sobre columnas; lanzador/receptor y jugadores de lineouts y
+    tackles salen de lineout_fields/tackle_fields, los mismos que usa el recorrido
+    por dicts.
+
+    Returns:
+        dict índice de evento → campos, en el orden en que los escribe el procesador
+    """
+    fields = {}
+    penalties = frame.type_indices('PENALTY').tolist()
+    if penalties:
+        views = [_processor_view(frame.events[i], valid[i]) for i in penalties]
+        yellow, red = penalty_card_columns([_penalty_descriptor(v) for v in views],
+                                           [_penalty_player(v) for v in views])
+        for i, yellow_card, red_card in zip(penalties, yellow, red):
+            fields[i] = {'YELLOW-CARD': yellow_card, 'RED-CARD': red_card}
+
+    for event_type, build in (('LINEOUT', lineout_fields), ('TACKLE', tackle_fields)):
+        for i in frame.type_indices(event_type).tolist():
+            fields[i] = build(_processor_view(frame.events[i], valid[i]))
+    return fields
+
+
+def materialize_enriched_events(frame, columns, fields=None):
+    """Arma los dicts de salida: evento original + columnas calculadas + campos de los procesadores"""
+    fields = fields or {}
+    enriched = []
+    rows = zip(frame.events, columns['valid'], columns['timestamp'], columns['delay'],
+               columns['game_time'], columns['period'], columns['time_group'])
+    for i, (ev, valid, timestamp, delay, game_time, period, time_group) in enumerate(rows):
+        if not valid:
+            row = ev.copy()
+            row['extra_data'] = _build_extra(ev.get('extra_data', {}), {
+                'Game_Time': "00:00", 'DETECTED_PERIOD': None, 'Time_Group': "Sin datos"
+            }, clean=False, fields=fields.get(i))
+            enriched.append(row)
+            continue
+
+        row = {key: value for key, value in ev.items()
+               if value is not None and (value.__class__ is str and value != 'undefined'
+                                         or value.__class__ is not str and _is_valid_value(value))}
+        if 'timestamp_sec' in row:
+            if timestamp == timestamp:
+                row['timestamp_sec'] = timestamp
+            else:
+                del row['timestamp_sec']
+        row['extra_data'] = _build_extra(ev.get('extra_data', {}), {
+            '_delay_applied': delay, 'Game_Time': game_time, 'DETECTED_PERIOD': period, 'Time_Group': time_group
+        }, clean=True, fields=fields.get(i))
+        enriched.append(row)
+    return enriched
+
+
+def _enrich_columnar(events, profile, stage_timings):
+    with _stage(stage_timings, "game_time"):
+        bounds = resolve_game_time_bounds(events, profile)
+        frame = EventFrame(events)
+        columns = compute_game_time_columns(frame, bounds)
+
+    with _stage(stage_timings, "descriptors"):
+        fields = compute_descriptor_fields(frame, columns['valid'])
+        enriched = materialize_enriched_events(frame, columns, fields)
+    return enriched
+
+
+def _enrich_dicts(events, match_info, profile, stage_timings):
+    # Usar la función principal que maneja tiempos manuales del perfil
+    with _stage(stage_timings, "game_time"):
+        enriched = calculate_game_time_from_zero(events, match_info, profile)
     
-    # Procesar todos los eventos BREAK
-    for event in events:
-        if is_break_event(event):
-            # Encontrar resultado
-            result, time_to_result = find_break_result(event, events)
+    # Procesar eventos especiales y limpiar
+    with _stage(stage_timings, "descriptors"):
+        for event_dict in enriched:
+            # Consolidar descriptores duplicados PRIMERO
+            event_dict = consolidate_descriptors(event_dict)
             
-            # Añadir datos calculados a extra_data
-            if 'extra_data' not in event:
-                event['extra_data'] = {}
+            # Traducir campos de español a inglés
+            event_dict = translate_fields_to_english(event_dict)
             
-            event['extra_data']['BREAK_RESULT'] = result
-            if time_to_result:
-                event['extra_data']['BREAK_RESULT_TIME'] = round(time_to_result, 1)
+            # Procesar eventos específicos
+            if event_dict.get('event_type') == 'PENALTY':
+                event_dict = process_penalty_events(event_dict)
+            elif event_dict.get('event_type') == 'LINEOUT':
+                event_dict = process_lineout_events(event_dict)
+            elif event_dict.get('event_type') == 'TACKLE':
+                event_dict = process_tackle_events(event_dict)
             
-            print(f"DEBUG: Break en {event.get('timestamp_sec'):.1f}s - resultado: {result}" + 
-                  (f" ({time_to_result:.1f}s después)" if time_to_result else ""))
-    
-    return events
+            # Limpiar evento
+            event_dict = clean_row(event_dict)
+    return enriched
+
 
+@contextmanager
+def _stage(timings, name):
+    """Acumula en timings[name] los segundos que tarda el bloque"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start)
 
-def enrich_events(events, match_info, profile=None):
+
+def enrich_events(events, match_info, profile=None, timings=None, columnar=None):
     """
     Función principal de enriquecimiento.
     Procesa eventos de rugby añadiendo Game_Time, períodos y grupos de tiempo.
+
+    timings: dict opcional donde se guardan los segundos de cada etapa. Con
+    ENRICH_PROFILE=1 el desglose se registra en el log aunque no se pase.
+    columnar: usar el cálculo columnar (EventFrame) o el recorrido por dicts;
+    por defecto según ENRICH_COLUMNAR. Ambos devuelven los mismos eventos.
     """
-    # Usar la función principal que maneja tiempos manuales del perfil
-    enriched = calculate_game_time_from_zero(events, match_info, profile)
-    
-    # Procesar eventos especiales y limpiar
-    for event_dict in enriched:
-        # Consolidar descriptores duplicados PRIMERO
-        event_dict = consolidate_descriptors(event_dict)
-        
-        # Traducir campos de español a inglés
-        event_dict = translate_fields_to_english(event_dict)
-        
-        # Procesar eventos específicos
-        if event_dict.get('event_type') == 'PENALTY':
-            event_dict = process_penalty_events(event_dict)
-        elif event_dict.get('event_type') == 'LINEOUT':
-            event_dict = process_lineout_events(event_dict)
-        elif event_dict.get('event_type') == 'TACKLE':
-            event_dict = process_tackle_events(event_dict)
-        
-        # Limpiar evento
-        event_dict = clean_row(event_dict)
+    stage_timings = timings if timings is not None else {}
+    if columnar is None:
+        columnar = ENRICH_COLUMNAR
+
+    if columnar:
+        enriched = _enrich_columnar(events, profile, stage_timings)
+    else:
+        enriched = _enrich_dicts(events, match_info, profile, stage_timings)
     
     # Calcular origen y fases de tries DESPUÉS de todo el procesamiento
-    print("DEBUG: Calculando origen y fases de tries...")
-    enriched = calculate_try_origin_and_phases(enriched)
+    with _stage(stage_timings, "try_origin"):
+        enriched = calculate_try_origin_and_phases(enriched)
     
     # Calcular resultado de quiebres
-    print("DEBUG: Calculando resultado de quiebres...")
-    enriched = calculate_break_result(enriched)
+    with _stage(stage_timings, "break_result"):
+        enriched = calculate_break_result(enriched)
+
+    if ENRICH_PROFILE:
+        total = sum(stage_timings.values())
+        logger.info("⏱️ Enricher (%d eventos, %.1f ms): %s", len(enriched), total * 1000,
+                    ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in stage_timings.items()))
     
     return enriched
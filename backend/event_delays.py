@@ -0,0 +1,89 @@
+"""
+Delays de video aplicados al leer los eventos.
+
+Match.global_delay_seconds y Match.event_delays (p. ej. {"TACKLE": -2}) corrigen
+el segundo del video en que empieza cada clip. No se escriben en los eventos:
+las APIs de lectura devuelven, junto a timestamp_sec tal como está guardado,
+
+    delay_offset_sec        = global + delay del tipo - extra_data._delay_applied
+    effective_timestamp_sec = timestamp_sec + delay_offset_sec
+
+_delay_applied es el delay que el import ya sumó a timestamp_sec (delays del
+perfil): el delay del partido lo reemplaza en lugar de acumularse, igual que en
+el reproductor. Cambiar o deshacer un delay es un UPDATE de una fila de matches
+y la próxima lectura ya lo refleja.
+"""
+import math
+
+import numpy as np
+
+
+def _number(value):
+    """Número finito o 0 (como Number(x) || 0 en el frontend)"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return number if math.isfinite(number) else 0.0
+
+
+def match_delays(match):
+    """
+    Delays configurados en el partido.
+
+    Returns:
+        tuple: (global_delay, {EVENT_TYPE: delay}) con los tipos en mayúsculas
+    """
+    global_delay = _number(match.global_delay_seconds)
+    raw = match.event_delays if isinstance(match.event_delays, dict) else {}
+    event_delays = {}
+    # Si el mismo tipo aparece con distinto formato, gana la clave ya en mayúsculas
+    for key, value in sorted(raw.items(), key=lambda item: str(item[0]) != str(item[0]).upper()):
+        event_delays.setdefault(str(key).upper(), _number(value))
+    return global_delay, event_delays
+
+
+def delay_offsets(event_types, applied, global_delay, event_delays):
+    """
+    Delay pendiente de cada evento, calculado sobre arrays.
+
+    Args:
+        event_types: event_type de cada evento
+        applied: _delay_applied de cada evento (ya incluido en timestamp_sec)
+        global_delay, event_delays: salida de match_delays
+
+    Returns:
+        np.ndarray: segundos a sumar a timestamp_sec
+    """
+    lookup = {}
+    codes = np.fromiter(
+        (lookup.setdefault(str(t or '').upper(), len(lookup)) for t in event_types),
+        dtype=np.int64, count=len(event_types)
+    )
+    type_delays = np.array([event_delays.get(t, 0.0) for t in lookup], dtype=np.float64)
+    return global_delay + type_delays[codes] - np.asarray(applied, dtype=np.float64)
+
+
+def project_delays(events_data, match):
+    """
+    Añade delay_offset_sec y effective_timestamp_sec a los eventos (dicts de
+    respuesta) de un partido. No modifica timestamp_sec.
+    """
+    if not events_data:
+        return events_data
+
+    global_delay, event_delays = match_delays(match)
+    applied = []
+    timestamps = []
+    for ev in events_data:
+        extra_data = ev.get('extra_data')
+        applied.append(_number(extra_data.get('_delay_applied')) if isinstance(extra_data, dict) else 0.0)
+        ts = ev.get('timestamp_sec')
+        timestamps.append(np.nan if ts is None else ts)
+
+    offsets = delay_offsets([ev.get('event_type') for ev in events_data], applied, global_delay, event_delays)
+    effective = np.asarray(timestamps, dtype=np.float64) + offsets
+    for ev, offset, ts in zip(events_data, offsets.tolist(), effective.tolist()):
+        ev['delay_offset_sec'] = offset
+        ev['effective_timestamp_sec'] = ts if math.isfinite(ts) else None
+    return events_data
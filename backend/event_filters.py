@@ -0,0 +1,161 @@
+"""
+Filtros, proyección y paginación de GET /api/matches/<id>/events.
+
+Los filtros se traducen a predicados SQL (columnas y JSONB de extra_data) para
+que el dashboard reciba solo los eventos que va a mostrar:
+
+    event_type=TACKLE,RUCK     tipo de evento (varios separados por coma)
+    team=OPPONENT              extra_data.EQUIPO (el campo team de la respuesta)
+    period=2                   extra_data.DETECTED_PERIOD (1 si falta)
+    player=Matera              extra_data.PLAYER o PLAYERS (texto o lista)
+    from_sec=600&to_sec=1200   rango de timestamp_sec (segundos del video)
+    fields=id,event_type,...   proyección: claves de cada evento en la respuesta
+    limit=500&cursor=<id>      paginación por cursor (id del último evento recibido)
+
+Todos los parámetros se pueden repetir o separar por coma. Sin parámetros la
+respuesta es la de siempre: todos los eventos del partido. total_events es siempre
+el total del partido; page_count, los eventos de la respuesta, y next_cursor el
+cursor de la página siguiente (None en la última).
+"""
+from sqlalchemy import func, or_
+
+from models import Event
+
+# Campos de la respuesta (ver get_match_events)
+EVENT_FIELDS = (
+    "id", "event_type", "timestamp_sec", "Game_Time", "game_time", "players", "x", "y",
+    "team", "IS_OPPONENT", "period", "extra_data", "delay_offset_sec", "effective_timestamp_sec",
+)
+# Campos que salen de columnas propias: pedir solo estos evita leer extra_data
+COLUMN_FIELDS = ("id", "event_type", "timestamp_sec", "x", "y")
+DELAY_FIELDS = ("delay_offset_sec", "effective_timestamp_sec")
+
+MAX_EVENTS_LIMIT = 5000
+
+
+def _list_arg(args, name):
+    """Valores de un parámetro repetible y/o separado por comas"""
+    values = []
+    for raw in args.getlist(name):
+        values.extend(part.strip() for part in str(raw).split(','))
+    return [value for value in values if value]
+
+
+def _number_arg(args, name, cast):
+    raw = args.get(name)
+    if raw in (None, ''):
+        return None
+    try:
+        return cast(raw)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} debe ser numérico")
+
+
+def parse_event_filters(args):
+    """
+    Lee los filtros de la query string.
+
+    Returns:
+        dict con event_types, teams, periods, players, from_sec, to_sec, fields
+        (None = todos), limit y cursor
+
+    Raises:
+        ValueError: si algún parámetro no es válido (la ruta responde 400)
+    """
+    periods = []
+    for value in _list_arg(args, 'period'):
+        try:
+            periods.append(int(value))
+        except ValueError:
+            raise ValueError("period debe ser numérico")
+
+    fields = _list_arg(args, 'fields') or None
+    if fields:
+        unknown = [f for f in fields if f not in EVENT_FIELDS]
+        if unknown:
+            raise ValueError(f"Campos desconocidos: {', '.join(unknown)}")
+        # id siempre: es el cursor de la paginación
+        fields = ["id"] + [f for f in dict.fromkeys(fields) if f != "id"]
+
+    limit = _number_arg(args, 'limit', int)
+    if limit is not None and not 0 < limit <= MAX_EVENTS_LIMIT:
+        raise ValueError(f"limit debe estar entre 1 y {MAX_EVENTS_LIMIT}")
+
+    return {
+        "event_types": _list_arg(args, 'event_type'),
+        "teams": _list_arg(args, 'team'),
+        "periods": periods,
+        "players": _list_arg(args, 'player'),
+        "from_sec": _number_arg(args, 'from_sec', float),
+        "to_sec": _number_arg(args, 'to_sec', float),
+        "fields": fields,
+        "limit": limit,
+        "cursor": _number_arg(args, 'cursor', int),
+    }
+
+
+def needs_extra_data(fields):
+    """Si la proyección pide algún campo que se arma desde extra_data"""
+    return fields is None or any(f not in COLUMN_FIELDS for f in fields)
+
+
+def narrows_events(filters):
+    """Si los filtros o la paginación dejan afuera eventos del partido"""
+    return any(filters[key] for key in ("event_types", "teams", "periods", "players")) or any(
+        filters[key] is not None for key in ("from_sec", "to_sec", "limit", "cursor")
+    )
+
+
+def _player_condition(player):
+    # PLAYER/PLAYERS se guardan como texto o como lista de textos
+    return or_(*(
+        Event.extra_data.contains({key: value})
+        for key in ("PLAYER", "PLAYERS")
+        for value in (player, [player])
+    ))
+
+
+def apply_event_filters(query, filters):
+    """Agrega a query (Query o select sobre Event) los filtros, el orden por id y el cursor/limit"""
+    if filters["event_types"]:
+        query = query.filter(Event.event_type.in_(filters["event_types"]))
+    if filters["teams"]:
+        query = query.filter(Event.extra_data['EQUIPO'].astext.in_(filters["teams"]))
+    if filters["periods"]:
+        period = func.coalesce(Event.extra_data['DETECTED_PERIOD'].astext, '1')
+        query = query.filter(period.in_([str(p) for p in filters["periods"]]))
+    if filters["players"]:
+        query = query.filter(or_(*(_player_condition(p) for p in filters["players"])))
+    if filters["from_sec"] is not None:
+        query = query.filter(Event.timestamp_sec >= filters["from_sec"])
+    if filters["to_sec"] is not None:
+        query = query.filter(Event.timestamp_sec <= filters["to_sec"])
+
+    query = query.order_by(Event.id)
+    if filters["cursor"] is not None:
+        query = query.filter(Event.id > filters["cursor"])
+    if filters["limit"] is not None:
+        # Uno más para saber si hay otra página
+        query = query.limit(filters["limit"] + 1)
+    return query
+
+
+def paginate(events, filters):
+    """
+    Recorta el resultado de apply_event_filters a la página pedida.
+
+    Returns:
+        tuple: (eventos de la página, next_cursor o None si es la última)
+    """
+    limit = filters["limit"]
+    if limit is None or len(events) <= limit:
+        return events, None
+    page = events[:limit]
+    return page, page[-1].id
+
+
+def project_fields(events_data, fields):
+    """Deja en cada evento solo las claves pedidas en fields"""
+    if fields is None:
+        return events_data
+    return [{field: ev.get(field) for field in fields} for ev in events_data]
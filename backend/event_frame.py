@@ -0,0 +1,76 @@
+"""
+Tabla columnar de eventos.
+
+Los eventos normalizados llegan como una lista de dicts. EventFrame extrae una
+sola vez las columnas que se usan en cálculos sobre todo el partido y las guarda
+como arrays de numpy: event_type codificado como enteros y timestamp_sec en
+float64. Así los cálculos se expresan con máscaras y
+operaciones sobre arrays en lugar de recorrer, copiar y mutar cada dict.
+
+extra_data no se convierte: su contenido cambia de un evento a otro. Los dicts
+de salida se arman una única vez al final, a partir de los eventos originales y
+de las columnas calculadas (ver enricher.enrich_events).
+"""
+import numpy as np
+
+
+def _hashable(value):
+    return value if getattr(value, '__hash__', None) is not None else repr(value)
+
+
+def _factorize(values):
+    """Códigos enteros por valor (en orden de aparición) y la lista de valores distintos"""
+    lookup = {}
+    codes = np.fromiter((lookup.setdefault(_hashable(v), len(lookup)) for v in values),
+                        dtype=np.int32, count=len(values))
+    return codes, list(lookup)
+
+
+def _parse_float(value):
+    """float(value), o None si falta o no es numérico"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+class EventFrame:
+    """
+    Eventos de un partido en columnas.
+
+    Atributos:
+        events: lista original de eventos (no se modifica)
+        type_codes / types: código de event_type por evento y los valores distintos
+        timestamp: timestamp_sec como float64 (NaN si falta o no es numérico)
+        has_time: True donde timestamp_sec existe y es numérico
+    """
+
+    def __init__(self, events):
+        self.events = events
+        self.size = len(events)
+        self.type_codes, self.types = _factorize([ev.get('event_type', '') for ev in events])
+
+        parsed = [_parse_float(ev.get('timestamp_sec')) for ev in events]
+        self.has_time = np.fromiter((t is not None for t in parsed), dtype=bool, count=self.size)
+        self.timestamp = np.array([np.nan if t is None else t for t in parsed], dtype=np.float64)
+
+    def __len__(self):
+        return self.size
+
+    def per_type(self, values, dtype=None):
+        """
+        Expande un valor por tipo de evento (alineado con self.types) a un array
+        por evento
+        """
+        return np.asarray(values, dtype=dtype)[self.type_codes]
+
+    def type_mask(self, *event_types):
+        """Máscara de los eventos cuyo event_type es alguno de event_types (comparación exacta)"""
+        codes = [code for code, value in enumerate(self.types) if value in event_types]
+        return np.isin(self.type_codes, codes)
+
+    def type_indices(self, *event_types):
+        """Posiciones (en orden) de los eventos de esos tipos"""
+        return np.flatnonzero(self.type_mask(*event_types))
@@ -0,0 +1,285 @@
+"""
+Cache de las respuestas de eventos ya serializadas.
+
+GET /api/matches/<id>/events y GET /api/matches/events arman el mismo JSON en
+cada request, pero los eventos solo cambian al importar, con bulk_update o al
+recalcular tiempos. Esas escrituras suben matches.events_version
+(bump_events_version) y la clave del cache incluye esa versión junto con los
+campos del partido que entran en la respuesta (delays, nombre, video...), así
+que una entrada nunca se invalida: simplemente deja de pedirse.
+
+Cada entrada guarda el JSON en bytes y su ETag (sha256 del cuerpo, débil porque
+el mismo ETag vale para el cuerpo sin comprimir y los comprimidos). La versión
+comprimida (brotli si está instalado, o gzip) se arma recién cuando un cliente
+la pide en Accept-Encoding, y queda guardada junto a la entrada. Las entradas
+viven en un LRU en memoria por worker acotado en bytes (EVENTS_CACHE_MAX_BYTES;
+las de más de EVENTS_CACHE_MAX_ENTRY_BYTES y las de varios partidos no entran)
+y, si EVENTS_CACHE_DIR está definido, también en disco, compartidas entre
+workers y reinicios; en disco caducan tras EVENTS_CACHE_TTL segundos sin usarse.
+Sin disco, las respuestas que no van a memoria (varios partidos) se serializan
+directamente, sin ETag ni compresión.
+
+Quien modifique eventos por fuera de la API (scripts, SQL manual) debe llamar a
+bump_events_version o subir events_version a mano.
+"""
+import gzip
+import hashlib
+import importlib.util
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, request
+from sqlalchemy import func, update
+
+from json_encoding import dumps_bytes
+from models import Match
+
+EVENTS_CACHE_MAX_BYTES = int(os.getenv("EVENTS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+EVENTS_CACHE_MAX_ENTRY_BYTES = int(os.getenv("EVENTS_CACHE_MAX_ENTRY_BYTES", str(4 * 1024 * 1024)))
+EVENTS_CACHE_DIR = os.getenv("EVENTS_CACHE_DIR", "")
+EVENTS_CACHE_TTL = int(os.getenv("EVENTS_CACHE_TTL", str(7 * 24 * 3600)))
+EVENTS_CACHE_COMPRESS_MIN = int(os.getenv("EVENTS_CACHE_COMPRESS_MIN", "1024"))
+# Calidad de brotli (0-11): 11 tarda decenas de veces más que gzip en cuerpos grandes
+EVENTS_CACHE_BROTLI_QUALITY = int(os.getenv("EVENTS_CACHE_BROTLI_QUALITY", "5"))
+
+# Subir si cambia el formato de la respuesta: invalida también el cache en disco
+PAYLOAD_FORMAT = 2
+
+_HAS_BROTLI = importlib.util.find_spec("brotli") is not None
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz")) if _HAS_BROTLI else (("gzip", ".gz"),)
+
+_entries = OrderedDict()
+_entries_bytes = 0
+_lock = threading.Lock()
+
+
+def bump_events_version(db, match_id):
+    """Marca como modificados los eventos del partido. No hace commit."""
+    db.execute(
+        update(Match)
+        .where(Match.id == match_id)
+        .values(events_version=func.coalesce(Match.events_version, 0) + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def match_signature(match):
+    """Lo que del partido entra en la respuesta de sus eventos"""
+    return [match.id, match.events_version or 0, match.global_delay_seconds, match.event_delays]
+
+
+def cache_key(kind, parts, args=None):
+    """
+    Clave del cache: tipo de respuesta, partes (firmas de los partidos, metadata)
+    y los parámetros de la query (en orden estable)
+    """
+    query = sorted((name, value) for name in (args or {}) for value in args.getlist(name))
+    raw = json.dumps([PAYLOAD_FORMAT, kind, parts, query], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _compress(body, encoding):
+    if encoding == "br":
+        import brotli
+        return brotli.compress(body, quality=EVENTS_CACHE_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=6)
+
+
+def _disk_path(key, suffix=""):
+    return os.path.join(EVENTS_CACHE_DIR, f"{key}.json{suffix}")
+
+
+def _read_disk(key):
+    if not EVENTS_CACHE_DIR:
+        return None
+    try:
+        with open(_disk_path(key), "rb") as fh:
+            body = fh.read()
+    except OSError:
+        return None
+    try:
+        # Renueva el TTL de la entrada
+        os.utime(_disk_path(key))
+    except OSError:
+        pass
+    return _entry(key, body)
+
+
+def _write_file(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=EVENTS_CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def evict_expired_payloads():
+    """Elimina del disco las entradas caducadas. Devuelve cuántas se borraron"""
+    if not EVENTS_CACHE_DIR or not os.path.isdir(EVENTS_CACHE_DIR):
+        return 0
+    now = time.time()
+    removed = 0
+    for name in os.listdir(EVENTS_CACHE_DIR):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(EVENTS_CACHE_DIR, name)
+        try:
+            if now - os.path.getmtime(path) <= EVENTS_CACHE_TTL:
+                continue
+            os.remove(path)
+            removed += 1
+        except OSError:
+            continue
+        for _, suffix in _ENCODINGS:
+            try:
+                os.remove(path + suffix)
+            except OSError:
+                pass
+    return removed
+
+
+def _write_disk(key, entry):
+    if not EVENTS_CACHE_DIR:
+        return
+    try:
+        os.makedirs(EVENTS_CACHE_DIR, exist_ok=True)
+        evict_expired_payloads()
+        _write_file(_disk_path(key), entry["body"])
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar el cache de eventos en disco: {e}")
+
+
+def _entry(key, body):
+    return {"key": key, "body": body, "etag": hashlib.sha256(body).hexdigest()[:32], "encoded": {}}
+
+
+def _entry_size(entry):
+    return len(entry["body"]) + sum(len(data) for data in entry["encoded"].values())
+
+
+def _remember(key, entry):
+    """Guarda entry en el LRU en memoria si entra, desalojando las más viejas"""
+    global _entries_bytes
+    size = _entry_size(entry)
+    if size > EVENTS_CACHE_MAX_ENTRY_BYTES:
+        return entry
+    with _lock:
+        previous = _entries.pop(key, None)
+        if previous is not None:
+            _entries_bytes -= _entry_size(previous)
+        _entries[key] = entry
+        _entries_bytes += size
+        while _entries_bytes > EVENTS_CACHE_MAX_BYTES and _entries:
+            _, evicted = _entries.popitem(last=False)
+            _entries_bytes -= _entry_size(evicted)
+    return entry
+
+
+def get_cached(key, memory=True):
+    """Entrada del cache (memoria y luego disco) o None. memory=False: solo disco"""
+    if memory:
+        with _lock:
+            entry = _entries.get(key)
+            if entry is not None:
+                _entries.move_to_end(key)
+                return entry
+    entry = _read_disk(key)
+    if entry is None or not memory:
+        return entry
+    return _remember(key, entry)
+
+
+def store(key, payload, memory=True):
+    """Serializa payload una vez y lo guarda en disco y, salvo memory=False, en memoria"""
+    entry = _entry(key, dumps_bytes(payload))
+    _write_disk(key, entry)
+    return _remember(key, entry) if memory else entry
+
+
+def cached_payload(key, build, memory=True):
+    """
+    Entrada para key, armándola con build() si no está en el cache.
+    memory=False para respuestas grandes (varios partidos): solo cache en disco.
+    """
+    entry = get_cached(key, memory)
+    if entry is None:
+        entry = store(key, build(), memory)
+    return entry
+
+
+def _encoded_body(entry, encoding):
+    """
+    Cuerpo comprimido con encoding: de la entrada, del disco o comprimido ahora
+    (y guardado en ambos para la próxima vez)
+    """
+    global _entries_bytes
+    data = entry["encoded"].get(encoding)
+    if data is not None:
+        return data
+
+    suffix = dict(_ENCODINGS)[encoding]
+    if EVENTS_CACHE_DIR:
+        try:
+            with open(_disk_path(entry["key"], suffix), "rb") as fh:
+                data = fh.read()
+        except OSError:
+            data = None
+    if data is None:
+        data = _compress(entry["body"], encoding)
+        if EVENTS_CACHE_DIR:
+            try:
+                _write_file(_disk_path(entry["key"], suffix), data)
+            except OSError as e:
+                print(f"⚠️ No se pudo guardar el cache de eventos en disco: {e}")
+
+    with _lock:
+        in_memory = _entries.get(entry["key"]) is entry
+        if in_memory and _entry_size(entry) + len(data) > EVENTS_CACHE_MAX_ENTRY_BYTES:
+            return data
+        entry["encoded"][encoding] = data
+        if in_memory:
+            _entries_bytes += len(data)
+            while _entries_bytes > EVENTS_CACHE_MAX_BYTES and _entries:
+                _, evicted = _entries.popitem(last=False)
+                _entries_bytes -= _entry_size(evicted)
+    return data
+
+
+def json_response(entry):
+    """
+    Respuesta para una entrada del cache: 304 si el cliente ya tiene ese ETag,
+    si no el JSON (comprimido si el cliente lo acepta)
+    """
+    # ETag débil: el cuerpo cambia según Content-Encoding, el contenido no
+    etag = f'W/"{entry["etag"]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding, Authorization"}
+    if request.if_none_match.contains_weak(entry["etag"]):
+        return Response(status=304, headers=headers)
+
+    body = entry["body"]
+    encoding = None
+    if len(body) >= EVENTS_CACHE_COMPRESS_MIN:
+        encoding = request.accept_encodings.best_match([name for name, _ in _ENCODINGS])
+    if encoding:
+        body = _encoded_body(entry, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(body, status=200, mimetype="application/json", headers=headers)
+
+
+def payload_response(key, build, memory=True):
+    """
+    Respuesta de la entrada key (ver cached_payload). Si no entra en memoria y no
+    hay cache en disco, nada se reutilizaría: se serializa build() sin ETag ni
+    compresión
+    """
+    if not memory and not EVENTS_CACHE_DIR:
+        return Response(dumps_bytes(build()), status=200, mimetype="application/json")
+    return json_response(cached_payload(key, build, memory))
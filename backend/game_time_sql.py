@@ -0,0 +1,181 @@
+"""
+Game_Time, DETECTED_PERIOD y Time_Group calculados en la base de datos.
+
+Los tres valores se derivan solo de timestamp_sec, del event_type y de los hitos
+del partido (kick_off_1, end_1, kick_off_2). Cuando se corrigen los hitos desde
+la sincronización del video no hace falta cargar los eventos en Python: un único
+UPDATE sobre events recalcula extra_data, y solo se reescriben las filas cuyo
+valor cambia (p. ej. mover end_2 no toca ninguna).
+
+Las expresiones replican calculate_game_time_from_zero del enricher con
+method=manual y sin delays:
+    - período 2 si timestamp >= kick_off_2, si no 1
+    - Game_Time = timestamp - kick_off_1 (1er tiempo) o
+      duración del 1er tiempo + (timestamp - kick_off_2) (2º tiempo), mínimo 0,
+      formateado MM:SS redondeando al segundo (al par, como round de Python)
+    - Time_Group por cuartos de la duración del 1er tiempo
+    - sin timestamp o sin tipo: "00:00", período nulo y "Sin datos"
+
+POST /matches/<id>/recalculate-times usa sus propias reglas (ajuste de KICK OFF
+y END a los hitos, tramos de 20 minutos): ver recalculate_times_values.
+"""
+from sqlalchemy import BigInteger, Float, Text, and_, case, cast, func, literal, not_, null, select, update
+from sqlalchemy.dialects.postgresql import JSONB
+
+from models import Event
+
+# Valores por defecto de update_match cuando el partido no tiene un hito cargado
+DEFAULT_TIME_BOUNDS = {'kick_off_1': 0, 'end_1': 2400, 'kick_off_2': 2700, 'end_2': 4800}
+
+
+def manual_time_bounds(match):
+    """Hitos manuales del partido (segundos del video), con los valores por defecto si faltan"""
+    values = {
+        'kick_off_1': match.kick_off_1_seconds,
+        'end_1': match.end_1_seconds,
+        'kick_off_2': match.kick_off_2_seconds,
+        'end_2': match.end_2_seconds,
+    }
+    return {key: float(DEFAULT_TIME_BOUNDS[key] if value is None else value) for key, value in values.items()}
+
+
+def _two_digits(value):
+    """Entero con al menos dos dígitos, como f"{n:02d}" (lpad recortaría los de tres)"""
+    as_text = cast(value, Text)
+    return case((value.between(0, 9), literal('0', Text) + as_text), else_=as_text)
+
+
+def mmss_expression(seconds):
+    """Segundos (>= 0) a MM:SS; round() de double precision redondea al par"""
+    total = cast(func.round(seconds), BigInteger)
+    return _two_digits(total // 60) + literal(':', Text) + _two_digits(total % 60)
+
+
+def _jsonb_object(**values):
+    args = []
+    for key, value in values.items():
+        args.extend([literal(key, Text), value])
+    return func.jsonb_build_object(*args, type_=JSONB)
+
+
+def time_group_expression(game_time_sec, first_half):
+    """Cuarto del partido según la duración del 1er tiempo (assign_time_group del enricher)"""
+    return case(
+        (game_time_sec < first_half / 2, "Primer cuarto"),
+        (game_time_sec < first_half, "Segundo cuarto"),
+        (game_time_sec < first_half + first_half / 2, "Tercer cuarto"),
+        else_="Cuarto cuarto"
+    )
+
+
+def game_time_values(match_id, bounds):
+    """
+    Subconsulta con el id de cada evento del partido y el JSON con sus nuevos
+    Game_Time, DETECTED_PERIOD y Time_Group (columna extra)
+    """
+    kick_off_1, kick_off_2 = bounds['kick_off_1'], bounds['kick_off_2']
+    first_half = bounds['end_1'] - kick_off_1
+    timestamp = Event.timestamp_sec
+
+    base = select(
+        Event.id.label('id'),
+        and_(timestamp.isnot(None), func.coalesce(Event.event_type, '') != '').label('valid'),
+        case((timestamp >= kick_off_2, 2), else_=1).label('period'),
+        func.greatest(
+            case((timestamp >= kick_off_2, first_half + (timestamp - kick_off_2)), else_=timestamp - kick_off_1),
+            0.0
+        ).label('game_time_sec'),
+    ).where(Event.match_id == match_id).subquery('base')
+
+    extra = case(
+        (base.c.valid, _jsonb_object(
+            _delay_applied=literal(0),
+            Game_Time=mmss_expression(base.c.game_time_sec),
+            DETECTED_PERIOD=base.c.period,
+            Time_Group=time_group_expression(base.c.game_time_sec, first_half),
+        )),
+        else_=_jsonb_object(
+            Game_Time=literal("00:00", Text),
+            DETECTED_PERIOD=null(),
+            Time_Group=literal("Sin datos", Text),
+        )
+    )
+    return select(base.c.id, extra.label('extra')).subquery('game_time')
+
+
+def recalculate_times_values(match_id, kick_off_1, end_1, kick_off_2, end_2):
+    """
+    Subconsulta (id, extra) con las reglas de /matches/<id>/recalculate-times:
+        - período 1 si timestamp < kick_off_2, si no 2
+        - un KICK OFF a menos de 1s de kick_off_1/kick_off_2 queda en 0 / fin del 1er tiempo
+        - un END a menos de 1s de end_1/end_2 queda en el fin del 1er / 2º tiempo
+        - MM:SS truncando los segundos (int(t // 60), int(t % 60))
+        - Time_Group en tramos de 20 minutos
+    Los eventos sin timestamp quedan fuera.
+    """
+    first_half = end_1 - kick_off_1
+    timestamp = Event.timestamp_sec
+    event_type = func.upper(Event.event_type)
+    second_period = timestamp >= kick_off_2
+
+    regular = case(
+        (second_period, first_half + (timestamp - kick_off_2)),
+        else_=func.greatest(timestamp - kick_off_1, 0)
+    )
+    base = select(
+        Event.id.label('id'),
+        case((second_period, 2), else_=1).label('period'),
+        case(
+            (and_(event_type == 'KICK OFF', func.abs(timestamp - kick_off_1) < 1), 0),
+            (and_(event_type == 'KICK OFF', func.abs(timestamp - kick_off_2) < 1), first_half),
+            (and_(event_type == 'END', func.abs(timestamp - end_1) < 1), first_half),
+            (and_(event_type == 'END', func.abs(timestamp - end_2) < 1), first_half + (end_2 - kick_off_2)),
+            else_=regular
+        ).label('game_time_sec'),
+    ).where(Event.match_id == match_id, timestamp.isnot(None)).subquery('base')
+
+    # floor(t // 60) y t % 60 de Python, calculados sobre los segundos enteros
+    whole_seconds = func.floor(base.c.game_time_sec, type_=Float)
+    minutes = func.floor(whole_seconds / 60.0, type_=Float)
+    game_time = (
+        _two_digits(cast(minutes, BigInteger))
+        + literal(':', Text)
+        + _two_digits(cast(whole_seconds - minutes * 60, BigInteger))
+    )
+    time_group = case(
+        (base.c.game_time_sec < 1200, "0'- 20'"),
+        (base.c.game_time_sec < 2400, "20' - 40'"),
+        (base.c.game_time_sec < 3600, "40' - 60'"),
+        else_="60' - 80'"
+    )
+    extra = _jsonb_object(Game_Time=game_time, DETECTED_PERIOD=base.c.period, Time_Group=time_group)
+    return select(base.c.id, extra.label('extra')).subquery('recalculated_times')
+
+
+def update_extra_data(values, only_changed=True):
+    """
+    UPDATE events ... FROM values: mezcla values.c.extra en extra_data. Con
+    only_changed solo toca las filas donde algún valor cambia.
+    """
+    current = func.coalesce(Event.extra_data, func.jsonb_build_object(), type_=JSONB)
+    conditions = [Event.id == values.c.id]
+    if only_changed:
+        conditions.append(not_(current.contains(values.c.extra)))
+    return (
+        update(Event)
+        .where(*conditions)
+        .values(extra_data=current.op('||', return_type=JSONB)(values.c.extra))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def recalculate_game_time(db, match):
+    """
+    Recalcula en la base de datos los tiempos de juego de los eventos de match
+    con sus hitos manuales. No hace commit.
+
+    Returns:
+        int: eventos cuyo extra_data cambió
+    """
+    values = game_time_values(match.id, manual_time_bounds(match))
+    return db.execute(update_extra_data(values)).rowcount
@@ -0,0 +1,190 @@
+"""
+Cache en disco de las previsualizaciones de import.
+
+/api/import/preview normaliza el archivo subido y guarda el resultado bajo una
+clave derivada del contenido del archivo y de la configuración del perfil. La
+clave se devuelve al navegador como preview_token; /api/save_match la recibe
+junto con los cambios hechos en la previsualización (categorías descartadas,
+datos del partido) y recupera los eventos desde aquí, sin que el navegador
+tenga que reenviarlos ni el backend volver a parsear el archivo.
+
+Las entradas caducan tras PREVIEW_CACHE_TTL segundos.
+
+El mismo hash del archivo (calculado mientras se guarda la subida) se registra
+en matches.source_file_hash, de modo que volver a subir un archivo ya importado
+—aunque sea con otro nombre— se resuelve con una consulta en lugar de repetir
+normalización, enriquecimiento e inserción.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import tempfile
+
+from json_encoding import dumps_bytes
+
+PREVIEW_CACHE_DIR = os.getenv("PREVIEW_CACHE_DIR", "/app/uploads/preview_cache")
+PREVIEW_CACHE_TTL = int(os.getenv("PREVIEW_CACHE_TTL", "3600"))
+AUTH_ENABLED = os.getenv("AUTH_ENABLED", "true").lower() == "true"
+
+_TOKEN_RE = re.compile(r"^[0-9a-f]{64}$")
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path):
+    """sha256 del contenido de un archivo, leído por bloques"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_upload(file_storage, save_path):
+    """
+    Guarda un archivo subido (werkzeug FileStorage) calculando su sha256 mientras
+    se escribe a disco, sin una segunda lectura del archivo.
+    """
+    digest = hashlib.sha256()
+    stream = file_storage.stream
+    with open(save_path, "wb") as out:
+        for chunk in iter(lambda: stream.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest()
+
+
+def import_scope(db, team_id=None):
+    """
+    Tenant del import que llega en la request actual, para find_imported_match.
+
+    Returns:
+        dict: team_id (equipo destino, si se eligió) y club_ids (clubs del
+        usuario; None = sin restricción: super admin o auth desactivada)
+    """
+    from auth_utils import get_current_user, user_is_super_admin
+
+    club_ids = None
+    if AUTH_ENABLED:
+        user, _ = get_current_user(db)
+        if not user_is_super_admin(user):
+            club_ids = sorted({m.club_id for m in user.memberships if m.is_active}) if user else []
+    return {"team_id": int(team_id) if team_id else None, "club_ids": club_ids}
+
+
+def find_imported_match(db, file_hash, team_id=None, club_ids=None):
+    """
+    Último partido importado desde un archivo con este hash (o None).
+
+    Solo se buscan partidos del mismo tenant (ver import_scope): el mismo archivo
+    importado por otro club no bloquea el import ni expone su partido.
+    """
+    from models import Match, Team
+
+    if not file_hash:
+        return None
+    query = db.query(Match).filter(Match.source_file_hash == file_hash)
+    if team_id is not None:
+        query = query.filter(Match.team_id == team_id)
+    if club_ids is not None:
+        query = query.join(Team, Match.team_id == Team.id).filter(Team.club_id.in_(club_ids))
+    return query.order_by(Match.id.desc()).first()
+
+
+def already_imported_response(match):
+    """Cuerpo de la respuesta idempotente para un archivo ya importado"""
+    return {
+        "message": f"Este archivo ya fue importado (partido {match.id}). Usa force=1 para reimportarlo.",
+        "already_imported": True,
+        "match_id": match.id,
+    }
+
+
+def preview_cache_key(file_hash, file_type, settings):
+    """Clave de cache: mismo archivo + mismo perfil → misma normalización"""
+    payload = json.dumps(
+        {"file": file_hash, "file_type": file_type, "settings": settings or {}},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _entry_path(token):
+    return os.path.join(PREVIEW_CACHE_DIR, f"{token}.json")
+
+
+def _is_expired(path, now=None):
+    try:
+        return (now or time.time()) - os.path.getmtime(path) > PREVIEW_CACHE_TTL
+    except OSError:
+        return True
+
+
+def evict_expired_previews():
+    """Elimina las entradas caducadas. Devuelve cuántas se borraron"""
+    if not os.path.isdir(PREVIEW_CACHE_DIR):
+        return 0
+    now = time.time()
+    removed = 0
+    for name in os.listdir(PREVIEW_CACHE_DIR):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(PREVIEW_CACHE_DIR, name)
+        if _is_expired(path, now):
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def store_preview(token, data):
+    """
+    Guarda el resultado normalizado (match + events) bajo token, serializado con
+    json_encoding.
+    La escritura es atómica: otro worker nunca lee un archivo a medio escribir.
+    """
+    os.makedirs(PREVIEW_CACHE_DIR, exist_ok=True)
+    evict_expired_previews()
+
+    fd, tmp_path = tempfile.mkstemp(dir=PREVIEW_CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(dumps_bytes(data))
+        os.replace(tmp_path, _entry_path(token))
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return token
+
+
+def load_preview(token):
+    """Devuelve el resultado guardado para token, o None si no existe o caducó"""
+    if not token or not _TOKEN_RE.match(str(token)):
+        return None
+    path = _entry_path(token)
+    if not os.path.exists(path):
+        return None
+    if _is_expired(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Entrada de cache de preview ilegible ({token}): {e}")
+        return None
+
+
+def touch_preview(token):
+    """Renueva el TTL de una entrada que se acaba de reutilizar"""
+    try:
+        os.utime(_entry_path(token), None)
+    except OSError:
+        pass
@@ -0,0 +1,277 @@
+"""
+Imports en segundo plano.
+
+Los imports grandes (normalizar, enriquecer, traducir e insertar) se ejecutan en
+un pool de procesos local en lugar de dentro del request de Flask. El estado de
+cada job se guarda en la tabla import_jobs, así cualquier worker de gunicorn
+puede responder a GET /api/import/jobs/<id>.
+
+Etapas que reporta un job: queued → parsed → enriched → inserting (N/M) →
+inserted → done. Cada import corre en una única transacción, así que un fallo
+o la muerte del proceso no deja el partido a medias; aun así, si el job llegó a
+registrar un partido y falla antes del commit del import (etapa inserted), ese
+partido se elimina. Un partido ya confirmado no se elimina nunca, aunque después
+falle la actualización del job.
+"""
+import os
+import uuid
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from threading import Lock
+
+from db import SessionLocal
+from models import ImportJob, Match, Event
+
+IMPORT_JOB_WORKERS = int(os.getenv("IMPORT_JOB_WORKERS", "2"))
+
+# Etapas en las que el import ya hizo commit del partido
+COMMITTED_STAGES = ("inserted", "done")
+
+_executor = None
+_executor_lock = Lock()
+
+
+def _get_executor():
+    """Pool de procesos perezoso, uno por worker de gunicorn"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: el hijo no hereda las conexiones abiertas del pool de SQLAlchemy
+            _executor = ProcessPoolExecutor(
+                max_workers=IMPORT_JOB_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        _executor = None
+
+
+def _update_job(job_id, **fields):
+    """Actualiza la fila del job en su propia sesión (commit inmediato)"""
+    db = SessionLocal()
+    try:
+        job = db.query(ImportJob).filter_by(id=job_id).first()
+        if not job:
+            return None
+        progress = fields.pop("progress", None)
+        if progress:
+            job.progress = {**(job.progress or {}), **progress}
+        for key, value in fields.items():
+            setattr(job, key, value)
+        job.updated_at = datetime.utcnow()
+        db.commit()
+        return job.to_dict()
+    finally:
+        db.close()
+
+
+def _discard_partial_match(match_id):
+    """Elimina el partido (y sus eventos) creado por un job que no terminó"""
+    if not match_id:
+        return
+    db = SessionLocal()
+    try:
+        deleted = db.query(Event).filter(Event.match_id == match_id).delete(synchronize_session=False)
+        db.query(Match).filter(Match.id == match_id).delete(synchronize_session=False)
+        db.commit()
+        print(f"🧹 Partido {match_id} descartado tras fallo del job ({deleted} eventos)")
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ No se pudo descartar el partido {match_id}: {e}")
+    finally:
+        db.close()
+
+
+def _fail_job(job_id, error, discard=True):
+    """
+    Marca el job como fallido. Con discard, elimina el partido que registró si el
+    import no llegó a confirmarse (ver COMMITTED_STAGES)
+    """
+    match_id = None
+    if discard:
+        db = SessionLocal()
+        try:
+            job = db.query(ImportJob).filter_by(id=job_id).first()
+            if job and job.stage not in COMMITTED_STAGES:
+                match_id = job.match_id
+        finally:
+            db.close()
+
+    if match_id:
+        _discard_partial_match(match_id)
+        _update_job(job_id, status="failed", error=str(error), match_id=None)
+    else:
+        _update_job(job_id, status="failed", error=str(error))
+
+
+def _job_progress(job_id, state):
+    """
+    Callback de progreso que se pasa a las funciones del importer. Marca
+    state["committed"] en cuanto el import confirma el partido
+    """
+    def progress(stage, **info):
+        if stage in COMMITTED_STAGES:
+            state["committed"] = True
+        fields = {"stage": stage, "progress": info}
+        if info.get("match_id"):
+            fields["match_id"] = info["match_id"]
+        _update_job(job_id, **fields)
+    return progress
+
+
+def run_file_import(save_path, file_type, settings, progress=None, source_file_hash=None):
+    """Import de un archivo subido (lógica compartida por /api/import síncrono y por los jobs)"""
+    from importer import import_match_from_excel, import_match_from_json
+    from normalizer import normalize_xml_to_json
+
+    if file_type == 'xml':
+        result = normalize_xml_to_json(save_path, settings)
+        if not result or 'match' not in result or 'events' not in result:
+            raise ValueError("Datos faltantes en archivo XML")
+        if source_file_hash:
+            result['match']['source_file_hash'] = source_file_hash
+        return import_match_from_json(result, settings, progress=progress)
+    elif file_type in ['xls', 'xlsx']:
+        return import_match_from_excel(save_path, {'settings': settings}, progress=progress,
+                                       source_file_hash=source_file_hash)
+    raise ValueError("Tipo de archivo no soportado")
+
+
+def _run_job(job_id, kind, payload):
+    """Punto de entrada dentro del proceso del pool"""
+    from importer import import_match_from_json, import_match_from_xml
+    from log_config import configure_logging
+
+    configure_logging()
+    _update_job(job_id, status="running", stage="started")
+    state = {"committed": False}
+    progress = _job_progress(job_id, state)
+    try:
+        if kind == "file":
+            result = run_file_import(payload["path"], payload["file_type"], payload["settings"], progress=progress,
+                                     source_file_hash=payload.get("source_file_hash"))
+        elif kind == "xml":
+            result = import_match_from_xml(
+                payload["xml_path"],
+                payload.get("profile", {}),
+                discard_categories=payload.get("discard_categories"),
+                team_mapping=payload.get("team_mapping"),
+                team_inference=payload.get("team_inference"),
+                progress=progress,
+                source_file_hash=payload.get("source_file_hash")
+            )
+        elif kind == "match":
+            result = import_match_from_json(payload["data"], payload["settings"], progress=progress)
+        elif kind == "bulk":
+            from bulk_import import run_bulk_import
+            # Un lote no tiene un único partido: el resumen por archivo es el resultado
+            result = run_bulk_import(payload["entries"], force=payload.get("force", False), progress=progress,
+                                     club_ids=payload.get("club_ids"))
+        else:
+            raise ValueError(f"Tipo de job desconocido: {kind}")
+
+        if not result:
+            raise RuntimeError("El import no se completó (ver logs del worker)")
+    except Exception as e:
+        traceback.print_exc()
+        # Cada import confirma en su propio commit: solo se descarta lo que no llegó a confirmarse
+        _fail_job(job_id, e, discard=not state["committed"])
+        raise
+
+    try:
+        if kind == "bulk":
+            summary, match_fields = result, {}
+        else:
+            summary = {
+                "match_id": result.get("match_id"),
+                "events": len(result.get("events") or []),
+                "match_info": result.get("match_info"),
+            }
+            match_fields = {"match_id": summary["match_id"]}
+        _update_job(job_id, status="done", stage="done", result=summary, **match_fields)
+        return summary
+    except Exception as e:
+        # El import ya se confirmó: falla el registro del job, no el partido
+        traceback.print_exc()
+        _fail_job(job_id, e, discard=False)
+        raise
+
+
+def _on_job_done(job_id):
+    def callback(future):
+        error = future.exception()
+        if error is None:
+            return
+        if isinstance(error, BrokenProcessPool):
+            # El proceso murió sin poder registrar el fallo: limpiar desde aquí
+            print(f"❌ Job {job_id}: el proceso del import terminó inesperadamente")
+            _reset_executor()
+            _fail_job(job_id, "El proceso del import terminó inesperadamente")
+    return callback
+
+
+def submit_import_job(kind, payload):
+    """
+    Registra un job y lo encola en el pool de procesos.
+
+    Args:
+        kind: 'file' (archivo subido), 'xml' (archivo en /app/uploads), 'match' (payload de save_match)
+              o 'bulk' (lote de archivos, ver bulk_import)
+        payload: argumentos del import (deben ser serializables con pickle)
+
+    Returns:
+        dict: el job recién creado
+    """
+    job_id = uuid.uuid4().hex
+    db = SessionLocal()
+    try:
+        job = ImportJob(id=job_id, kind=kind, status="queued", stage="queued", progress={})
+        db.add(job)
+        db.commit()
+        job_data = job.to_dict()
+    finally:
+        db.close()
+
+    try:
+        future = _get_executor().submit(_run_job, job_id, kind, payload)
+    except BrokenProcessPool:
+        _reset_executor()
+        future = _get_executor().submit(_run_job, job_id, kind, payload)
+    future.add_done_callback(_on_job_done(job_id))
+    print(f"📬 Job de import {job_id} encolado ({kind})")
+    return job_data
+
+
+def get_import_job(job_id):
+    db = SessionLocal()
+    try:
+        job = db.query(ImportJob).filter_by(id=job_id).first()
+        return job.to_dict() if job else None
+    finally:
+        db.close()
+
+
+def _request_flag(req, name):
+    """Flag booleano en la query (?name=1) o en el body JSON ({"name": true})"""
+    flag = req.args.get(name)
+    if flag is None and req.is_json:
+        body = req.get_json(silent=True) or {}
+        flag = body.get(name)
+    return str(flag).lower() in ("1", "true", "yes")
+
+
+def wants_async(req):
+    """Los endpoints de import pasan a modo job con ?async=1 o {"async": true} en el body"""
+    return _request_flag(req, "async")
+
+
+def wants_force(req):
+    """?force=1 o {"force": true}: reimportar aunque el archivo ya se haya importado"""
+    return _request_flag(req, "force")
@@ -2,6 +2,7 @@ import os
 import math
 import xml.etree.ElementTree as ET
 from datetime import datetime, date, time
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from db import SessionLocal
 from models import Club, Team, Player, Match, Event
@@ -229,19 +230,111 @@ def _get_inference_reason(event_type, info):
     else:
         return "Inferido por proximidad temporal con otros eventos"
 
+def _normalize_player_name(player_name):
+    return str(player_name).strip() if player_name else "Desconocido"
+
 def create_or_get_player(db, player_name):
     """
     Devuelve un jugador existente o lo crea si no existe.
     """
-    name = str(player_name).strip() if player_name else "Desconocido"
+    name = _normalize_player_name(player_name)
     player = db.query(Player).filter_by(full_name=name).first()
     if not player:
         player = Player(full_name=name)
         db.add(player)
-        db.commit()
+        db.flush()
     return player
 
-def import_match_from_xml(xml_path: str, profile: dict, discard_categories=None, team_mapping=None, team_inference=None):
+def resolve_players_bulk(db, player_names):
+    """
+    Resuelve todos los nombres de jugadores de un import de una sola vez.
+
+    Hace un único SELECT con los nombres distintos y un único INSERT multi-fila
+    (con RETURNING) para los que no existen. No hace commit: queda dentro de la
+    transacción del import.
+
+    Returns:
+        dict: nombre normalizado -> player_id
+    """
+    names = {_normalize_player_name(n) for n in player_names}
+    if not names:
+        return {}
+
+    player_ids = {}
+    rows = db.query(Player.id, Player.full_name).filter(Player.full_name.in_(names)).order_by(Player.id).all()
+    for player_id, full_name in rows:
+        # Si hay duplicados históricos nos quedamos con el más antiguo
+        player_ids.setdefault(full_name, player_id)
+
+    missing = [{"full_name": n} for n in sorted(names - player_ids.keys())]
+    if missing:
+        created = db.execute(insert(Player).returning(Player.id, Player.full_name), missing)
+        for player_id, full_name in created:
+            player_ids[full_name] = player_id
+        print(f"✅ Jugadores creados: {len(missing)}")
+
+    return player_ids
+
+def _report_progress(progress, stage, **info):
+    """Notifica el avance del import (usado por los jobs en segundo plano)"""
+    if not progress:
+        return
+    try:
+        progress(stage, **info)
+    except Exception as e:
+        print(f"⚠️ No se pudo reportar el progreso ({stage}): {e}")
+
+def build_event_rows(db, match_id, events):
+    """
+    Prepara las filas de la tabla events para un partido.
+
+    Los jugadores de todos los eventos se resuelven antes con resolve_players_bulk,
+    así el coste es de unas pocas sentencias por partido en lugar de varias por evento.
+    """
+    player_ids = resolve_players_bulk(
+        db, [pname for ev in events for pname in (ev.get("players") or [])]
+    )
+
+    rows = []
+    for ev in events:
+        # Usar el primer jugador como principal
+        players = ev.get("players") or []
+        main_player_id = player_ids[_normalize_player_name(players[0])] if players else None
+
+        rows.append({
+            "match_id": match_id,
+            "player_id": main_player_id,
+            "event_type": str(ev.get("event_type")),
+            "timestamp_sec": ev.get("timestamp_sec", 0),
+            "x": ev.get("x"),
+            "y": ev.get("y"),
+            "extra_data": clean_extra_data(ev.get("extra_data", {}))
+        })
+    return rows
+
+def insert_event_rows(db, rows, progress=None, chunk_size=1000):
+    """Inserta filas de eventos con executemany por bloques. No hace commit."""
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        # render_nulls: sin esto el bulk insert del ORM parte el lote cada vez que cambia qué columnas son NULL
+        db.execute(insert(Event).execution_options(render_nulls=True), chunk)
+        match_id = chunk[0]["match_id"]
+        _report_progress(progress, "inserting", inserted=start + len(chunk), total=len(rows), match_id=match_id)
+    return len(rows)
+
+def bulk_insert_events(db, match_id, events, progress=None):
+    """
+    Inserta todos los eventos de un partido (jugadores incluidos) en bloque.
+    No hace commit: el import confirma todo en una sola transacción.
+
+    Returns:
+        int: número de eventos insertados
+    """
+    rows = build_event_rows(db, match_id, events)
+    return insert_event_rows(db, rows, progress=progress)
+
+def import_match_from_xml(xml_path: str, profile: dict, discard_categories=None, team_mapping=None, team_inference=None, progress=None,
+                          source_file_hash=None):
     """
     Importa un partido y sus eventos desde un archivo XML con la estructura de LongoMatch/Sportscode/Nacsport.
     Usa el normalizer para limpiar caracteres especiales y procesar el XML correctamente.
@@ -261,6 +354,8 @@ def import_match_from_xml(xml_path: str, profile: dict, discard_categories=None,
                            {'event_type': 'DEFENSE', 'assign_to': 'our_team'},
                            {'event_type': 'TURNOVER+', 'assign_to': 'our_team'}
                        ]
+        progress: Callback opcional progress(stage, **info) para reportar el avance
+        source_file_hash: sha256 del archivo, se guarda en el partido para detectar reimportaciones
     """
     if not os.path.exists(xml_path):
         print(f"❌ El archivo {xml_path} no existe.")
@@ -290,12 +385,14 @@ def import_match_from_xml(xml_path: str, profile: dict, discard_categories=None,
         match_info = data["match"]
         events = data["events"]
         print(f"✅ Normalización completada: {len(events)} eventos extraídos")
+        _report_progress(progress, "parsed", events=len(events))
 
         # Enriquecer eventos (Game_Time, TRY_ORIGIN, etc.)
         print(f"🔄 Enriqueciendo eventos...")
         from enricher import enrich_events
         events = enrich_events(events, match_info, profile)
         print(f"✅ Eventos enriquecidos")
+        _report_progress(progress, "enriched", events=len(events))
 
         # Usar datos del profile si están disponibles, sino del match_info
         team_name = profile.get("team", match_info.get("team", "Desconocido"))
@@ -332,7 +429,7 @@ def import_match_from_xml(xml_path: str, profile: dict, discard_categories=None,
                         is_opponent=True
                     )
                     db.add(opponent_team)
-                    db.commit()
+                    db.flush()
                     opponent_name = opponent_team.name
                     print(f"✅ Equipo oponente creado: {opponent_team.name} (is_opponent=True)")
                 elif opponent_mapping.get('team_id'):
@@ -350,14 +447,14 @@ def import_match_from_xml(xml_path: str, profile: dict, discard_categories=None,
             if not club:
                 club = Club(name=team_name)
                 db.add(club)
-                db.commit()
+                db.flush()
                 print(f"✅ Club creado: {club.name}")
 
             team = db.query(Team).filter_by(name=team_name, club_id=club.id).first()
             if not team:
                 team = Team(name=team_name, club_id=club.id, category="Senior", season=str(match_date_str[:4]))
                 db.add(team)
-                db.commit()
+                db.flush()
                 print(f"✅ Equipo creado: {team.name}")
         
         # Normalizar nombres de equipo en eventos
@@ -463,38 +560,22 @@ def import_match_from_xml(xml_path: str, profile: dict, discard_categories=None,
             wind_1p=profile.get("wind_1p", match_info.get("wind_1p")),
             wind_2p=profile.get("wind_2p", match_info.get("wind_2p")),
             referee=profile.get("referee", match_info.get("referee")),
-            result=profile.get("result", match_info.get("result"))
+            result=profile.get("result", match_info.get("result")),
+            source_file_hash=source_file_hash
         )
         db.add(match)
-        db.commit()
+        db.flush()
         print(f"✅ Partido creado: {team_name} vs {opponent_name} en {match.location}")
 
-        # Insertar eventos y jugadores
-        for ev in events:
-            # Si hay jugadores, crear todos
-            player_ids = []
-            if ev.get("players"):
-                for pname in ev["players"]:
-                    player = create_or_get_player(db, pname)
-                    player_ids.append(player.id)
-            # Usar el primer jugador como principal
-            main_player_id = player_ids[0] if player_ids else None
-
-            event = Event(
-                match_id=match.id,
-                player_id=main_player_id,
-                event_type=str(ev.get("event_type")),
-                timestamp_sec=ev.get("timestamp_sec", 0),
-                x=ev.get("x"),
-                y=ev.get("y"),
-                extra_data=clean_extra_data(ev.get("extra_data", {}))
-            )
-            db.add(event)
+        # Insertar jugadores y eventos en bloque
+        _report_progress(progress, "inserting", inserted=0, total=len(events), match_id=match.id)
+        bulk_insert_events(db, match.id, events, progress=progress)
 
         db.commit()
+        _report_progress(progress, "inserted", inserted=len(events), total=len(events), match_id=match.id)
         print(f"✅ Eventos insertados correctamente. Total: {len(events)}")
 
-        return {"events": events, "match_info": match_info}
+        return {"events": events, "match_info": match_info, "match_id": match.id}
 
     except Exception as e:
         db.rollback()
@@ -503,17 +584,22 @@ def import_match_from_xml(xml_path: str, profile: dict, discard_categories=None,
     finally:
         db.close()
 
-def import_match_from_excel(excel_path: str, profile: dict):
+def import_match_from_excel(excel_path: str, profile: dict, progress=None, source_file_hash=None):
     print(f"📥 Normalizando archivo: {excel_path}")
     data = normalize_excel_to_json(excel_path, profile)
-    db = SessionLocal()
+    return import_match_from_excel_data(data, profile, progress=progress, source_file_hash=source_file_hash)
+
 
+def import_match_from_excel_data(data: dict, profile: dict, progress=None, source_file_hash=None):
+    """Inserta un Excel ya normalizado (resultado de normalize_excel_to_json)"""
     if not data or "match" not in data or "events" not in data:
         print("❌ Error: archivo no contiene información válida")
-        return
+        return False
 
     match_info = data["match"]
     events = data["events"]
+    _report_progress(progress, "parsed", events=len(events))
+    db = SessionLocal()
 
     try:
         # Crear o buscar club
@@ -521,7 +607,7 @@ def import_match_from_excel(excel_path: str, profile: dict):
         if not club:
             club = Club(name=match_info["team"])
             db.add(club)
-            db.commit()
+            db.flush()
             print(f"✅ Club creado: {club.name}")
 
         # Crear o buscar equipo
@@ -529,7 +615,7 @@ def import_match_from_excel(excel_path: str, profile: dict):
         if not team:
             team = Team(name=match_info["team"], club_id=club.id, category="Senior", season=str(match_info["date"][:4]))
             db.add(team)
-            db.commit()
+            db.flush()
             print(f"✅ Equipo creado: {team.name}")
 
         # Crear partido
@@ -548,24 +634,27 @@ def import_match_from_excel(excel_path: str, profile: dict):
             wind_1p=match_info.get("wind_1p"),
             wind_2p=match_info.get("wind_2p"),
             referee=match_info.get("referee"),
-            result=match_info.get("result")
+            result=match_info.get("result"),
+            source_file_hash=source_file_hash
         )
 
         db.add(match)
-        db.commit()
+        db.flush()
         print(f"✅ Partido creado: vs {match.opponent_name} en {match.location}")
+        _report_progress(progress, "inserting", inserted=0, total=len(events), match_id=match.id)
 
         # Insertar jugadores y eventos
-        player_cache = {}
+
+        player_ids = resolve_players_bulk(db, [ev.get("player") for ev in events])
 
         for ev in events:
-            player = create_or_get_player(db, ev.get("player"))
+            player_id = player_ids[_normalize_player_name(ev.get("player"))]
             raw_time = ev.get("timestamp_sec") or 0
             raw_time = int(raw_time) if not math.isnan(raw_time) else 0
 
             event = Event(
                 match_id=match.id,
-                player_id=player.id,
+                player_id=player_id,
                 event_type=str(ev.get("event_type")),  # 👈 Unificado
                 timestamp_sec=raw_time,
                 x=ev.get("x") if not (ev.get("x") is None or math.isnan(ev.get("x"))) else None,
@@ -576,17 +665,22 @@ def import_match_from_excel(excel_path: str, profile: dict):
 
         db.commit()
         print("✅ Eventos insertados correctamente.")
+        _report_progress(progress, "inserted", inserted=len(events), total=len(events), match_id=match.id)
+
+        return {"events": events, "match_info": match_info, "match_id": match.id}
 
     except Exception as e:
         db.rollback()
         print(f"❌ Error al importar: {e}")
+        return False
     finally:
         db.close()
 
-def import_match_from_json(json_data: dict, profile: dict):
+def import_match_from_json(json_data: dict, profile: dict, progress=None):
     """
     Importa un partido y sus eventos desde un diccionario JSON (resultado de normalize_xml_to_json).
     Soporta team_inference para asignar equipos a eventos sin equipo explícito.
+    progress: callback opcional progress(stage, **info) para reportar el avance.
     """
     print(f"🔍 Iniciando importación desde JSON")
     db = SessionLocal()
@@ -603,12 +697,14 @@ def import_match_from_json(json_data: dict, profile: dict):
         
         print(f"🔍 Metadatos del partido: {match_info}")
         print(f"🔍 Eventos a importar: {len(events)}")
+        _report_progress(progress, "parsed", events=len(events))
 
         # Enriquecer eventos usando enricher
         from enricher import enrich_events
         try:
             events = enrich_events(events, match_info, profile)
             print(f"✅ Eventos enriquecidos correctamente.")
+            _report_progress(progress, "enriched", events=len(events))
         except Exception as enrich_error:
             print(f"❌ Error en enriquecimiento de eventos: {enrich_error}")
             return False
@@ -629,14 +725,14 @@ def import_match_from_json(json_data: dict, profile: dict):
             if not club:
                 club = Club(name=match_info["team"])
                 db.add(club)
-                db.commit()
+                db.flush()
                 print(f"✅ Club creado: {club.name}")
 
             team = db.query(Team).filter_by(name=match_info["team"], club_id=club.id).first()
             if not team:
                 team = Team(name=match_info["team"], club_id=club.id, category="Senior", season=str(match_info["date"][:4]))
                 db.add(team)
-                db.commit()
+                db.flush()
                 print(f"✅ Equipo creado: {team.name}")
         
         # PASO 1: Aplicar team_inference ANTES de normalizar nombres
@@ -722,7 +818,7 @@ def import_match_from_json(json_data: dict, profile: dict):
                     is_opponent=True
                 )
                 db.add(opponent_team)
-                db.commit()
+                db.flush()
                 print(f"✅ Equipo rival creado: {opponent_name}")
             
             # Normalizar eventos OPPONENT/RIVAL al nombre del equipo rival
@@ -784,96 +880,67 @@ def import_match_from_json(json_data: dict, profile: dict):
             kick_off_1_seconds=kick_off_1,
             end_1_seconds=end_1,
             kick_off_2_seconds=kick_off_2,
-            end_2_seconds=end_2
+            end_2_seconds=end_2,
+            source_file_hash=match_info.get("source_file_hash")
         )
         print(f"✅ Tiempos manuales configurados: kick_off_1={kick_off_1}, end_1={end_1}, kick_off_2={kick_off_2}, end_2={end_2}")
         db.add(match)
-        db.commit()
+        db.flush()
         print(f"✅ Partido creado: vs {match.opponent_name} en {match.location}")
 
-        # Insertar eventos y jugadores
-        for ev in events:
-            # Si hay jugadores, crear todos
-            player_ids = []
-            if ev.get("players"):
-                for pname in ev["players"]:
-                    player = create_or_get_player(db, pname)
-                    player_ids.append(player.id)
-            # Usar el primer jugador como principal
-            main_player_id = player_ids[0] if player_ids else None
-
-            event = Event(
-                match_id=match.id,
-                player_id=main_player_id,
-                event_type=str(ev.get("event_type")),
-                timestamp_sec=ev.get("timestamp_sec", 0),
-                x=ev.get("x"),
-                y=ev.get("y"),
-                extra_data=clean_extra_data(ev.get("extra_data", {}))
-            )
-            db.add(event)
-
-        db.commit()
-        print(f"✅ Eventos insertados correctamente. Total: {len(events)}")
+        rows = build_event_rows(db, match.id, events)
 
-        # Si se configuraron tiempos manuales, recalcular Game_Time para todos los eventos
-        if any([kick_off_1, end_1, kick_off_2, end_2]):
+        # Si se configuraron tiempos manuales, recalcular Game_Time antes de insertar
+        # (así cada evento se escribe una sola vez, dentro de la misma transacción)
+        if any([kick_off_1, end_1, kick_off_2, end_2]) and rows:
             print(f"🔄 Recalculando Game_Time con tiempos manuales del partido...")
             try:
                 from enricher import calculate_game_time_from_zero
-                
-                # Obtener eventos recién insertados
-                inserted_events = db.query(Event).filter(Event.match_id == match.id).order_by(Event.timestamp_sec).all()
-                
-                if inserted_events:
-                    # Preparar datos para recalcular
-                    events_data = [{
-                        'timestamp_sec': e.timestamp_sec,
-                        'event_type': e.event_type,
-                        'extra_data': e.extra_data or {}
-                    } for e in inserted_events]
-                    
-                    # Configurar tiempos manuales (usar valores exactos, incluso si son negativos)
-                    match_times = {
-                        'kick_off_1': kick_off_1 if kick_off_1 is not None else 0,
-                        'end_1': end_1 if end_1 is not None else 2400,
-                        'kick_off_2': kick_off_2 if kick_off_2 is not None else 2700,
-                        'end_2': end_2 if end_2 is not None else 4800
-                    }
-                    
-                    print(f"🔍 DEBUG Import: match_times = {match_times}")
-                    print(f"🔍 DEBUG Import: Primer evento timestamp_sec = {events_data[0]['timestamp_sec'] if events_data else 'N/A'}")
-                    
-                    recalc_profile = {
-                        'time_mapping': {
-                            'method': 'manual',
-                            'manual_times': match_times
-                        }
+
+                # Copias de extra_data: si el recálculo falla las filas quedan intactas
+                events_data = [{
+                    'timestamp_sec': row['timestamp_sec'],
+                    'event_type': row['event_type'],
+                    'extra_data': dict(row['extra_data'] or {})
+                } for row in rows]
+
+                # Configurar tiempos manuales (usar valores exactos, incluso si son negativos)
+                match_times = {
+                    'kick_off_1': kick_off_1 if kick_off_1 is not None else 0,
+                    'end_1': end_1 if end_1 is not None else 2400,
+                    'kick_off_2': kick_off_2 if kick_off_2 is not None else 2700,
+                    'end_2': end_2 if end_2 is not None else 4800
+                }
+
+                recalc_profile = {
+                    'time_mapping': {
+                        'method': 'manual',
+                        'manual_times': match_times
                     }
-                    
-                    # Recalcular Game_Time
-                    updated_events = calculate_game_time_from_zero(events_data, match_info={}, profile=recalc_profile)
-                    
-                    print(f"🔍 DEBUG Import: Primer evento Game_Time recalculado = {updated_events[0]['extra_data'].get('Game_Time') if updated_events else 'N/A'}")
-                    
-                    # Actualizar eventos en la base de datos
-                    for i, event in enumerate(inserted_events):
-                        if i < len(updated_events):
-                            updated_data = updated_events[i]
-                            if 'extra_data' in updated_data:
-                                event.extra_data = updated_data['extra_data']
-                                from sqlalchemy.orm.attributes import flag_modified
-                                flag_modified(event, "extra_data")
-                    
-                    db.commit()
-                    print(f"✅ Game_Time recalculado para {len(inserted_events)} eventos después del import")
+                }
+
+                updated_events = calculate_game_time_from_zero(events_data, match_info={}, profile=recalc_profile)
+
+                for row, updated_data in zip(rows, updated_events):
+                    if 'extra_data' in updated_data:
+                        row['extra_data'] = updated_data['extra_data']
+
+                print(f"✅ Game_Time recalculado para {len(rows)} eventos con match_times = {match_times}")
             except Exception as recalc_err:
-                print(f"⚠️ Error recalculando Game_Time después del import: {str(recalc_err)}")
+                print(f"⚠️ Error recalculando Game_Time: {str(recalc_err)}")
                 import traceback
                 traceback.print_exc()
-                # No fallar el import por esto, los eventos ya están guardados
+                # No fallar el import por esto, se guardan los valores del enricher
+
+        # Insertar eventos en bloque y confirmar todo el import en un único commit
+        _report_progress(progress, "inserting", inserted=0, total=len(rows), match_id=match.id)
+        insert_event_rows(db, rows, progress=progress)
+
+        db.commit()
+        _report_progress(progress, "inserted", inserted=len(rows), total=len(rows), match_id=match.id)
+        print(f"✅ Eventos insertados correctamente. Total: {len(events)}")
 
-        return {"events": events, "match_info": match_info}
+        return {"events": events, "match_info": match_info, "match_id": match.id}
 
     except Exception as e:
         db.rollback()
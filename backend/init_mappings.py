@@ -5,7 +5,7 @@ Ejecutar después de crear las tablas con init_db.py
 """
 
 from db import SessionLocal
-from translator import init_default_mappings
+from translator import init_default_mappings, mappings_changed
 from models import CategoryMapping
 
 
@@ -28,6 +28,7 @@ def init_category_mappings():
             # Eliminar mapeos existentes
             db.query(CategoryMapping).delete()
             db.commit()
+            mappings_changed(db)
             print(f"🗑️  Eliminados {existing_count} mapeos existentes")
         
         # Cargar mapeos por defecto
@@ -0,0 +1,114 @@
+"""
+Codificación JSON compartida por las respuestas de la API.
+
+Todas las respuestas (jsonify, el cache de eventos, el streaming, la preview de
+imports) se serializan con dumps/dumps_bytes: los tipos que no son JSON nativo
+se convierten en json_default, solo cuando el encoder los encuentra, sin
+recorrer antes la estructura en Python:
+
+    escalares y arrays de numpy   → int/float/bool/listas
+    NaN, Infinity, NaT, pd.NA     → null
+    datetime, date, time          → isoformat()
+    Decimal                       → float
+    cualquier otro objeto         → str(obj)
+
+Si orjson está instalado se usa; si no, el json estándar (su encoder en C; solo
+cuando el objeto tiene floats NaN/Infinity se pasan antes a None con un recorrido
+en Python). Las claves se
+ordenan y la salida es compacta, así el mismo dato siempre da los mismos bytes
+(y el mismo ETag en events_cache).
+"""
+import datetime
+import decimal
+import importlib.util
+import json
+import math
+
+import numpy as np
+import pandas as pd
+from flask.json.provider import DefaultJSONProvider
+
+_HAS_ORJSON = importlib.util.find_spec("orjson") is not None
+if _HAS_ORJSON:
+    import orjson
+
+    _ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def json_default(obj):
+    """Convierte lo que el encoder no sabe serializar (ver docstring del módulo)"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if obj is pd.NA or obj is pd.NaT:
+        return None
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    return str(obj)
+
+
+def _without_specials(obj):
+    """Copia de obj con los NaN/Infinity (floats, numpy, Decimal) como None"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _without_specials(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_without_specials(value) for value in obj]
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return _without_specials(obj.tolist())
+    if isinstance(obj, decimal.Decimal):
+        return obj if obj.is_finite() else None
+    return obj
+
+
+_STDLIB_OPTIONS = {
+    "default": json_default,
+    "sort_keys": True,
+    "separators": (",", ":"),
+    "ensure_ascii": False,
+}
+
+
+def _stdlib_dumps(obj):
+    try:
+        # Encoder en C: con allow_nan=False un NaN corta y se reintenta abajo
+        return json.dumps(obj, allow_nan=False, **_STDLIB_OPTIONS)
+    except ValueError:
+        return json.dumps(_without_specials(obj), allow_nan=False, **_STDLIB_OPTIONS)
+
+
+def dumps_bytes(obj):
+    """obj serializado como JSON en bytes UTF-8"""
+    if _HAS_ORJSON:
+        try:
+            return orjson.dumps(obj, default=json_default, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Enteros de más de 64 bits, anidamiento muy profundo...
+            pass
+    return _stdlib_dumps(obj).encode("utf-8")
+
+
+def dumps(obj):
+    """obj serializado como JSON en str"""
+    if _HAS_ORJSON:
+        return dumps_bytes(obj).decode("utf-8")
+    return _stdlib_dumps(obj)
+
+
+class APIJSONProvider(DefaultJSONProvider):
+    """Provider de Flask (jsonify, current_app.json) sobre dumps/dumps_bytes"""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Opciones explícitas (indent, ...): json estándar con el mismo default
+            kwargs.setdefault("default", json_default)
+            return super().dumps(obj, **kwargs)
+        return dumps(obj)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
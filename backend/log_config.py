@@ -0,0 +1,21 @@
+"""
+Configuración de logging del backend.
+
+Los módulos del pipeline de import (normalizer, enricher) usan logging en lugar
+de print: el detalle por evento va a nivel DEBUG y solo se escribe si LOG_LEVEL
+lo pide, así el throughput del import no depende de la velocidad de stdout.
+"""
+import logging
+import os
+
+
+def configure_logging():
+    """Configura el logger raíz una sola vez por proceso (app, workers de jobs, scripts)"""
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    level = os.getenv("LOG_LEVEL", "INFO").upper()
+    logging.basicConfig(
+        level=getattr(logging, level, logging.INFO),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
@@ -0,0 +1,115 @@
+"""
+Invalidación de la tabla de traducción entre procesos.
+
+Cada worker de gunicorn (y cada proceso del pool de imports) guarda su propia
+tabla de traducción (ver translator.load_translation_table). Cuando se escribe
+en category_mappings, publish_mappings_change envía un NOTIFY por el canal
+MAPPINGS_CHANNEL y cada proceso, desde un hilo que escucha ese canal con una
+conexión propia, sube su versión local: la próxima traducción recarga la tabla
+con un único SELECT. Mientras no hay cambios, un import no consulta los mapeos.
+
+Solo en PostgreSQL. Con otros motores (p. ej. sqlite en desarrollo, un único
+proceso) alcanza con la versión local. Si el listener no pudo conectarse, la
+tabla no se considera confiable y se recarga en cada uso, como antes.
+"""
+import os
+import select
+import threading
+import time
+
+from sqlalchemy import text
+
+from db import engine
+
+MAPPINGS_CHANNEL = "category_mappings_changed"
+MAPPINGS_LISTEN = os.getenv("MAPPINGS_LISTEN", "1").lower() in ("1", "true", "yes")
+MAPPINGS_LISTEN_RETRY = float(os.getenv("MAPPINGS_LISTEN_RETRY", "5"))
+
+_listener_lock = threading.Lock()
+_listener_pid = None
+_listener_ready = threading.Event()
+
+
+def notify_supported():
+    return engine.dialect.name == "postgresql"
+
+
+def publish_mappings_change(db):
+    """
+    Avisa a todos los procesos que category_mappings cambió. Llamar después del
+    commit de la escritura; hace su propio commit del NOTIFY.
+    """
+    if not notify_supported():
+        return
+    try:
+        db.execute(text("SELECT pg_notify(:channel, '')"), {"channel": MAPPINGS_CHANNEL})
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ No se pudo notificar el cambio de mapeos: {e}")
+
+
+def listener_active():
+    """
+    True si este proceso recibe los NOTIFY de mapeos, o si no hacen falta
+    (motor sin LISTEN/NOTIFY)
+    """
+    if not notify_supported():
+        return True
+    return MAPPINGS_LISTEN and _listener_pid == os.getpid() and _listener_ready.is_set()
+
+
+def _listen(on_change):
+    """Bucle del hilo listener: reconecta si se pierde la conexión"""
+    while True:
+        connection = None
+        try:
+            # Conexión fuera del pool: queda tomada mientras viva el proceso
+            connection = engine.raw_connection()
+            connection.detach()
+            dbapi_connection = connection.driver_connection
+            dbapi_connection.autocommit = True
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {MAPPINGS_CHANNEL}")
+
+            # Pudo haber cambios mientras no se escuchaba
+            on_change()
+            _listener_ready.set()
+            print(f"👂 Escuchando cambios de mapeos (pid {os.getpid()})")
+
+            while True:
+                if select.select([dbapi_connection], [], [], 60) == ([], [], []):
+                    continue
+                dbapi_connection.poll()
+                if dbapi_connection.notifies:
+                    dbapi_connection.notifies.clear()
+                    on_change()
+        except Exception as e:
+            _listener_ready.clear()
+            print(f"⚠️ Listener de mapeos desconectado: {e}")
+        finally:
+            if connection is not None:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+        time.sleep(MAPPINGS_LISTEN_RETRY)
+
+
+def ensure_listener(on_change):
+    """
+    Arranca (una vez por proceso) el hilo que llama a on_change con cada NOTIFY.
+    Se invoca de forma perezosa: tras un fork el proceso hijo arranca el suyo.
+    """
+    global _listener_pid
+    if not MAPPINGS_LISTEN or not notify_supported():
+        return
+    pid = os.getpid()
+    if _listener_pid == pid:
+        return
+    with _listener_lock:
+        if _listener_pid == pid:
+            return
+        _listener_pid = pid
+        _listener_ready.clear()
+        threading.Thread(target=_listen, args=(on_change,), name="mappings-listener", daemon=True).start()
@@ -187,6 +187,7 @@ class Match(Base):
     referee = Column(String(100))
     result = Column(String)
     import_profile_name = Column(String(100))
+    source_file_hash = Column(String(64), index=True)  # sha256 del archivo importado (detección de duplicados)
     
     # Tiempos manuales en segundos
     kick_off_1_seconds = Column(Integer)
@@ -198,6 +199,9 @@ class Match(Base):
     global_delay_seconds = Column(Integer, default=0)  # Delay global aplicado a todos los eventos
     event_delays = Column(JSONB)  # Delays específicos por tipo de evento, ej: {"TACKLE": -2, "PASS": 1}
 
+    # Sube con cada escritura sobre los eventos del partido (clave del cache de respuestas, ver events_cache)
+    events_version = Column(Integer, nullable=False, default=0, server_default="0")
+
     team = relationship("Team", back_populates="matches")
     events = relationship("Event", back_populates="match")
 
@@ -304,3 +308,36 @@ class CategoryMapping(Base):
             "priority": self.priority,
             "notes": self.notes
         }
+
+
+class ImportJob(Base):
+    """
+    Import ejecutado en segundo plano (ver import_jobs.py).
+    El estado vive en la base para que cualquier worker de gunicorn pueda responder el polling.
+    """
+    __tablename__ = "import_jobs"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    kind = Column(String(20), nullable=False)  # 'file', 'xml', 'match', 'bulk'
+    status = Column(String(20), nullable=False, default='queued')  # queued, running, done, failed
+    stage = Column(String(30))  # queued, parsed, enriched, inserting, inserted, done
+    progress = Column(JSONB)  # Ej: {"events": 800, "inserted": 500}
+    result = Column(JSONB)
+    error = Column(Text)
+    match_id = Column(Integer)  # Partido creado por el job (para limpiar si falla)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress or {},
+            "result": self.result,
+            "error": self.error,
+            "match_id": self.match_id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
@@ -1,13 +1,19 @@
 import pandas as pd
+import numpy as np
 import json
 import xml.etree.ElementTree as ET
 import re
 import os
 from datetime import datetime
 import tempfile
+import importlib.util
+import threading
+import logging
 from typing import Optional, Dict, List, Any
 from translator import Translator
 
+logger = logging.getLogger(__name__)
+
 
 def make_json_serializable(obj):
     """Convierte objetos no serializables a JSON a formatos serializables"""
@@ -31,13 +37,15 @@ def make_json_serializable(obj):
 
 def convert_dataframe_to_json_safe(df):
     """Convierte un DataFrame a un diccionario JSON-safe"""
-    records = []
-    for _, row in df.iterrows():
-        record = {}
-        for col, val in row.items():
-            record[col] = make_json_serializable(val)
-        records.append(record)
-    return records
+    columns = list(df.columns)
+    row_dtype = _iterrows_dtype(df)
+    serialized_columns = [
+        serialize_excel_column(df.iloc[:, position], row_dtype)
+        for position in range(len(columns))
+    ]
+    if not columns:
+        return [{} for _ in range(len(df))]
+    return [dict(zip(columns, values)) for values in zip(*serialized_columns)]
 
 
 def time_str_to_seconds(time_str):
@@ -143,36 +151,128 @@ def parse_coordinates(value):
 #     return descriptors
 
 
-def normalize_excel_to_json(filepath, profile, discard_categories=None):
-    """Normaliza archivo Excel a formato JSON"""
-    # Validar archivo
-    if not os.path.exists(filepath):
-        print(f"❌ El archivo {filepath} no existe.")
-        return None
+def _iterrows_dtype(df):
+    """
+    Dtype que tendría cada fila de df.iterrows().
 
-    print(f"✅ Procesando {filepath} con perfil {profile.get('events_sheet', 'MATRIZ')}")
+    Si todas las columnas son numéricas, pandas sube las filas a un tipo común
+    (un int pasa a float si hay columnas float); en cualquier otro caso las
+    filas son object y cada valor conserva su tipo original.
+    """
+    dtypes = list(df.dtypes)
+    if dtypes and all(getattr(dt, "kind", "O") in "iuf" for dt in dtypes):
+        return np.result_type(*dtypes)
+    return np.dtype(object)
 
-    # Configuración del perfil
-    events_sheet = profile.get("events_sheet", "MATRIZ")
-    meta_sheet = profile.get("meta_sheet")
+
+def serialize_excel_column(series, row_dtype=None):
+    """
+    Aplica make_json_serializable a una columna entera de una sola vez.
+
+    Equivale a llamar make_json_serializable sobre cada celda tal como la
+    devuelve iterrows(), pero con la conversión de tipo hecha por columna.
+    """
+    if row_dtype is not None and row_dtype != object and series.dtype != row_dtype:
+        series = series.astype(row_dtype)
+
+    kind = series.dtype.kind
+    if kind in "iub":
+        return [str(v) for v in series.tolist()]
+    if kind == "f":
+        return [None if v != v else str(v) for v in series.tolist()]
+    if kind == "M":
+        return [None if pd.isna(v) else v.isoformat() for v in series]
+    nulls = series.isna().tolist()
+    return [
+        None if is_null else (v.strip() if isinstance(v, str) else make_json_serializable(v))
+        for v, is_null in zip(series.tolist(), nulls)
+    ]
+
+
+def excel_rows_to_events(events_df, profile):
+    """
+    Convierte la hoja de eventos de un Excel en la lista de eventos normalizados.
+
+    Trabaja columna a columna: el null-mask y la serialización se calculan una
+    sola vez por columna y las filas se arman al final recorriendo con zip las
+    columnas ya serializadas. Usa las mismas claves del perfil que el normalizador
+    (col_event_type, col_time, col_duration, col_x, col_y).
+    """
     col_event_type = profile.get("col_event_type", "CATEGORY")
-    col_player = profile.get("col_player", "PLAYER")
     col_time = profile.get("col_time", "SECOND")
     col_duration = profile.get("col_duration")
     col_x = profile.get("col_x", "COORDINATE_X")
     col_y = profile.get("col_y", "COORDINATE_Y")
-    col_team = profile.get("col_team")
-    discard_categories = set(discard_categories or [])
-    time_mapping = profile.get("time_mapping", {})
 
+    n_rows = len(events_df)
+    row_dtype = _iterrows_dtype(events_df)
+
+    columns = list(events_df.columns)
+    serialized_columns = [
+        serialize_excel_column(events_df.iloc[:, position], row_dtype)
+        for position in range(len(columns))
+    ]
+    serialized = dict(zip(columns, serialized_columns))
+
+    # Las celdas nulas serializan a None y ningún valor no nulo lo hace,
+    # así que basta con descartar los None de cada registro
+    extra_data_rows = [
+        {k: v for k, v in zip(columns, values) if v is not None}
+        for values in zip(*serialized_columns)
+    ] if columns else [{} for _ in range(n_rows)]
+
+    def column_or_default(col_name, default):
+        if col_name in serialized:
+            return serialized[col_name]
+        return [make_json_serializable(default)] * n_rows
+
+    event_types = column_or_default(col_event_type, "")
+    timestamps = column_or_default(col_time, 0)
+    durations = column_or_default(col_duration, 0)
+    xs = column_or_default(col_x, None)
+    ys = column_or_default(col_y, None)
+
+    # Game_Time se calcula sobre el valor numérico de la columna de tiempo
+    if col_time in events_df.columns:
+        numeric_times = pd.to_numeric(events_df[col_time], errors="coerce").tolist()
+    else:
+        numeric_times = [0] * n_rows
+    game_times = [seconds_to_game_time(None if t != t else t) for t in numeric_times]
+
+    events = []
+    for i, extra_data in enumerate(extra_data_rows):
+        events.append({
+            "event_type": event_types[i],
+            "timestamp_sec": timestamps[i],
+            "Game_Time": game_times[i],
+            "game_time": game_times[i],
+            "duration": durations[i],
+            "x": xs[i],
+            "y": ys[i],
+            "extra_data": extra_data
+        })
+    return events
+
+
+# Volcado de depuración de Excel (hojas originales y columnas a JSON).
+# Se activa con EXCEL_DEBUG_DUMP=1 o con "debug_dump": true en el perfil.
+EXCEL_DEBUG_DUMP = os.getenv("EXCEL_DEBUG_DUMP", "0").lower() in ("1", "true", "yes")
+EXCEL_DEBUG_DIR = os.getenv("EXCEL_DEBUG_DIR", "/app/uploads/debug_excel")
+EXCEL_DEBUG_MAX_ROWS = int(os.getenv("EXCEL_DEBUG_MAX_ROWS", "500"))
+EXCEL_DEBUG_MAX_SHEETS = int(os.getenv("EXCEL_DEBUG_MAX_SHEETS", "10"))
+
+
+def excel_debug_dump_enabled(profile):
+    """El perfil manda sobre la variable de entorno si define debug_dump"""
+    if profile and "debug_dump" in profile:
+        return bool(profile.get("debug_dump"))
+    return EXCEL_DEBUG_DUMP
+
+
+def _write_excel_debug_dump(filepath, sheets):
+    """Escribe el volcado de depuración limitado a EXCEL_DEBUG_MAX_SHEETS hojas y EXCEL_DEBUG_MAX_ROWS filas"""
     try:
-        print(f"🔍 Intentando leer el archivo Excel: {filepath}")
-        df = pd.read_excel(filepath, sheet_name=None)
-        print(f"✅ Archivo Excel leído correctamente: {filepath}")
-
-        # Guardar Excel original como JSON para análisis
-        from datetime import datetime
-        debug_dir = "/app/uploads/debug_excel"
+        debug_dir = EXCEL_DEBUG_DIR
         try:
             os.makedirs(debug_dir, exist_ok=True)
         except OSError:
@@ -185,35 +285,142 @@ def normalize_excel_to_json(filepath, profile, discard_categories=None):
 
         excel_debug_data = {}
         excel_columns_info = {}
-
-        for sheet_name, sheet_df in df.items():
-            print(f"🔍 Procesando hoja: {sheet_name}")
-            excel_debug_data[sheet_name] = convert_dataframe_to_json_safe(sheet_df)
-            excel_columns_info[sheet_name] = list(sheet_df.columns)
+        for sheet_name in list(sheets)[:EXCEL_DEBUG_MAX_SHEETS]:
+            sheet_df = sheets[sheet_name]
+            excel_debug_data[sheet_name] = convert_dataframe_to_json_safe(sheet_df.head(EXCEL_DEBUG_MAX_ROWS))
+            excel_columns_info[sheet_name] = [str(c) for c in sheet_df.columns]
 
         with open(debug_json_path, 'w', encoding='utf-8') as f:
-            json.dump(excel_debug_data, f, ensure_ascii=False, indent=4)
+            json.dump(excel_debug_data, f, ensure_ascii=False)
 
         with open(debug_columns_path, 'w', encoding='utf-8') as f:
             json.dump(excel_columns_info, f, ensure_ascii=False, indent=4)
 
-        print(f"🔍 DEBUG: Excel original guardado en {debug_json_path}")
-        print(f"🔍 DEBUG: Información de columnas guardada en {debug_columns_path}")
+        logger.debug(f"🔍 DEBUG: Excel original guardado en {debug_json_path}")
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo guardar el volcado de depuración del Excel: {e}")
+
+
+def schedule_excel_debug_dump(filepath, sheets):
+    """Lanza el volcado de depuración en un hilo aparte para no frenar el import"""
+    thread = threading.Thread(
+        target=_write_excel_debug_dump,
+        args=(filepath, dict(sheets)),
+        name="excel-debug-dump",
+        daemon=True
+    )
+    thread.start()
+    return thread
+
+
+# Motor de lectura de Excel: "auto" usa python-calamine si está instalado y si no
+# el lector por defecto de pandas (openpyxl en modo read-only para .xlsx)
+EXCEL_ENGINE = os.getenv("EXCEL_ENGINE", "auto")
+
+
+def _excel_engine():
+    if EXCEL_ENGINE != "auto":
+        return EXCEL_ENGINE or None
+    if importlib.util.find_spec("python_calamine") is not None:
+        return "calamine"
+    return None
+
+
+def excel_profile_columns(profile):
+    """
+    Columnas a leer de la hoja de eventos, o None para leerlas todas.
+
+    Solo se limita si el perfil define "extra_data_columns": en ese caso se
+    leen las columnas que usa el perfil más esa lista blanca.
+    """
+    whitelist = profile.get("extra_data_columns")
+    if not whitelist:
+        return None
+    referenced = [
+        profile.get("col_event_type", "CATEGORY"),
+        profile.get("col_player", "PLAYER"),
+        profile.get("col_time", "SECOND"),
+        profile.get("col_duration"),
+        profile.get("col_x", "COORDINATE_X"),
+        profile.get("col_y", "COORDINATE_Y"),
+        profile.get("col_team"),
+    ]
+    return {c for c in referenced if c} | set(whitelist)
+
+
+def read_excel_sheets(filepath, profile, all_sheets=False):
+    """
+    Lee del libro solo las hojas que usa el perfil (events_sheet y meta_sheet).
+
+    Los libros de club suelen traer gráficos y tablas dinámicas en otras hojas;
+    abrir el archivo solo lee el índice de hojas, así que esas no se parsean.
+
+    Returns:
+        (dict hoja -> DataFrame, lista de hojas disponibles en el libro)
+    """
+    events_sheet = profile.get("events_sheet", "MATRIZ")
+    meta_sheet = profile.get("meta_sheet")
+    wanted_columns = excel_profile_columns(profile)
+
+    with pd.ExcelFile(filepath, engine=_excel_engine()) as xls:
+        available_sheets = list(xls.sheet_names)
+        if all_sheets:
+            names = available_sheets
+        else:
+            names = [n for n in (events_sheet, meta_sheet) if n and n in available_sheets]
+
+        sheets = {}
+        for name in names:
+            usecols = None
+            if name == events_sheet and wanted_columns is not None:
+                usecols = lambda col: col in wanted_columns
+            sheets[name] = xls.parse(name, usecols=usecols)
+
+    return sheets, available_sheets
+
+
+def normalize_excel_to_json(filepath, profile, discard_categories=None):
+    """Normaliza archivo Excel a formato JSON"""
+    # Validar archivo
+    if not os.path.exists(filepath):
+        logger.error(f"❌ El archivo {filepath} no existe.")
+        return None
+
+    logger.info(f"✅ Procesando {filepath} con perfil {profile.get('events_sheet', 'MATRIZ')}")
+
+    # Configuración del perfil
+    events_sheet = profile.get("events_sheet", "MATRIZ")
+    meta_sheet = profile.get("meta_sheet")
+    col_event_type = profile.get("col_event_type", "CATEGORY")
+    col_player = profile.get("col_player", "PLAYER")
+    col_team = profile.get("col_team")
+    discard_categories = set(discard_categories or [])
+    time_mapping = profile.get("time_mapping", {})
+
+    try:
+        logger.debug(f"🔍 Intentando leer el archivo Excel: {filepath}")
+        debug_dump = excel_debug_dump_enabled(profile)
+        # Solo se leen las hojas de eventos y metadatos (todas si hay volcado de depuración)
+        df, available_sheets = read_excel_sheets(filepath, profile, all_sheets=debug_dump)
+        logger.info(f"✅ Archivo Excel leído correctamente: {filepath} (hojas: {list(df.keys())})")
+
+        # Volcado de depuración de las hojas: desactivado por defecto
+        if debug_dump:
+            schedule_excel_debug_dump(filepath, df)
 
         if events_sheet not in df:
-            print(f"❌ La hoja de eventos '{events_sheet}' no existe en el archivo Excel.")
-            available_sheets = list(df.keys())
-            print(f"🔍 Hojas disponibles: {available_sheets}")
+            logger.error(f"❌ La hoja de eventos '{events_sheet}' no existe en el archivo Excel.")
+            logger.debug(f"🔍 Hojas disponibles: {available_sheets}")
             return None
 
         events_df = df[events_sheet].copy()
-        print(f"✅ Datos leídos: {len(events_df)} filas de la hoja '{events_sheet}'")
+        logger.info(f"✅ Datos leídos: {len(events_df)} filas de la hoja '{events_sheet}'")
 
         # Extraer metadatos de la hoja MATCHES
         match_info = {}
         if meta_sheet and meta_sheet in df:
             meta = df[meta_sheet].iloc[0].to_dict()
-            print(f"✅ Metadatos encontrados en hoja '{meta_sheet}': {list(meta.keys())}")
+            logger.info(f"✅ Metadatos encontrados en hoja '{meta_sheet}': {list(meta.keys())}")
             
             # Mapear campos del Excel a campos del modelo Match
             match_info = {
@@ -240,9 +447,9 @@ def normalize_excel_to_json(filepath, profile, discard_categories=None):
             match_info = {k: str(v) if v is not None and str(v).lower() not in ['nan', 'none', ''] else "" 
                          for k, v in match_info.items()}
             
-            print(f"✅ Match info extraído: {match_info}")
+            logger.info(f"✅ Match info extraído: {match_info}")
         else:
-            print(f"⚠️  Hoja '{meta_sheet}' no encontrada. Usando valores por defecto.")
+            logger.warning(f"⚠️  Hoja '{meta_sheet}' no encontrada. Usando valores por defecto.")
             # Valores por defecto - todos los campos del modelo Match
             match_info = {
                 "team": "",
@@ -264,54 +471,95 @@ def normalize_excel_to_json(filepath, profile, discard_categories=None):
 
         # Procesar eventos
         if col_event_type not in events_df.columns:
-            print(f"❌ La columna de tipo de evento '{col_event_type}' no existe en la hoja de eventos.")
+            logger.error(f"❌ La columna de tipo de evento '{col_event_type}' no existe en la hoja de eventos.")
             available_columns = list(events_df.columns)
-            print(f"🔍 Columnas disponibles: {available_columns}")
+            logger.debug(f"🔍 Columnas disponibles: {available_columns}")
             return None
 
-        events = []
-        processed_count = 0
-        for _, row in events_df.iterrows():
-            processed_count += 1
-            timestamp_sec = make_json_serializable(row.get(col_time, 0))
-            
-            # Extraer TODOS los campos disponibles como extra_data
-            extra_data = {}
-            for col_name, value in row.items():
-                if pd.notna(value):  # Solo incluir valores no nulos
-                    extra_data[col_name] = make_json_serializable(value)
-            
-            event = {
-                "event_type": make_json_serializable(row.get(col_event_type, "")),
-                "timestamp_sec": timestamp_sec,
-                "Game_Time": seconds_to_game_time(timestamp_sec),
-                "game_time": seconds_to_game_time(timestamp_sec),
-                "duration": make_json_serializable(row.get(col_duration, 0)),
-                "x": make_json_serializable(row.get(col_x)),
-                "y": make_json_serializable(row.get(col_y)),
-                "extra_data": extra_data
-            }
-            events.append(event)
+        events = excel_rows_to_events(events_df, profile)
+        processed_count = len(events_df)
 
-        print(f"✅ Procesados {len(events)} eventos de {processed_count} filas")
+        logger.info(f"✅ Procesados {len(events)} eventos de {processed_count} filas")
         
         return {"match": match_info, "events": events}
 
     except Exception as e:
-        print(f"❌ Error al procesar el archivo Excel: {e}")
+        logger.error(f"❌ Error al procesar el archivo Excel: {e}")
         import traceback
         traceback.print_exc()
         return None
 
 
-def detect_periods_and_convert_times(instances, profile=None):
-    """Detecta períodos usando configuración del perfil (manual o automática)"""
-    print("🔍 Detectando períodos del partido...")
+def instance_times(instances):
+    """
+    start y end de cada <instance> (0 si faltan), leídos una sola vez.
+
+    Returns:
+        tuple: (starts, ends) como arrays float64 alineados con instances
+    """
+    starts = np.array([float(inst.findtext("start") or 0) for inst in instances], dtype=np.float64)
+    ends = np.array([float(inst.findtext("end") or 0) for inst in instances], dtype=np.float64)
+    return starts, ends
+
+
+def compile_period_lookup(time_offsets):
+    """
+    Compila time_offsets en bordes ordenados para asignar períodos con searchsorted.
+
+    Entre dos bordes consecutivos ningún intervalo [start_time, end_time) empieza
+    ni termina, así que el período de todo el tramo es el del borde izquierdo:
+    el primero de time_offsets (en su orden) que lo contiene, o 1 si ninguno.
+
+    Returns:
+        tuple: (edges, periods) con len(periods) == len(edges) + 1; periods[0]
+        corresponde a los tiempos anteriores al primer borde
+    """
+    bounds = [
+        (period, offsets.get('start_time', 0), offsets.get('end_time', float('inf')))
+        for period, offsets in time_offsets.items()
+    ]
+    edges = np.unique(np.array([value for _, start, end in bounds for value in (start, end)], dtype=np.float64))
+
+    def period_at(timestamp):
+        for period, start, end in bounds:
+            if start <= timestamp < end:
+                return period
+        return 1
+
+    periods = np.array([1] + [period_at(edge) for edge in edges.tolist()], dtype=np.int64)
+    return edges, periods
+
+
+def assign_periods(timestamps, time_offsets):
+    """Período de cada timestamp (tiempo absoluto), como el primer intervalo de time_offsets que lo contiene"""
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    edges, periods = compile_period_lookup(time_offsets)
+    assigned = periods[np.searchsorted(edges, timestamps, side='right')]
+    # NaN no cae en ningún intervalo
+    assigned[np.isnan(timestamps)] = 1
+    return assigned
+
+
+def _time_lists(instances, times):
+    """(starts, ends) como listas de float, extrayéndolos si no vienen dados"""
+    starts, ends = times if times is not None else instance_times(instances)
+    return np.asarray(starts, dtype=np.float64).tolist(), np.asarray(ends, dtype=np.float64).tolist()
+
+
+def detect_periods_and_convert_times(instances, profile=None, times=None):
+    """
+    Detecta períodos usando configuración del perfil (manual o automática).
+
+    times: (starts, ends) de instance_times, si ya se extrajeron
+    """
+    logger.debug("🔍 Detectando períodos del partido...")
+    times = _time_lists(instances, times)
+    starts, ends = times
 
     # Método 1: Usar tiempos manuales directos (nueva estructura simplificada)
     if profile and "manual_period_times" in profile:
         manual_times = profile["manual_period_times"]
-        print(f"🔍 Usando tiempos manuales directos: {manual_times}")
+        logger.debug(f"🔍 Usando tiempos manuales directos: {manual_times}")
 
         time_offsets = {
             1: {
@@ -326,29 +574,27 @@ def detect_periods_and_convert_times(instances, profile=None):
             }
         }
 
-        print(f"🔍 Offsets calculados desde tiempos manuales: {time_offsets}")
+        logger.debug(f"🔍 Offsets calculados desde tiempos manuales: {time_offsets}")
         
         # Procesar TODOS los eventos como eventos de juego cuando se usan tiempos manuales
         game_events = []
         for i, inst in enumerate(instances):
-            start = float(inst.findtext("start") or 0)
-            end = float(inst.findtext("end") or 0)
-            game_events.append((i, inst, start, end))
+            game_events.append((i, inst, starts[i], ends[i]))
         
-        print(f"🔍 Procesando {len(game_events)} eventos como eventos de juego con tiempos manuales")
+        logger.debug(f"🔍 Procesando {len(game_events)} eventos como eventos de juego con tiempos manuales")
         return [], game_events, time_offsets
 
     # Método 2: Usar configuración de time_mapping (estructura antigua)
     if profile and "time_mapping" in profile:
         time_mapping = profile["time_mapping"]
         method = time_mapping.get('method', 'auto')
-        print(f"🔍 Usando configuración time_mapping con método: {method}")
+        logger.debug(f"🔍 Usando configuración time_mapping con método: {method}")
 
         if method == 'manual':
             # Configuración manual dentro de time_mapping
             manual_times = time_mapping.get('manual_times', {})
             if manual_times:
-                print(f"🔍 Tiempos manuales desde time_mapping: {manual_times}")
+                logger.debug(f"🔍 Tiempos manuales desde time_mapping: {manual_times}")
                 time_offsets = {
                     1: {
                         'start_offset': -manual_times.get('kick_off_1', 0),
@@ -365,28 +611,27 @@ def detect_periods_and_convert_times(instances, profile=None):
                 # Procesar TODOS los eventos como eventos de juego cuando se usan tiempos manuales
                 game_events = []
                 for i, inst in enumerate(instances):
-                    start = float(inst.findtext("start") or 0)
-                    end = float(inst.findtext("end") or 0)
-                    game_events.append((i, inst, start, end))
+                    game_events.append((i, inst, starts[i], ends[i]))
                 
-                print(f"🔍 Procesando {len(game_events)} eventos como eventos de juego con tiempos manuales")
+                logger.debug(f"🔍 Procesando {len(game_events)} eventos como eventos de juego con tiempos manuales")
                 return [], game_events, time_offsets
 
         elif method == 'event_based':
             # Configuración basada en eventos
-            return detect_periods_event_based(instances, time_mapping)
+            return detect_periods_event_based(instances, time_mapping, times)
 
         # Método automático
-        return detect_periods_auto(instances)
+        return detect_periods_auto(instances, times)
 
     # Método 3: Fallback - detección automática básica
-    print("🔍 No se encontró configuración específica, usando detección automática básica...")
-    return detect_periods_fallback(instances)
+    logger.debug("🔍 No se encontró configuración específica, usando detección automática básica...")
+    return detect_periods_fallback(instances, times)
 
 
-def detect_periods_event_based(instances, time_mapping):
+def detect_periods_event_based(instances, time_mapping, times=None):
     """Detecta períodos usando configuración específica de eventos"""
-    print("🔍 Usando método event_based para detectar períodos")
+    starts, ends = _time_lists(instances, times)
+    logger.debug("🔍 Usando método event_based para detectar períodos")
 
     control_events = []
     game_events = []
@@ -404,15 +649,15 @@ def detect_periods_event_based(instances, time_mapping):
         'alt_end_2': time_mapping.get('alt_end_2', {})
     }
 
-    print(f"🔍 Configuración de eventos de control: {control_config}")
+    logger.debug(f"🔍 Configuración de eventos de control: {control_config}")
 
     for i, inst in enumerate(instances):
         event_type = inst.findtext("code")
         if not event_type:
             continue
 
-        start = float(inst.findtext("start") or 0)
-        end = float(inst.findtext("end") or 0)
+        start = starts[i]
+        end = ends[i]
 
         # Extraer descriptores del evento
         descriptors = extract_descriptors_from_xml(inst)
@@ -458,12 +703,12 @@ def detect_periods_event_based(instances, time_mapping):
                 'period': period,
                 'matched_config': matched_control
             })
-            print(f"🔍 Evento de control detectado: {event_type} en {start}s (config: {matched_control})")
+            logger.debug(f"🔍 Evento de control detectado: {event_type} en {start}s (config: {matched_control})")
         else:
             # Es un evento de juego
             game_events.append((i, inst, start, end))
 
-    print(f"🔍 Encontrados {len(control_events)} eventos de control usando event_based")
+    logger.debug(f"🔍 Encontrados {len(control_events)} eventos de control usando event_based")
 
     # Calcular offsets de tiempo
     time_offsets = calculate_time_offsets(control_events)
@@ -471,9 +716,10 @@ def detect_periods_event_based(instances, time_mapping):
     return control_events, game_events, time_offsets
 
 
-def detect_periods_auto(instances):
+def detect_periods_auto(instances, times=None):
     """Detecta períodos automáticamente sin configuración específica"""
-    print("🔍 Usando método automático para detectar períodos")
+    starts, ends = _time_lists(instances, times)
+    logger.debug("🔍 Usando método automático para detectar períodos")
 
     # Primero detectar todos los eventos de control
     control_events = []
@@ -484,8 +730,8 @@ def detect_periods_auto(instances):
         if not event_type:
             continue
 
-        start = float(inst.findtext("start") or 0)
-        end = float(inst.findtext("end") or 0)
+        start = starts[i]
+        end = ends[i]
 
         # Extraer descriptores para análisis
         descriptors = extract_descriptors_from_xml(inst)
@@ -516,7 +762,7 @@ def detect_periods_auto(instances):
         else:
             game_events.append((i, inst, start, end))
 
-    print(f"🔍 Encontrados {len(control_events)} eventos de control usando auto: {[e['type'] for e in control_events]}")
+    logger.debug(f"🔍 Encontrados {len(control_events)} eventos de control usando auto: {[e['type'] for e in control_events]}")
 
     # Calcular offsets de tiempo
     time_offsets = calculate_time_offsets(control_events)
@@ -564,7 +810,7 @@ def calculate_time_offsets(control_events):
                 # El próximo período empezará después de este
                 current_offset = current_offset + (event['end'] - time_offsets[period]['start_time'])
 
-    print(f"🔍 Offsets calculados: {time_offsets}")
+    logger.debug(f"🔍 Offsets calculados: {time_offsets}")
 
     # Si no se detectaron períodos, usar modo simple (todo en período 1)
     if not time_offsets:
@@ -573,8 +819,9 @@ def calculate_time_offsets(control_events):
     return time_offsets
 
 
-def detect_periods_fallback(instances):
+def detect_periods_fallback(instances, times=None):
     """Detección automática básica como fallback"""
+    starts, ends = _time_lists(instances, times)
     control_events = []
     game_events = []
 
@@ -583,8 +830,8 @@ def detect_periods_fallback(instances):
         if not event_type:
             continue
 
-        start = float(inst.findtext("start") or 0)
-        end = float(inst.findtext("end") or 0)
+        start = starts[i]
+        end = ends[i]
 
         # Solo detectar eventos muy específicos
         if event_type.upper() in ['KICK OFF', 'START', 'BEGIN']:
@@ -610,7 +857,7 @@ def detect_periods_fallback(instances):
         else:
             game_events.append((i, inst, start, end))
 
-    print(f"🔍 Fallback: {len(control_events)} eventos de control detectados")
+    logger.debug(f"🔍 Fallback: {len(control_events)} eventos de control detectados")
 
     # Calcular offsets básicos
     time_offsets = {}
@@ -644,8 +891,107 @@ def detect_periods_fallback(instances):
     return control_events, game_events, time_offsets
 
 
+_NON_ASCII_BYTES = bytes(range(0x80, 0x100))
+
+
+def _clean_xml_text_bytes(text):
+    """Escapa los '&' sueltos del contenido de una etiqueta <text>"""
+    text = text.replace(b'&', b'&amp;')
+    # Revertir los que ya estaban correctamente escapados
+    text = text.replace(b'&amp;amp;', b'&amp;')
+    text = text.replace(b'&amp;lt;', b'&lt;')
+    text = text.replace(b'&amp;gt;', b'&gt;')
+    text = text.replace(b'&amp;quot;', b'&quot;')
+    text = text.replace(b'&amp;apos;', b'&apos;')
+    return text
+
+
+class _CleanXMLStream:
+    """
+    Envuelve un archivo XML binario y lo limpia al vuelo para ET.iterparse.
+
+    - Elimina los bytes no-ASCII (equivale a decodificar y quitar los caracteres
+      no-ASCII, sea cual sea la codificación original del archivo).
+    - Escapa los '&' dentro de <text>...</text>, aunque la etiqueta quede
+      partida entre dos bloques de lectura.
+    """
+
+    OPEN_TAG = b'<text>'
+    CLOSE_TAG = b'</text>'
+
+    def __init__(self, raw, chunk_size=64 * 1024):
+        self._raw = raw
+        self._chunk_size = chunk_size
+        self._pending = b''
+        self._in_text = False
+        self._eof = False
+
+    def _process(self):
+        out = []
+        while True:
+            if self._in_text:
+                end = self._pending.find(self.CLOSE_TAG)
+                if end == -1:
+                    break
+                out.append(_clean_xml_text_bytes(self._pending[:end]) + self.CLOSE_TAG)
+                self._pending = self._pending[end + len(self.CLOSE_TAG):]
+                self._in_text = False
+            else:
+                start = self._pending.find(self.OPEN_TAG)
+                if start == -1:
+                    # Guardar la cola por si contiene un '<text>' incompleto
+                    keep = len(self.OPEN_TAG) - 1
+                    if len(self._pending) > keep:
+                        out.append(self._pending[:-keep])
+                        self._pending = self._pending[-keep:]
+                    break
+                start += len(self.OPEN_TAG)
+                out.append(self._pending[:start])
+                self._pending = self._pending[start:]
+                self._in_text = True
+
+        if self._eof:
+            # Un <text> sin cierre se deja tal cual
+            out.append(self._pending)
+            self._pending = b''
+        return b''.join(out)
+
+    def read(self, size=-1):
+        while not self._eof:
+            chunk = self._raw.read(self._chunk_size)
+            if not chunk:
+                self._eof = True
+            self._pending += chunk.translate(None, _NON_ASCII_BYTES)
+            data = self._process()
+            if data:
+                return data
+        return self._process()
+
+
+def iter_xml_instances(filepath):
+    """
+    Recorre los elementos <instance> de un XML de Sportscode/LongoMatch en streaming.
+
+    Usa ET.iterparse sobre el archivo limpiado al vuelo y desprende cada
+    <instance> del árbol al terminar de leerlo, de modo que el documento
+    completo nunca está en memoria.
+    """
+    with open(filepath, 'rb') as raw:
+        stack = []
+        for event, elem in ET.iterparse(_CleanXMLStream(raw), events=("start", "end")):
+            if event == "start":
+                stack.append(elem)
+                continue
+
+            stack.pop()
+            if elem.tag == "instance":
+                if stack:
+                    stack[-1].remove(elem)
+                yield elem
+
+
 def convert_timestamp_to_absolute(start_time, time_offsets):
-    """Convierte un tiempo relativo del XML a tiempo absoluto del partido"""
+    """Convierte un tiempo relativo del XML (o un array de tiempos) a tiempo absoluto del partido"""
     # Para perfiles manuales, el tiempo en XML ya es absoluto
     # Solo necesitamos determinar el período, no convertir el tiempo
     return start_time
@@ -664,81 +1010,39 @@ def normalize_xml_to_json(filepath, profile, discard_categories=None, translator
     Returns:
         Dict con match_info, events, event_types, etc.
     """
-    print(f"🔍 normalize_xml_to_json: Iniciando procesamiento de {filepath}")
+    logger.debug(f"🔍 normalize_xml_to_json: Iniciando procesamiento de {filepath}")
     
     # Usar traductor si está disponible
     use_translation = translator is not None
     if use_translation:
-        print(f"✅ Traductor activado - Se aplicarán mapeos de categorías")
+        logger.info(f"✅ Traductor activado - Se aplicarán mapeos de categorías")
     
     if not os.path.exists(filepath):
-        print(f"❌ El archivo {filepath} no existe.")
+        logger.error(f"❌ El archivo {filepath} no existe.")
         return None
 
     discard_categories = set(discard_categories or [])
-    print(f"🔍 Categorías a descartar: {discard_categories}")
+    logger.debug(f"🔍 Categorías a descartar: {discard_categories}")
 
     try:
-        print(f"🔍 Parseando archivo XML...")
-        
-        # Intentar leer el archivo con diferentes codificaciones
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except UnicodeDecodeError:
-            print(f"🔍 Error UTF-8, probando con latin-1...")
-            try:
-                with open(filepath, 'r', encoding='latin-1') as f:
-                    content = f.read()
-            except UnicodeDecodeError:
-                print(f"🔍 Error latin-1, probando con cp1252...")
-                with open(filepath, 'r', encoding='cp1252') as f:
-                    content = f.read()
-        
-        # Limpiar caracteres problemáticos
-        import re
-        content = re.sub(r'[^\x00-\x7F]+', '', content)  # Remover caracteres no-ASCII
-        content = content.replace('�', '')  # Remover caracteres de reemplazo
-        
-        # Limpiar caracteres especiales XML sin escapar
-        def clean_xml_text(text):
-            """Limpia solo el contenido de las etiquetas <text>"""
-            text = text.replace('&', '&amp;')
-            # Revertir los que ya estaban correctamente escapados
-            text = text.replace('&amp;amp;', '&amp;')
-            text = text.replace('&amp;lt;', '&lt;')
-            text = text.replace('&amp;gt;', '&gt;')
-            text = text.replace('&amp;quot;', '&quot;')
-            text = text.replace('&amp;apos;', '&apos;')
-            return text
-        
-        # Aplicar limpieza solo al contenido de las etiquetas <text>
-        content = re.sub(r'(<text>)(.*?)(</text>)', 
-                        lambda m: m.group(1) + clean_xml_text(m.group(2)) + m.group(3), 
-                        content, flags=re.DOTALL)
-        
-        print(f"🔍 Contenido XML limpiado para caracteres especiales")
-        
-        # Crear archivo temporal limpio
-        import tempfile
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.xml', delete=False) as temp_file:
-            temp_file.write(content)
-            temp_filepath = temp_file.name
-        
-        try:
-            tree = ET.parse(temp_filepath)
-            root = tree.getroot()
-            print(f"🔍 XML parseado correctamente. Root tag: {root.tag}")
-        finally:
-            # Limpiar archivo temporal
-            os.unlink(temp_filepath)
-        
-        # Buscar elementos instance
-        instances = root.findall(".//instance")
-        print(f"🔍 Encontrados {len(instances)} elementos instance")
+        logger.debug(f"🔍 Parseando archivo XML en streaming...")
+
+        # Los <instance> se leen de forma incremental: no se carga el archivo
+        # completo en memoria ni se escribe una copia limpia a disco
+        instances = list(iter_xml_instances(filepath))
+        logger.debug(f"🔍 Encontrados {len(instances)} elementos instance")
 
         # Detectar períodos y convertir tiempos
-        control_events, game_events, time_offsets = detect_periods_and_convert_times(instances, profile)
+        starts, ends = instance_times(instances)
+        control_events, game_events, time_offsets = detect_periods_and_convert_times(
+            instances, profile, times=(starts, ends)
+        )
+
+        # Tiempos absolutos y período de todas las instancias de una vez
+        abs_starts = convert_timestamp_to_absolute(starts, time_offsets)
+        abs_ends = convert_timestamp_to_absolute(ends, time_offsets)
+        periods = assign_periods(abs_starts, time_offsets).tolist()
+        abs_starts, abs_ends = abs_starts.tolist(), abs_ends.tolist()
 
         events = []
         processed_control = 0
@@ -786,7 +1090,7 @@ def normalize_xml_to_json(filepath, profile, discard_categories=None, translator
             events.append(event)
             processed_control += 1
 
-        print(f"🔍 Procesados {processed_control} eventos de control")
+        logger.debug(f"🔍 Procesados {processed_control} eventos de control")
 
         # Procesar eventos de juego
         def clean_event_type_and_team(raw_code: str):
@@ -898,19 +1202,21 @@ def normalize_xml_to_json(filepath, profile, discard_categories=None, translator
                     return s
             return None
 
+        debug = logger.isEnabledFor(logging.DEBUG)
+        counters = {"discarded": 0, "translated_categories": 0, "translated_descriptors": 0}
         for i, inst, start, end in game_events:
             raw_code = inst.findtext("code")
             event_type, team_hint = clean_event_type_and_team(raw_code)
-            print(f"🔍 Procesando evento de juego {i+1}: {event_type}")
+            if debug:
+                logger.debug("🔍 Procesando evento de juego %d: %s", i + 1, event_type)
 
             # Filtrar categorías descartadas
             if not event_type or event_type in discard_categories:
-                print(f"🔍 Evento descartado: {event_type}")
+                counters["discarded"] += 1
                 continue
 
-            # Convertir tiempos a absolutos
-            abs_start = convert_timestamp_to_absolute(start, time_offsets)
-            abs_end = convert_timestamp_to_absolute(end, time_offsets)
+            abs_start = abs_starts[i]
+            abs_end = abs_ends[i]
             duration = abs_end - abs_start
             timestamp = abs_start  # Usar el tiempo de inicio del evento para reproducción
 
@@ -925,19 +1231,19 @@ def normalize_xml_to_json(filepath, profile, discard_categories=None, translator
             # Descriptores
             descriptors = {}
             labels = inst.findall("label")
-            print(f"🔍 Procesando {len(labels)} labels para evento {event_type}")
 
             for lbl in labels:
                 group = lbl.findtext("group")
                 text = lbl.findtext("text")
-                print(f"🔍 Label: group={group}, text={text}")
 
                 if text:
                     # Traducir descriptor si hay traductor disponible
                     if use_translation and group:
                         translated_text = translator.translate_descriptor(text)
                         if translated_text != text:
-                            print(f"🔄 Descriptor traducido: {text} → {translated_text}")
+                            counters["translated_descriptors"] += 1
+                            if debug:
+                                logger.debug("🔄 Descriptor traducido: %s → %s", text, translated_text)
                             text = translated_text
                     
                     key = group if group else "MISC"
@@ -949,20 +1255,17 @@ def normalize_xml_to_json(filepath, profile, discard_categories=None, translator
                     else:
                         descriptors[key] = text
 
-            # Determinar período basado en el tiempo absoluto del partido
-            period = 1
-            for p, offsets in time_offsets.items():
-                # Comparar directamente con start_time y end_time (tiempos absolutos)
-                if timestamp >= offsets.get('start_time', 0) and timestamp < offsets.get('end_time', float('inf')):
-                    period = p
-                    break
-            
+            # Período según el tiempo absoluto del partido (ver assign_periods)
+            period = periods[i]
+
             # Traducir tipo de evento si hay traductor disponible
             original_event_type = event_type
             if use_translation:
                 event_type = translator.translate_event_type(event_type)
                 if event_type != original_event_type:
-                    print(f"🔄 Categoría traducida: {original_event_type} → {event_type}")
+                    counters["translated_categories"] += 1
+                    if debug:
+                        logger.debug("🔄 Categoría traducida: %s → %s", original_event_type, event_type)
 
             # Extraer descriptores importantes a nivel superior para fácil acceso
             turnover_type = (descriptors.get('TIPO-PERDIDA/RECUPERACIÓN') or 
@@ -1065,7 +1368,9 @@ def normalize_xml_to_json(filepath, profile, discard_categories=None, translator
 
             events.append(event)
 
-        print(f"🔍 Procesados {len(events)} eventos válidos")
+        logger.info("🔍 Procesados %d eventos válidos (descartados: %d, categorías traducidas: %d, "
+                    "descriptores traducidos: %d)", len(events), counters["discarded"],
+                    counters["translated_categories"], counters["translated_descriptors"])
         
         match_info = {
             "team": "Desconocido",
@@ -1074,27 +1379,26 @@ def normalize_xml_to_json(filepath, profile, discard_categories=None, translator
         }
 
         result = {"match": match_info, "events": events}
-        print(f"🔍 Resultado final: {len(events)} eventos, match_info: {match_info}")
+        logger.debug("🔍 Resultado final: %d eventos, match_info: %s", len(events), match_info)
         return result
 
     except Exception as e:
-        print(f"❌ Error en normalización XML: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ Error en normalización XML: {str(e)}")
         return None
 
 
 def get_categories_from_excel(filepath, profile):
     """Extrae las categorías únicas presentes en el archivo Excel"""
     if not os.path.exists(filepath):
-        print(f"❌ El archivo {filepath} no existe.")
+        logger.error(f"❌ El archivo {filepath} no existe.")
         return []
     
     try:
         events_sheet = profile.get("events_sheet", "MATRIZ")
         col_event_type = profile.get("col_event_type", "CATEGORY")
         
-        df = pd.read_excel(filepath, sheet_name=events_sheet)
+        with pd.ExcelFile(filepath, engine=_excel_engine()) as xls:
+            df = xls.parse(events_sheet, usecols=[col_event_type])
         categories = df[col_event_type].dropna().unique().tolist()
         
         # Convertir a string y limpiar
@@ -1103,14 +1407,14 @@ def get_categories_from_excel(filepath, profile):
         return sorted(categories)
         
     except Exception as e:
-        print(f"❌ Error al extraer categorías: {str(e)}")
+        logger.error(f"❌ Error al extraer categorías: {str(e)}")
         return []
 
 
 def get_categories_from_xml(filepath, profile):
     """Extrae las categorías únicas presentes en el archivo XML"""
     if not os.path.exists(filepath):
-        print(f"❌ El archivo {filepath} no existe.")
+        logger.error(f"❌ El archivo {filepath} no existe.")
         return []
     
     try:
@@ -1126,7 +1430,7 @@ def get_categories_from_xml(filepath, profile):
         return sorted(list(categories))
         
     except Exception as e:
-        print(f"❌ Error al extraer categorías XML: {str(e)}")
+        logger.error(f"❌ Error al extraer categorías XML: {str(e)}")
         return []
 
 
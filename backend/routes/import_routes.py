@@ -1,6 +1,10 @@
 from flask import Blueprint, request, jsonify
 import os
 from importer import import_match_from_xml
+from db import SessionLocal
+from import_jobs import submit_import_job, get_import_job, wants_async, wants_force
+from import_cache import file_sha256, find_imported_match, import_scope, already_imported_response
+from bulk_import import BULK_UPLOAD_DIR, collect_bulk_files, resolve_upload_path
 
 import_bp = Blueprint('import', __name__)
 
@@ -57,14 +61,44 @@ def import_xml():
         
         if not os.path.exists(xml_path):
             return jsonify({"error": f"El archivo {filename} no existe"}), 404
+
+        # Un archivo con el mismo contenido ya importado no se vuelve a procesar (salvo force=1)
+        file_hash = file_sha256(xml_path)
+        if not wants_force(request):
+            db = SessionLocal()
+            try:
+                our_team = (team_mapping or {}).get('our_team') or {}
+                existing = find_imported_match(db, file_hash, **import_scope(db, our_team.get('team_id')))
+            finally:
+                db.close()
+            if existing:
+                return jsonify({"success": True, **already_imported_response(existing)}), 200
             
+        # Modo job: encolar y devolver el id para consultar el progreso
+        if wants_async(request):
+            job = submit_import_job("xml", {
+                "xml_path": xml_path,
+                "profile": profile,
+                "discard_categories": discard_categories,
+                "team_mapping": team_mapping,
+                "team_inference": team_inference,
+                "source_file_hash": file_hash
+            })
+            return jsonify({
+                "success": True,
+                "job_id": job["id"],
+                "status": job["status"],
+                "status_url": f"/api/import/jobs/{job['id']}"
+            }), 202
+
         # Importar el partido con team_mapping y team_inference si están presentes
         result = import_match_from_xml(
             xml_path, 
             profile, 
             discard_categories=discard_categories,
             team_mapping=team_mapping,
-            team_inference=team_inference
+            team_inference=team_inference,
+            source_file_hash=file_hash
         )
         
         if result is False:
@@ -79,6 +113,64 @@ def import_xml():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@import_bp.route('/import/bulk', methods=['POST'])
+def import_bulk():
+    """
+    Importa varios archivos en un job (normalización en paralelo).
+    Espera un JSON con:
+    {
+        "files": ["a.xml", {"path": "b.xlsx", "profile": "Excel", "match": {"opponent_name": "CASI"}}],
+        "directory": "temporada_2024",   // opcional: todos los .xml/.xls/.xlsx del directorio
+        "profile": "Sportscode XML",     // perfil por defecto
+        "force": false                   // reimportar archivos ya importados
+    }
+    El resumen (estado por archivo, eventos/seg) queda en el result del job.
+    """
+    try:
+        data = request.get_json() or {}
+        directory = data.get('directory')
+        # Solo archivos dentro de /app/uploads: se rechazan rutas absolutas o con .. que salgan de ahí
+        try:
+            if directory and not os.path.isdir(resolve_upload_path(directory)):
+                return jsonify({"error": f"El directorio {directory} no existe"}), 404
+            entries = collect_bulk_files(data.get('files'), directory, data.get('profile'), root=BULK_UPLOAD_DIR)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if not entries:
+            return jsonify({"error": "Se requiere una lista de archivos o un directorio"}), 400
+
+        db = SessionLocal()
+        try:
+            club_ids = import_scope(db)["club_ids"]
+        finally:
+            db.close()
+
+        job = submit_import_job("bulk", {"entries": entries, "force": wants_force(request), "club_ids": club_ids})
+        return jsonify({
+            "success": True,
+            "files": len(entries),
+            "job_id": job["id"],
+            "status": job["status"],
+            "status_url": f"/api/import/jobs/{job['id']}"
+        }), 202
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@import_bp.route('/import/jobs/<job_id>', methods=['GET'])
+def get_import_job_status(job_id):
+    """
+    Estado de un import en segundo plano.
+    Devuelve status (queued/running/done/failed), stage, progress
+    (ej: {"events": 800, "inserted": 500, "total": 800}) y, al terminar, result o error.
+    """
+    try:
+        job = get_import_job(job_id)
+        if not job:
+            return jsonify({"error": "Job no encontrado"}), 404
+        return jsonify(job), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @import_bp.route('/import/list-files', methods=['GET'])
 def list_xml_files():
     """Lista los archivos XML disponibles para importar"""
@@ -5,7 +5,7 @@ Endpoints para gestión de mapeos de categorías (traducciones).
 from flask import Blueprint, request, jsonify
 from db import SessionLocal
 from models import CategoryMapping
-from translator import Translator, init_default_mappings
+from translator import Translator, init_default_mappings, mappings_changed
 
 mappings_bp = Blueprint('mappings', __name__)
 
@@ -151,9 +151,8 @@ def create_mapping():
         db.add(mapping)
         db.commit()
         
-        # Recargar cache del traductor
-        translator = Translator(db)
-        translator.reload_cache()
+        # Invalidar la tabla de traducción en todos los workers
+        mappings_changed(db)
         
         return jsonify({
             "success": True,
@@ -247,9 +246,8 @@ def update_mapping(mapping_id):
         
         db.commit()
         
-        # Recargar cache
-        translator = Translator(db)
-        translator.reload_cache()
+        # Invalidar la tabla de traducción en todos los workers
+        mappings_changed(db)
         
         return jsonify({
             "success": True,
@@ -276,9 +274,8 @@ def delete_mapping(mapping_id):
         db.delete(mapping)
         db.commit()
         
-        # Recargar cache
-        translator = Translator(db)
-        translator.reload_cache()
+        # Invalidar la tabla de traducción en todos los workers
+        mappings_changed(db)
         
         return jsonify({
             "success": True,
@@ -310,6 +307,7 @@ def init_defaults():
         if reset:
             deleted = db.query(CategoryMapping).delete()
             db.commit()
+            mappings_changed(db)
             print(f"🗑️  Eliminados {deleted} mapeos existentes")
         
         count = init_default_mappings(db)
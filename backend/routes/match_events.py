@@ -1,11 +1,19 @@
 import os
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from db import SessionLocal
 from models import Match, Event, Player, Team, ImportProfile
-import math
 import pandas as pd
-from enricher import enrich_events
+from enricher import enrich_events, calculate_try_origin_and_phases
+from sequences import analyze_sequences, summarize_sequences, SEQUENCE_RULES
+from event_delays import project_delays
+import events_cache
+from json_encoding import dumps
+from event_filters import (
+    COLUMN_FIELDS, DELAY_FIELDS, apply_event_filters, narrows_events, needs_extra_data, paginate,
+    parse_event_filters, project_fields
+)
 import json
 from auth_utils import get_current_user, user_can_view_match, user_is_super_admin, user_can_edit_match
 
@@ -13,24 +21,8 @@ print("🔍 DEBUG: match_events.py se está cargando")
 
 match_events_bp = Blueprint('match_events', __name__)
 AUTH_ENABLED = os.getenv("AUTH_ENABLED", "true").lower() == "true"
-
-def safe_serialize(obj):
-    """Función segura para serializar objetos a JSON"""
-    if obj is None:
-        return None
-    elif isinstance(obj, (int, float)):
-        if math.isnan(obj) or math.isinf(obj):
-            return None
-        return obj
-    elif isinstance(obj, str):
-        return obj
-    elif isinstance(obj, (list, tuple)):
-        return [safe_serialize(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {key: safe_serialize(value) for key, value in obj.items()}
-    else:
-        # Para otros tipos, convertir a string
-        return str(obj)
+# Filas por lectura del cursor en GET /matches/events?stream=1
+MULTI_EVENTS_STREAM_CHUNK = int(os.getenv("MULTI_EVENTS_STREAM_CHUNK", "2000"))
 
 def seconds_to_game_time(seconds, period=1):
     """Convierte segundos a formato de tiempo de juego (MM:SS)"""
@@ -49,9 +41,138 @@ def test_route():
     print("🚨🚨🚨 DEBUG: TEST ROUTE EJECUTADA")
     return jsonify({"message": "Test route working"})
 
+
+# Columnas que leen los endpoints de eventos: filas livianas en lugar de objetos Event
+EVENT_ROW_COLUMNS = (Event.id, Event.match_id, Event.event_type, Event.timestamp_sec, Event.x, Event.y, Event.extra_data)
+EVENT_FIELD_COLUMNS = tuple(getattr(Event, f) for f in COLUMN_FIELDS)
+
+
+def event_row_mapper(match_meta=None):
+    """
+    Función fila (EVENT_ROW_COLUMNS) → evento de la respuesta, compartida por
+    GET /matches/<id>/events y GET /matches/events. Con match_meta
+    ({match_id: metadata}) agrega los campos del partido que usa el segundo.
+    """
+    match_fields = None
+    if match_meta is not None:
+        match_fields = {
+            match_id: {
+                "match_id": match_id,
+                "match_label": meta.get("label"),
+                "match_team": meta.get("team"),
+                "match_opponent": meta.get("opponent"),
+                "video_url": meta.get("video_url"),
+            }
+            for match_id, meta in match_meta.items()
+        }
+
+    def to_dict(row):
+        event_id, match_id, event_type, timestamp_sec, x, y, extra_data = row
+        # NaN, numpy, fechas... los resuelve json_encoding al serializar la respuesta
+        if extra_data is None:
+            extra_data = {}
+        is_dict = isinstance(extra_data, dict)
+
+        # IMPORTANTE: Usar Game_Time de extra_data (ya calculado por recalculate-times)
+        # en lugar de recalcular desde timestamp_sec (que son segundos del video, no del juego)
+        game_time = extra_data.get("Game_Time", "00:00") if is_dict else "00:00"
+
+        # Obtener período de extra_data (calculado por backend)
+        period = extra_data.get("DETECTED_PERIOD", 1) if is_dict else 1
+        try:
+            period = int(period)
+        except (ValueError, TypeError):
+            period = 1
+
+        # Extraer jugadores de extra_data (puede ser string o array) y normalizar a array
+        players_raw = extra_data.get("PLAYER") or extra_data.get("PLAYERS") if is_dict else None
+        if isinstance(players_raw, str) and players_raw:
+            players_list = [players_raw]
+        elif isinstance(players_raw, list) and players_raw:
+            players_list = players_raw
+        else:
+            players_list = None
+
+        event = {
+            "id": event_id,
+            "event_type": event_type,
+            "timestamp_sec": timestamp_sec,
+            "Game_Time": game_time,
+            "game_time": game_time,
+            "players": players_list,  # Array normalizado de jugadores
+            "x": x,
+            "y": y,
+            "team": extra_data.get("EQUIPO") if is_dict else None,  # Extraer de extra_data
+            "IS_OPPONENT": extra_data.get("IS_OPPONENT") if is_dict else None,  # CRITICAL: Extraer flag de rival
+            "period": period,
+            "extra_data": extra_data
+        }
+        if match_fields is not None:
+            event.update(match_fields.get(match_id) or {
+                "match_id": match_id, "match_label": None, "match_team": None,
+                "match_opponent": None, "video_url": None,
+            })
+        return event
+
+    return to_dict
+
+
+def event_field_row(row):
+    """Fila de EVENT_FIELD_COLUMNS → evento (proyección sin extra_data)"""
+    event_id, event_type, timestamp_sec, x, y = row
+    return {
+        "id": event_id,
+        "event_type": event_type,
+        "timestamp_sec": timestamp_sec,
+        "x": x,
+        "y": y,
+    }
+
+
+def _match_events_payload(db, match, filters):
+    """Respuesta de GET /matches/<id>/events (antes de serializar)"""
+    # Obtener eventos del partido (filtrados y paginados en SQL)
+    fields = filters["fields"]
+    with_extra = needs_extra_data(fields)
+    query = select(*(EVENT_ROW_COLUMNS if with_extra else EVENT_FIELD_COLUMNS)).where(Event.match_id == match.id)
+    rows, next_cursor = paginate(db.execute(apply_event_filters(query, filters)).all(), filters)
+
+    # Solo columnas propias: no hace falta leer ni serializar extra_data
+    to_dict = event_row_mapper() if with_extra else event_field_row
+    events_data = [to_dict(row) for row in rows]
+
+    # Delays del partido como proyección de lectura: timestamp_sec queda como se guardó
+    if fields is None or any(f in DELAY_FIELDS for f in fields):
+        project_delays(events_data, match)
+    events_data = project_fields(events_data, fields)
+
+    # total_events sigue siendo el total del partido; page_count, lo que trae esta respuesta
+    total_events = len(events_data)
+    if narrows_events(filters):
+        total_events = db.scalar(select(func.count(Event.id)).where(Event.match_id == match.id))
+
+    return {
+        "match_id": match.id,
+        "events": events_data,
+        "total_events": total_events,
+        "page_count": len(events_data),
+        "next_cursor": next_cursor
+    }
+
+
 @match_events_bp.route('/matches/<int:match_id>/events', methods=['GET'])
 def get_match_events(match_id):
-    """Obtener eventos de un partido específico"""
+    """
+    Obtener eventos de un partido específico.
+
+    Acepta filtros (event_type, team, period, player, from_sec/to_sec),
+    proyección (fields) y paginación (limit/cursor): ver event_filters.
+    """
+    try:
+        filters = parse_event_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     db = SessionLocal()
     try:
         if AUTH_ENABLED:
@@ -65,66 +186,76 @@ def get_match_events(match_id):
         if AUTH_ENABLED and not user_can_view_match(user, match):
             return jsonify({"error": "Sin permiso para ver este partido"}), 403
 
-        # Obtener eventos del partido
-        events = db.query(Event).filter(Event.match_id == match_id).all()
+        # Respuesta serializada en cache, según la versión de los eventos y los filtros
+        key = events_cache.cache_key("match", events_cache.match_signature(match), request.args)
+        return events_cache.payload_response(key, lambda: _match_events_payload(db, match, filters))
 
-        # Convertir a formato JSON con serialización segura
-        events_data = []
-        for event in events:
-            # Serializar extra_data de forma segura
-            safe_extra_data = safe_serialize(event.extra_data) if event.extra_data is not None else {}
-            
-            # Obtener timestamp y período
-            timestamp_sec = safe_serialize(event.timestamp_sec)
-            
-            # IMPORTANTE: Usar Game_Time de extra_data (ya calculado por recalculate-times)
-            # en lugar de recalcular desde timestamp_sec (que son segundos del video, no del juego)
-            game_time = safe_extra_data.get("Game_Time", "00:00") if isinstance(safe_extra_data, dict) else "00:00"
-            
-            # Obtener período de extra_data (calculado por backend)
-            period = safe_extra_data.get("DETECTED_PERIOD", 1) if isinstance(safe_extra_data, dict) else 1
-            try:
-                period = int(period)
-            except (ValueError, TypeError):
-                period = 1
-
-            # Extraer jugadores de extra_data (puede ser string o array)
-            players_raw = safe_extra_data.get("PLAYER") or safe_extra_data.get("PLAYERS") if isinstance(safe_extra_data, dict) else None
-            if players_raw:
-                # Normalizar a array
-                if isinstance(players_raw, str):
-                    players_list = [players_raw]
-                elif isinstance(players_raw, list):
-                    players_list = players_raw
-                else:
-                    players_list = None
-            else:
-                players_list = None
-
-            event_dict = {
-                "id": event.id,
-                "event_type": event.event_type,
-                "timestamp_sec": timestamp_sec,
-                "Game_Time": game_time,
-                "game_time": game_time,
-                "players": players_list,  # Array normalizado de jugadores
-                "x": safe_serialize(event.x),
-                "y": safe_serialize(event.y),
-                "team": safe_extra_data.get("EQUIPO") if isinstance(safe_extra_data, dict) else None,  # Extraer de extra_data
-                "IS_OPPONENT": safe_extra_data.get("IS_OPPONENT") if isinstance(safe_extra_data, dict) else None,  # CRITICAL: Extraer flag de rival
-                "period": period,
-                "extra_data": safe_extra_data
-            }
-            events_data.append(event_dict)
+    except Exception as e:
+        print(f"Error obteniendo eventos del partido {match_id}: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({"error": "Error interno del servidor"}), 500
+    finally:
+        db.close()
+
+
+@match_events_bp.route('/matches/<int:match_id>/possessions', methods=['GET'])
+def get_match_possessions(match_id):
+    """
+    Cadenas de posesión de un partido con sus métricas (ver sequences.py).
+
+    Query params:
+        - rules: lista separada por comas de reglas a aplicar (todas por defecto)
+    """
+    db = SessionLocal()
+    try:
+        if AUTH_ENABLED:
+            user, _ = get_current_user(db)
+            if not user:
+                return jsonify({"error": "No autorizado"}), 401
+        match = db.query(Match).filter(Match.id == match_id).first()
+        if not match:
+            return jsonify({"error": "Partido no encontrado"}), 404
+        if AUTH_ENABLED and not user_can_view_match(user, match):
+            return jsonify({"error": "Sin permiso para ver este partido"}), 403
+
+        rows = db.query(
+            Event.id, Event.event_type, Event.timestamp_sec, Event.x, Event.y, Event.extra_data
+        ).filter(Event.match_id == match_id).all()
+        events = []
+        for row in rows:
+            extra_data = row.extra_data if isinstance(row.extra_data, dict) else {}
+            events.append({
+                "id": row.id,
+                "event_type": row.event_type,
+                "timestamp_sec": row.timestamp_sec,
+                "x": row.x,
+                "y": row.y,
+                "team": extra_data.get("EQUIPO"),
+                "extra_data": extra_data,
+            })
+
+        rules = [r.strip() for r in request.args.get('rules', '').split(',') if r.strip()] or None
+        chains = analyze_sequences(events, rules)
 
         return jsonify({
             "match_id": match_id,
-            "events": events_data,
-            "total_events": len(events_data)
+            "rules": rules or list(SEQUENCE_RULES),
+            "possessions": [
+                {
+                    "id": chain["id"],
+                    "team": chain["team"],
+                    "start": chain["start"],
+                    "end": chain["end"],
+                    "event_ids": [events[i]["id"] for i in chain["indices"]],
+                    "metrics": chain["metrics"],
+                }
+                for chain in chains
+            ],
+            "summary": summarize_sequences(chains),
         })
-
     except Exception as e:
-        print(f"Error obteniendo eventos del partido {match_id}: {str(e)}")
+        print(f"Error calculando posesiones del partido {match_id}: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({"error": "Error interno del servidor"}), 500
@@ -132,12 +263,85 @@ def get_match_events(match_id):
         db.close()
 
 
+def _project_multi_delays(events_data, matches):
+    """Delays de cada partido (proyección de lectura, ver event_delays)"""
+    events_by_match = {}
+    for ev in events_data:
+        events_by_match.setdefault(ev["match_id"], []).append(ev)
+    for m in matches:
+        project_delays(events_by_match.get(m.id), m)
+
+
+def _multi_events_query(match_meta):
+    return (
+        select(*EVENT_ROW_COLUMNS)
+        .where(Event.match_id.in_(match_meta.keys()))
+        .order_by(Event.timestamp_sec)
+    )
+
+
+def _multi_match_events_payload(db, matches, match_meta):
+    """Respuesta de GET /matches/events (antes de serializar)"""
+    # Obtener eventos de todos los partidos seleccionados
+    to_dict = event_row_mapper(match_meta)
+    events_data = [to_dict(row) for row in db.execute(_multi_events_query(match_meta))]
+    _project_multi_delays(events_data, matches)
+
+    return {
+        "events": events_data,
+        "matches": list(match_meta.values())
+    }
+
+
+def _stream_multi_match_events(db, matches, match_meta, ndjson=False):
+    """
+    Respuesta de GET /matches/events escrita a medida que se leen los eventos.
+
+    Los eventos se leen con un cursor del lado del servidor de a
+    MULTI_EVENTS_STREAM_CHUNK filas, así la memoria del worker no depende de
+    cuántos partidos se pidan. Formato JSON: el mismo objeto que sin streaming
+    ({"matches": [...], "events": [...]}). NDJSON: una primera línea con
+    {"matches": [...]} y después un evento por línea.
+
+    Cierra db al terminar.
+    """
+    to_dict = event_row_mapper(match_meta)
+    query = _multi_events_query(match_meta).execution_options(yield_per=MULTI_EVENTS_STREAM_CHUNK)
+
+    def generate():
+        try:
+            matches_json = dumps(list(match_meta.values()))
+            yield '{"matches": %s}\n' % matches_json if ndjson else '{"matches": %s, "events": [' % matches_json
+            separator = "\n" if ndjson else ","
+            first = True
+            for chunk in db.execute(query).partitions():
+                events_data = [to_dict(row) for row in chunk]
+                _project_multi_delays(events_data, matches)
+                if not events_data:
+                    continue
+                body = separator.join(dumps(ev) for ev in events_data)
+                if ndjson:
+                    yield body + "\n"
+                else:
+                    yield body if first else "," + body
+                first = False
+            if not ndjson:
+                yield "]}"
+        finally:
+            db.close()
+
+    mimetype = "application/x-ndjson" if ndjson else "application/json"
+    return Response(generate(), mimetype=mimetype, headers={"X-Accel-Buffering": "no"})
+
+
 @match_events_bp.route('/matches/events', methods=['GET'])
 def get_multi_match_events():
     """
     Devuelve eventos de múltiples partidos en una sola respuesta.
     Query params: match_ids=1,2,3 o match_id=1&match_id=2
     Cada evento se enriquece con metadata del partido (label, video_url).
+    Con stream=1 (JSON) o format=ndjson la respuesta se escribe por partes
+    (ver _stream_multi_match_events).
     """
     user = None
     db = SessionLocal()
@@ -185,173 +389,58 @@ def get_multi_match_events():
                 "video_url": m.video_url,
             }
 
-        # Obtener eventos de todos los partidos seleccionados
-        events = (
-            db.query(Event)
-            .filter(Event.match_id.in_(match_meta.keys()))
-            .order_by(Event.timestamp_sec)
-            .all()
+        # Streaming (temporadas completas): sin cache, memoria acotada; la sesión la cierra el generador
+        output_format = request.args.get('format', '').lower()
+        if output_format == 'ndjson' or request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+            response = _stream_multi_match_events(db, matches, match_meta, ndjson=output_format == 'ndjson')
+            db = None
+            return response
+
+        # Respuesta serializada en cache, según la versión de los eventos de cada partido.
+        # Puede pesar cientos de MB: solo en el cache de disco (si está configurado), nunca
+        # en memoria del worker
+        key = events_cache.cache_key(
+            "multi", [[events_cache.match_signature(m) for m in matches], list(match_meta.values())]
+        )
+        return events_cache.payload_response(
+            key, lambda: _multi_match_events_payload(db, matches, match_meta), memory=False
         )
-
-        events_data = []
-        for event in events:
-            safe_extra_data = safe_serialize(event.extra_data) if event.extra_data is not None else {}
-            timestamp_sec = safe_serialize(event.timestamp_sec)
-            game_time = safe_extra_data.get("Game_Time", "00:00") if isinstance(safe_extra_data, dict) else "00:00"
-            period = safe_extra_data.get("DETECTED_PERIOD", 1) if isinstance(safe_extra_data, dict) else 1
-            try:
-                period = int(period)
-            except (ValueError, TypeError):
-                period = 1
-
-            players_raw = safe_extra_data.get("PLAYER") or safe_extra_data.get("PLAYERS") if isinstance(safe_extra_data, dict) else None
-            if players_raw:
-                if isinstance(players_raw, str):
-                    players_list = [players_raw]
-                elif isinstance(players_raw, list):
-                    players_list = players_raw
-                else:
-                    players_list = None
-            else:
-                players_list = None
-
-            m_meta = match_meta.get(event.match_id, {})
-
-            event_dict = {
-                "id": event.id,
-                "match_id": event.match_id,
-                "match_label": m_meta.get("label"),
-                "match_team": m_meta.get("team"),
-                "match_opponent": m_meta.get("opponent"),
-                "video_url": m_meta.get("video_url"),
-                "event_type": event.event_type,
-                "timestamp_sec": timestamp_sec,
-                "Game_Time": game_time,
-                "game_time": game_time,
-                "players": players_list,
-                "x": safe_serialize(event.x),
-                "y": safe_serialize(event.y),
-                "team": safe_extra_data.get("EQUIPO") if isinstance(safe_extra_data, dict) else None,
-                "IS_OPPONENT": safe_extra_data.get("IS_OPPONENT") if isinstance(safe_extra_data, dict) else None,  # CRITICAL: Extraer flag de rival
-                "period": period,
-                "extra_data": safe_extra_data,
-            }
-            events_data.append(event_dict)
-
-        return jsonify({
-            "events": events_data,
-            "matches": list(match_meta.values())
-        }), 200
     except Exception as e:
         print(f"Error obteniendo eventos multi: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({"error": "Error interno del servidor"}), 500
     finally:
-        db.close()
+        if db is not None:
+            db.close()
 
 
 def calcular_origen_tries(df):
-    if 'POINTS' not in df.columns:
-        df['POINTS'] = df['extra_data'].apply(lambda x: x.get('POINTS'))
-
-    origin_categories = ["TURNOVER+", "SCRUM", "LINEOUT", "KICKOFF"]
-    tries_events = df[df['POINTS'] == "TRY"]
-
-    def get_origin_event(try_event):
-        try_time = try_event['timestamp_sec']
-        relevant_events = df[(df['event_type'].isin(origin_categories)) & (df['timestamp_sec'] < try_time)]
-        return relevant_events.iloc[-1]['event_type'] if not relevant_events.empty else None
-
-    df['TRY_ORIGIN'] = df.apply(lambda event: get_origin_event(event) if event.get('POINTS') == "TRY" else None, axis=1)
+    """Origen de tries sobre el DataFrame del método legacy (delegado en el enricher)"""
+    events = []
+    for record in df.to_dict(orient='records'):
+        extra_data = dict(record['extra_data']) if isinstance(record.get('extra_data'), dict) else {}
+        events.append({
+            'event_type': str(record.get('event_type') or ''),
+            'timestamp_sec': record.get('timestamp_sec'),
+            'team': record.get('team') if isinstance(record.get('team'), str) else '',
+            'POINTS': record.get('POINTS', extra_data.get('POINTS')),
+            'extra_data': extra_data,
+        })
+    calculate_try_origin_and_phases(events)
+    df['TRY_ORIGIN'] = [
+        ev['extra_data'].get('TRY_ORIGIN') if ev['extra_data'].get('TRY_ORIGIN') != 'UNKNOWN' else None
+        for ev in events
+    ]
     return df
 
 
 def calcular_origen_tries_xml(events_list):
     """
-    Calcula origen de tries para eventos procesados con enricher (XML/JSON).
-    Los eventos están en formato de lista de diccionarios, no DataFrame.
+    Calcula origen y fases de tries para eventos procesados con enricher (XML/JSON).
+    Usa la misma implementación que el import (enricher.calculate_try_origin_and_phases).
     """
-    if not events_list:
-        return events_list
-    
-    # Categorías de eventos que pueden iniciar una secuencia ofensiva
-    origin_categories = ["TURNOVER", "SCRUM", "LINEOUT", "KICKOFF", "PENALTY"]
-    
-    def get_try_origin(try_event):
-        try_time = try_event.get('timestamp_sec', 0)
-        try_team = try_event.get('team', '')
-        
-        # Buscar eventos de origen previos al try del mismo equipo
-        relevant_events = []
-        for ev in events_list:
-            if (ev.get('event_type', '').upper() in origin_categories and 
-                ev.get('timestamp_sec', 0) < try_time and
-                ev.get('team', '') == try_team):
-                relevant_events.append(ev)
-        
-        if relevant_events:
-            # Tomar el evento de origen más cercano al try
-            closest_event = max(relevant_events, key=lambda x: x.get('timestamp_sec', 0))
-            return closest_event.get('event_type', '').upper()
-        
-        return None
-    
-    def count_phases(try_event):
-        """Cuenta las fases (rucks + 1) desde el origen hasta el try"""
-        try_time = try_event.get('timestamp_sec', 0)
-        try_team = try_event.get('team', '')
-        
-        # Encontrar el origen del try
-        origin_event = None
-        for ev in events_list:
-            if (ev.get('event_type', '').upper() in origin_categories and 
-                ev.get('timestamp_sec', 0) < try_time and
-                ev.get('team', '') == try_team):
-                if not origin_event or ev.get('timestamp_sec', 0) > origin_event.get('timestamp_sec', 0):
-                    origin_event = ev
-        
-        if not origin_event:
-            return 1  # Al menos 1 fase si no hay origen identificado
-        
-        origin_time = origin_event.get('timestamp_sec', 0)
-        
-        # Contar rucks entre origen y try del mismo equipo
-        ruck_count = 0
-        for ev in events_list:
-            if (ev.get('event_type', '').upper() == 'RUCK' and
-                origin_time <= ev.get('timestamp_sec', 0) < try_time and
-                ev.get('team', '') == try_team):
-                ruck_count += 1
-        
-        return ruck_count + 1  # Fases = rucks + 1
-    
-    # Procesar eventos de tries
-    for event in events_list:
-        # Verificar si es un try - puede estar en diferentes ubicaciones
-        is_try = False
-        if event.get('event_type', '').upper() == 'POINTS':
-            points_type = (event.get('POINTS') or 
-                          event.get('extra_data', {}).get('TIPO-PUNTOS') or 
-                          event.get('extra_data', {}).get('POINTS_TYPE'))
-            if points_type and str(points_type).upper() == 'TRY':
-                is_try = True
-        
-        if is_try:
-            origin = get_try_origin(event)
-            phases = count_phases(event)
-            
-            # Añadir a extra_data
-            if 'extra_data' not in event:
-                event['extra_data'] = {}
-            
-            if origin:
-                event['extra_data']['TRY_ORIGIN'] = origin
-            event['extra_data']['TRY_PHASES'] = phases
-            
-            print(f"DEBUG: Try calculado - tiempo: {event.get('timestamp_sec')}, origen: {origin}, fases: {phases}")
-    
-    return events_list
+    return calculate_try_origin_and_phases(events_list)
 
 
 # @match_events_bp.route('/matches/<int:match_id>/events', methods=['GET'])  # COMENTADO PARA EVITAR DUPLICADO
@@ -607,19 +696,6 @@ def get_match_events_deprecated(match_id):
                 if 'TIME(VIDEO)' in extra_data:
                     ev['TIME(VIDEO)'] = extra_data['TIME(VIDEO)']
 
-        def clean_nan(obj):
-            if isinstance(obj, dict):
-                return {k: clean_nan(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [clean_nan(v) for v in obj]
-            elif isinstance(obj, float) and (math.isnan(obj) or math.isinf(obj)):
-                return None
-            else:
-                return obj
-
-        # Antes de jsonify:
-        final_data = clean_nan(final_data)
-
         # DEBUG: Mostrar muestra de los datos finales
         print("🚨🚨🚨 DEBUG: final_data sample:", final_data[0] if final_data else "None")
         if final_data:
@@ -2,6 +2,8 @@ import os
 from flask import Blueprint, jsonify, request
 from db import SessionLocal
 from models import Match, Team, Event
+from game_time_sql import recalculate_game_time, recalculate_times_values, update_extra_data
+from events_cache import bump_events_version
 from auth_utils import (
     get_current_user,
     user_is_super_admin,
@@ -203,57 +205,16 @@ def update_match(id):
         ])
         
         if times_updated:
-            print(f"🔄 Tiempos actualizados, recalculando Game_Time...")
+            # Game_Time, DETECTED_PERIOD y Time_Group se derivan de timestamp_sec y de
+            # los hitos: un único UPDATE en la base, sin cargar los eventos
             try:
-                # Importar aquí para evitar circular imports
-                from enricher import calculate_game_time_from_zero
-                
-                # Obtener eventos del partido
-                events = db.query(Event).filter(Event.match_id == id).order_by(Event.timestamp_sec).all()
-                
-                if events:
-                    # Preparar datos para recalcular
-                    events_data = [{
-                        'timestamp_sec': e.timestamp_sec,
-                        'event_type': e.event_type,
-                        'extra_data': e.extra_data or {}
-                    } for e in events]
-                    
-                    # Configurar tiempos manuales (usar valores exactos, incluso si son None o negativos)
-                    match_times = {
-                        'kick_off_1': match.kick_off_1_seconds if match.kick_off_1_seconds is not None else 0,
-                        'end_1': match.end_1_seconds if match.end_1_seconds is not None else 2400,
-                        'kick_off_2': match.kick_off_2_seconds if match.kick_off_2_seconds is not None else 2700,
-                        'end_2': match.end_2_seconds if match.end_2_seconds is not None else 4800
-                    }
-                    
-                    print(f"🔍 DEBUG: match_times para recalcular = {match_times}")
-                    print(f"🔍 DEBUG: Primer evento timestamp_sec = {events_data[0]['timestamp_sec'] if events_data else 'N/A'}")
-                    
-                    profile = {
-                        'time_mapping': {
-                            'method': 'manual',
-                            'manual_times': match_times
-                        }
-                    }
-                    
-                    # Recalcular Game_Time
-                    updated_events = calculate_game_time_from_zero(events_data, match_info={}, profile=profile)
-                    
-                    print(f"🔍 DEBUG: Primer evento Game_Time después de recalcular = {updated_events[0]['extra_data'].get('Game_Time') if updated_events else 'N/A'}")
-                    
-                    # Actualizar eventos en la base de datos
-                    for i, event in enumerate(events):
-                        if i < len(updated_events):
-                            updated_data = updated_events[i]
-                            if 'extra_data' in updated_data:
-                                event.extra_data = updated_data['extra_data']
-                                from sqlalchemy.orm.attributes import flag_modified
-                                flag_modified(event, "extra_data")
-                    
-                    db.commit()
-                    print(f"✅ Game_Time recalculado para {len(events)} eventos")
+                updated = recalculate_game_time(db, match)
+                if updated:
+                    bump_events_version(db, match.id)
+                db.commit()
+                print(f"✅ Game_Time recalculado ({updated} eventos modificados)")
             except Exception as recalc_err:
+                db.rollback()
                 print(f"⚠️ Error recalculando Game_Time: {str(recalc_err)}")
                 import traceback
                 traceback.print_exc()
@@ -352,14 +313,7 @@ def recalculate_match_times(id):
             if not user_can_edit_match(user, match):
                 return jsonify({"error": "Sin permiso para editar este partido"}), 403
         
-        # 2. Obtener todos los eventos del partido
-        events = db.query(Event).filter(Event.match_id == id).order_by(Event.timestamp_sec).all()
-        if not events:
-            return jsonify({"error": "No hay eventos para recalcular"}), 404
-        
-        print(f"🔄 Recalculando Game_Time para {len(events)} eventos del partido {id}")
-        
-        # 3. Obtener tiempos manuales del partido
+        # 2. Obtener tiempos manuales del partido
         # IMPORTANTE: Los valores son SEGUNDOS DEL VIDEO
         # kick_off_1: Segundo del video donde inicia el partido (negativo si no está filmado)
         # end_1: Segundo del video donde termina el primer tiempo (~40' Game_Time)
@@ -386,78 +340,16 @@ def recalculate_match_times(id):
         print(f"   End 2: {end_2}s")
         print(f"   Duración 1er tiempo: {first_half_duration}s")
         
-        # 4. Recalcular Game_Time para cada evento
-        updated_count = 0
-        for event in events:
-            timestamp = event.timestamp_sec
-            event_type = event.event_type.upper()
-            
-            # Determinar período
-            if timestamp < kick_off_2:
-                period = 1
-            else:
-                period = 2
-            
-            # Calcular Game_Time
-            if event_type == 'KICK OFF':
-                if abs(timestamp - kick_off_1) < 1:  # Primer kick off
-                    game_time_sec = 0
-                elif abs(timestamp - kick_off_2) < 1:  # Segundo kick off
-                    game_time_sec = first_half_duration
-                else:  # Otros kick offs
-                    if period == 1:
-                        game_time_sec = max(0, timestamp - kick_off_1)
-                    else:
-                        game_time_sec = first_half_duration + (timestamp - kick_off_2)
-            elif event_type == 'END':
-                if abs(timestamp - end_1) < 1:  # Fin del primer tiempo
-                    game_time_sec = first_half_duration
-                elif abs(timestamp - end_2) < 1:  # Fin del segundo tiempo
-                    second_half_duration = end_2 - kick_off_2
-                    game_time_sec = first_half_duration + second_half_duration
-                else:  # Otros ends
-                    if period == 1:
-                        game_time_sec = max(0, timestamp - kick_off_1)
-                    else:
-                        game_time_sec = first_half_duration + (timestamp - kick_off_2)
-            else:
-                # Eventos normales
-                if period == 1:
-                    game_time_sec = max(0, timestamp - kick_off_1)
-                else:
-                    game_time_sec = first_half_duration + (timestamp - kick_off_2)
-            
-            # Formatear como MM:SS
-            minutes = int(game_time_sec // 60)
-            seconds = int(game_time_sec % 60)
-            game_time_str = f"{minutes:02d}:{seconds:02d}"
-            
-            # Actualizar extra_data
-            if event.extra_data is None:
-                event.extra_data = {}
-            
-            event.extra_data['Game_Time'] = game_time_str
-            event.extra_data['DETECTED_PERIOD'] = period
-            
-            # Calcular Time_Group (cuartos)
-            if game_time_sec < 1200:
-                time_group = "0'- 20'"
-            elif game_time_sec < 2400:
-                time_group = "20' - 40'"
-            elif game_time_sec < 3600:
-                time_group = "40' - 60'"
-            else:
-                time_group = "60' - 80'"
-            
-            event.extra_data['Time_Group'] = time_group
-            
-            # Marcar como modificado (para JSONB)
-            from sqlalchemy.orm.attributes import flag_modified
-            flag_modified(event, "extra_data")
-            
-            updated_count += 1
+        # 3. Recalcular Game_Time de todos los eventos con un único UPDATE
+        # (KICK OFF / END a menos de 1s de un hito se ajustan al hito)
+        values = recalculate_times_values(id, kick_off_1, end_1, kick_off_2, end_2)
+        updated_count = db.execute(update_extra_data(values, only_changed=False)).rowcount
+        if not updated_count:
+            db.rollback()
+            return jsonify({"error": "No hay eventos para recalcular"}), 404
         
-        # 5. Commit de los cambios
+        # 4. Commit de los cambios
+        bump_events_version(db, id)
         db.commit()
         
         print(f"✅ {updated_count} eventos actualizados")
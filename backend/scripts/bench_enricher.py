@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark y comprobación de enrich_events: recorrido por dicts vs EventFrame.
+
+Enriquece los mismos eventos con las dos implementaciones, verifica que el
+resultado es idéntico (incluido el orden de las claves) y muestra el tiempo de
+cada etapa y el pico de memoria de cada una.
+
+Uso:
+    python scripts/bench_enricher.py                              # XML de uploads/
+    python scripts/bench_enricher.py --file uploads/partido.xml --repeat 20
+"""
+import argparse
+import copy
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+backend_path = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, backend_path)
+
+from enricher import enrich_events
+from normalizer import normalize_xml_to_json
+
+PROFILE = {"time_mapping": {
+    "method": "manual",
+    "manual_times": {"kick_off_1": 0, "end_1": 2400, "kick_off_2": 2700, "end_2": 4800},
+    "delays": {"global_delay_seconds": -2, "event_delays": {"TACKLE": 1}},
+}}
+
+
+def load_events(paths, repeat):
+    events = []
+    for path in paths:
+        events.extend(normalize_xml_to_json(path, PROFILE)["events"])
+    return [copy.deepcopy(ev) for _ in range(repeat) for ev in events]
+
+
+def run(events, columnar):
+    timings = {}
+    copied = copy.deepcopy(events)
+    start = time.perf_counter()
+    result = enrich_events(copied, {}, PROFILE, timings=timings, columnar=columnar)
+    elapsed = time.perf_counter() - start
+
+    # Segunda pasada solo para medir memoria: tracemalloc ralentiza mucho la primera
+    copied = copy.deepcopy(events)
+    tracemalloc.start()
+    enrich_events(copied, {}, PROFILE, columnar=columnar)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", action="append", help="XML a usar (por defecto todos los de uploads/)")
+    parser.add_argument("--repeat", type=int, default=10, help="Veces que se replican los eventos")
+    args = parser.parse_args()
+
+    paths = args.file or sorted(glob.glob(os.path.join(backend_path, "uploads", "*.xml")))
+    events = load_events(paths, args.repeat)
+    print(f"📊 {len(events)} eventos ({len(paths)} archivos x {args.repeat})")
+
+    dicts, dicts_time, dicts_peak, dicts_stages = run(events, columnar=False)
+    frame, frame_time, frame_peak, frame_stages = run(events, columnar=True)
+
+    for name, elapsed, peak, stages in (("dicts", dicts_time, dicts_peak, dicts_stages),
+                                        ("columnar", frame_time, frame_peak, frame_stages)):
+        detail = ", ".join(f"{stage}={seconds * 1000:.0f}ms" for stage, seconds in stages.items())
+        print(f"⏱️ {name:9s} {elapsed * 1000:8.1f} ms  pico {peak / 1e6:7.1f} MB  ({detail})")
+    print(f"⚡ x{dicts_time / frame_time:.1f} más rápido, pico de memoria x{dicts_peak / frame_peak:.1f} menor")
+
+    same = json.dumps(dicts, default=repr) == json.dumps(frame, default=repr)
+    print("✅ Resultados idénticos" if same else "❌ Los resultados difieren")
+    sys.exit(0 if same else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Mide cuántas filas por segundo arman los endpoints de lectura de eventos.
+
+Crea un partido sintético de N eventos (5000 por defecto) en la base de
+DATABASE_URL y compara, sobre la misma función de mapeo (event_row_mapper):
+
+    orm   db.query(Event): objetos Event completos, identity map incluido (antes)
+    core  select(*EVENT_ROW_COLUMNS): filas con solo las columnas leídas (ahora)
+
+Reporta la mediana de cada variante y las filas/s. El partido se elimina al final.
+
+    python scripts/bench_event_reads.py --events 5000 --repeat 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+backend_path = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, backend_path)
+
+from sqlalchemy import select
+
+from db import SessionLocal
+from models import Event, Match
+from routes.match_events import EVENT_ROW_COLUMNS, event_row_mapper
+
+CATEGORIES = ["TACKLE", "RUCK", "PENALTY", "LINEOUT", "SCRUM", "BREAK", "KICK", "TURNOVER+", "POINTS"]
+
+
+def create_match(db, n_events):
+    match = Match(opponent_name="BENCH READS", global_delay_seconds=0)
+    db.add(match)
+    db.flush()
+    db.add_all(
+        Event(
+            match_id=match.id,
+            event_type=CATEGORIES[i % len(CATEGORIES)],
+            timestamp_sec=i * 1.5,
+            x=float(i % 100),
+            y=float(i % 70),
+            extra_data={
+                "EQUIPO": "BENCH" if i % 2 else "RIVAL",
+                "Game_Time": f"{(i // 40) % 80:02d}:{(i * 3) % 60:02d}",
+                "DETECTED_PERIOD": 1 if i < n_events // 2 else 2,
+                "PLAYER": f"Bench Player {i % 23}" if i % 3 else None,
+                "clip_start": i * 1.5,
+                "clip_end": i * 1.5 + 4,
+            },
+        )
+        for i in range(n_events)
+    )
+    db.commit()
+    return match.id
+
+
+def read_orm(db, match_id, to_dict):
+    events = db.query(Event).filter(Event.match_id == match_id).order_by(Event.id).all()
+    return [
+        to_dict((ev.id, ev.match_id, ev.event_type, ev.timestamp_sec, ev.x, ev.y, ev.extra_data))
+        for ev in events
+    ]
+
+
+def read_core(db, match_id, to_dict):
+    rows = db.execute(select(*EVENT_ROW_COLUMNS).where(Event.match_id == match_id).order_by(Event.id)).all()
+    return [to_dict(row) for row in rows]
+
+
+def measure(read, match_id, repeat):
+    to_dict = event_row_mapper()
+    timings, rows = [], 0
+    for _ in range(repeat):
+        # Sesión nueva en cada vuelta, como en una request
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            rows = len(read(db, match_id, to_dict))
+            timings.append(time.perf_counter() - start)
+        finally:
+            db.close()
+    return timings, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        match_id = create_match(db, args.events)
+    finally:
+        db.close()
+
+    try:
+        # Una lectura previa para no medir el arranque de la conexión
+        measure(read_core, match_id, 1)
+        results = {name: measure(read, match_id, args.repeat) for name, read in (("orm", read_orm), ("core", read_core))}
+    finally:
+        db = SessionLocal()
+        try:
+            db.query(Event).filter(Event.match_id == match_id).delete(synchronize_session=False)
+            db.query(Match).filter(Match.id == match_id).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    print(f"📊 Lectura de {args.events} eventos x {args.repeat}")
+    medians = {}
+    for name, (timings, rows) in results.items():
+        medians[name] = statistics.median(timings)
+        print(f"⏱️  {name:<5} {medians[name] * 1000:8.1f} ms  {rows / medians[name]:10.0f} filas/s "
+              f"(min {min(timings) * 1000:.1f} ms)")
+    print(f"🚀 Core vs ORM: x{medians['orm'] / medians['core']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la normalización de la hoja de eventos de un Excel.
+
+Compara el bucle fila a fila original (iterrows + make_json_serializable por
+celda) con excel_rows_to_events, que trabaja columna a columna, y verifica que
+ambos producen exactamente los mismos eventos.
+
+Uso:
+    python scripts/bench_excel_normalizer.py                 # hoja sintética de 10k filas
+    python scripts/bench_excel_normalizer.py --rows 50000
+    python scripts/bench_excel_normalizer.py --file uploads/partido.xlsx --sheet MATRIZ
+"""
+import argparse
+import os
+import sys
+import time
+
+backend_path = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, backend_path)
+
+import numpy as np
+import pandas as pd
+
+from normalizer import excel_rows_to_events, make_json_serializable, seconds_to_game_time
+
+
+def legacy_rows_to_events(events_df, profile):
+    """Bucle fila a fila tal como estaba en normalize_excel_to_json"""
+    col_event_type = profile.get("col_event_type", "CATEGORY")
+    col_time = profile.get("col_time", "SECOND")
+    col_duration = profile.get("col_duration")
+    col_x = profile.get("col_x", "COORDINATE_X")
+    col_y = profile.get("col_y", "COORDINATE_Y")
+
+    events = []
+    for _, row in events_df.iterrows():
+        timestamp_sec = make_json_serializable(row.get(col_time, 0))
+
+        extra_data = {}
+        for col_name, value in row.items():
+            if pd.notna(value):
+                extra_data[col_name] = make_json_serializable(value)
+
+        # El original llamaba a seconds_to_game_time con el string serializado,
+        # lo que falla; aquí se usa el valor numérico como hace la versión nueva
+        numeric_time = pd.to_numeric(row.get(col_time, 0), errors="coerce")
+        game_time = seconds_to_game_time(None if pd.isna(numeric_time) else numeric_time)
+
+        events.append({
+            "event_type": make_json_serializable(row.get(col_event_type, "")),
+            "timestamp_sec": timestamp_sec,
+            "Game_Time": game_time,
+            "game_time": game_time,
+            "duration": make_json_serializable(row.get(col_duration, 0)),
+            "x": make_json_serializable(row.get(col_x)),
+            "y": make_json_serializable(row.get(col_y)),
+            "extra_data": extra_data
+        })
+    return events
+
+
+def build_synthetic_sheet(n_rows, seed=42):
+    """Hoja MATRIZ sintética con columnas de texto, numéricas, fechas y huecos"""
+    rng = np.random.default_rng(seed)
+    categories = np.array(["TACKLE", "RUCK", "PENALTY", "LINEOUT", "SCRUM", "BREAK", "KICK", "POINTS"])
+    players = np.array(["Rossi", "Bianchi", " Verdi ", "Neri", None], dtype=object)
+
+    df = pd.DataFrame({
+        "CATEGORY": categories[rng.integers(0, len(categories), n_rows)],
+        "SECOND": np.round(rng.uniform(0, 4800, n_rows), 2),
+        "DURATION": rng.integers(1, 15, n_rows),
+        "PLAYER": players[rng.integers(0, len(players), n_rows)],
+        "COORDINATE_X": rng.integers(0, 100, n_rows),
+        "COORDINATE_Y": np.where(rng.random(n_rows) < 0.2, np.nan, rng.uniform(0, 70, n_rows)),
+        "TEAM": np.where(rng.random(n_rows) < 0.5, "LOCAL", "RIVAL"),
+        "DATE": pd.Timestamp("2024-10-20") + pd.to_timedelta(rng.integers(0, 5, n_rows), unit="D"),
+    })
+    for i in range(12):
+        col = np.where(rng.random(n_rows) < 0.7, None, f"DESC_{i}")
+        df[f"DESCRIPTOR_{i}"] = col
+    return df
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="Filas de la hoja sintética")
+    parser.add_argument("--file", help="Excel real a usar en lugar de la hoja sintética")
+    parser.add_argument("--sheet", default="MATRIZ", help="Hoja de eventos del Excel real")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones (se toma la mejor)")
+    args = parser.parse_args()
+
+    profile = {"col_event_type": "CATEGORY", "col_time": "SECOND", "col_duration": "DURATION"}
+
+    if args.file:
+        events_df = pd.read_excel(args.file, sheet_name=args.sheet)
+        print(f"📄 {args.file} [{args.sheet}]: {len(events_df)} filas x {len(events_df.columns)} columnas")
+    else:
+        events_df = build_synthetic_sheet(args.rows)
+        print(f"📄 Hoja sintética: {len(events_df)} filas x {len(events_df.columns)} columnas")
+
+    legacy_times, new_times = [], []
+    for _ in range(args.repeat):
+        legacy_events, elapsed = timed(legacy_rows_to_events, events_df, profile)
+        legacy_times.append(elapsed)
+        new_events, elapsed = timed(excel_rows_to_events, events_df, profile)
+        new_times.append(elapsed)
+
+    if legacy_events != new_events:
+        mismatch = next(i for i, (a, b) in enumerate(zip(legacy_events, new_events)) if a != b) \
+            if len(legacy_events) == len(new_events) else "longitud"
+        print(f"❌ Los resultados difieren (primera diferencia: {mismatch})")
+        sys.exit(1)
+
+    legacy_best, new_best = min(legacy_times), min(new_times)
+    print(f"✅ Resultados idénticos ({len(new_events)} eventos)")
+    print(f"⏱️  iterrows:       {legacy_best * 1000:8.1f} ms")
+    print(f"⏱️  por columnas:   {new_best * 1000:8.1f} ms")
+    print(f"🚀 Aceleración:    {legacy_best / new_best:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Mide la latencia de import_match_from_json sobre un partido sintético.
+
+Importa varias veces un partido de N eventos (800 por defecto, un partido típico)
+contra la base de DATABASE_URL y reporta la mediana de tiempo, el número de
+commits y de sentencias SQL por import. Los partidos creados se eliminan al final.
+
+Para comparar dos versiones del importer, ejecutarlo en cada una:
+    python scripts/bench_import_transaction.py --events 800 --repeat 5
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+backend_path = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, backend_path)
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from db import SessionLocal, engine
+from importer import import_match_from_json
+from models import Event, Match
+
+CATEGORIES = ["TACKLE", "RUCK", "PENALTY", "LINEOUT", "SCRUM", "BREAK", "KICK", "TURNOVER+", "POINTS"]
+
+
+def build_match(n_events):
+    events = []
+    for i in range(n_events):
+        category = CATEGORIES[i % len(CATEGORIES)]
+        extra_data = {"EQUIPO": "BENCH" if i % 2 else "RIVAL", "clip_start": i * 5.0, "clip_end": i * 5.0 + 4}
+        if category == "POINTS":
+            extra_data["POINTS"] = "TRY"
+        events.append({
+            "event_type": category,
+            "timestamp_sec": i * 5.0,
+            "players": [f"Bench Player {i % 23}"] if i % 3 else [],
+            "extra_data": extra_data,
+        })
+    return {
+        "match": {
+            "team": "BENCH",
+            "opponent_name": "RIVAL",
+            "date": "2024-01-01",
+            "kick_off_1_seconds": 0,
+            "end_1_seconds": 2400,
+            "kick_off_2_seconds": 2700,
+            "end_2_seconds": 4800,
+        },
+        "events": events,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=800)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    profile = {"time_mapping": {"method": "manual", "manual_times": {
+        "kick_off_1": 0, "end_1": 2400, "kick_off_2": 2700, "end_2": 4800}}}
+
+    counters = {"commits": 0, "statements": 0}
+
+    def count_commit(session):
+        counters["commits"] += 1
+
+    def count_statement(*_args, **_kwargs):
+        counters["statements"] += 1
+
+    event.listen(Session, "after_commit", count_commit)
+    event.listen(engine, "before_cursor_execute", count_statement)
+
+    timings, commits, statements, match_ids = [], [], [], []
+    try:
+        for _ in range(args.repeat):
+            counters.update(commits=0, statements=0)
+            payload = build_match(args.events)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = import_match_from_json(payload, profile)
+            timings.append(time.perf_counter() - start)
+            commits.append(counters["commits"])
+            statements.append(counters["statements"])
+            if not result:
+                print("❌ El import falló")
+                sys.exit(1)
+            match_ids.append(result.get("match_id"))
+    finally:
+        event.remove(Session, "after_commit", count_commit)
+        event.remove(engine, "before_cursor_execute", count_statement)
+        db = SessionLocal()
+        try:
+            ids = [m for m in match_ids if m]
+            if ids:
+                db.query(Event).filter(Event.match_id.in_(ids)).delete(synchronize_session=False)
+                db.query(Match).filter(Match.id.in_(ids)).delete(synchronize_session=False)
+                db.commit()
+        finally:
+            db.close()
+
+    print(f"📊 Import de {args.events} eventos x {args.repeat}")
+    print(f"⏱️  Mediana:     {statistics.median(timings) * 1000:8.1f} ms (min {min(timings) * 1000:.1f} ms)")
+    print(f"💾 Commits:     {statistics.median(commits):8.0f} por import")
+    print(f"🧾 Sentencias:  {statistics.median(statements):8.0f} por import")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Benchmark y comprobación de calculate_try_origin_and_phases / calculate_break_result.
+
+Compara las versiones indexadas por equipo y tiempo del enricher con los bucles
+originales (un recorrido completo de la lista por cada try y cada quiebre) y
+verifica que TRY_ORIGIN, TRY_PHASES, BREAK_RESULT y BREAK_RESULT_TIME coinciden.
+
+Uso:
+    python scripts/bench_try_break.py                    # lista sintética de 5k eventos
+    python scripts/bench_try_break.py --events 50000     # p. ej. varios partidos juntos
+    python scripts/bench_try_break.py --file uploads/partido.xml
+"""
+import argparse
+import contextlib
+import copy
+import io
+import os
+import random
+import sys
+import time
+
+backend_path = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, backend_path)
+
+from enricher import calculate_break_result, calculate_try_origin_and_phases
+
+TYPES = ["TACKLE", "RUCK", "RUCK", "RUCK", "PENALTY", "LINEOUT", "SCRUM", "TURNOVER", "TURNOVER+",
+         "TURNOVER-", "KICK OFF", "KICKOFF", "KICK", "GOAL-KICK", "BREAK", "POINTS", "POINTS"]
+TEAMS = ["LOCAL", "RIVAL", "", None, "<sin clave>"]
+
+
+# --- Implementación original, tal como estaba en enricher.py ---------------------
+
+def legacy_try_origin_and_phases(events):
+    """
+    Calcula el origen y fases de cada try analizando la secuencia de eventos previos.
+    
+    Args:
+        events: Lista de eventos ya normalizados y enriquecidos
+        
+    Returns:
+        Lista de eventos con TRY_ORIGIN y TRY_PHASES añadidos en extra_data
+    """
+    if not events:
+        return events
+    
+    # Categorías que pueden iniciar una secuencia ofensiva
+    origin_categories = ["TURNOVER", "SCRUM", "LINEOUT", "KICKOFF", "PENALTY"]
+    
+    # Función para detectar si un evento es un try
+    def is_try_event(event):
+        if event.get('event_type', '').upper() != 'POINTS':
+            return False
+        
+        # Buscar tipo de punto en varios campos
+        extra_data = event.get('extra_data', {})
+        points_type = (event.get('POINTS') or 
+                      extra_data.get('TIPO-PUNTOS') or
+                      extra_data.get('TIPO_PUNTOS') or
+                      extra_data.get('TIPO-PERDIDA/RECUPERACIN') or  # A veces está mal etiquetado
+                      extra_data.get('POINTS_TYPE'))
+        
+        is_try = points_type and str(points_type).upper() == 'TRY'
+        if is_try:
+            print(f"🔍 DEBUG: Try detectado en {event.get('timestamp_sec'):.1f}s, team={event.get('team', 'N/A')}")
+        return is_try
+    
+    # Función para encontrar el evento de origen más cercano
+    def find_origin_event(try_event, all_events):
+        try_time = try_event.get('timestamp_sec', 0)
+        try_team = try_event.get('team', '')
+        
+        # Buscar eventos de origen en ventana de 2 minutos (120 segundos) antes del try
+        max_time_window = 120
+        
+        # Buscar eventos de origen previos
+        candidates = []
+        for event in all_events:
+            event_time = event.get('timestamp_sec', 0)
+            time_diff = try_time - event_time
+            
+            # Solo eventos dentro de la ventana de tiempo
+            if time_diff < 0 or time_diff > max_time_window:
+                continue
+                
+            event_type = event.get('event_type', '').upper()
+            
+            # Buscar eventos de origen (TURNOVER+, SCRUM, LINEOUT, KICK OFF, PENALTY a favor)
+            if event_type in origin_categories or event_type in ['TURNOVER+', 'KICK OFF', 'KICKOFF']:
+                # Si tenemos info de equipo, verificar que sea del mismo equipo
+                if try_team and event.get('team') and event.get('team') != try_team:
+                    continue
+                candidates.append(event)
+        
+        if not candidates:
+            print(f"⚠️  DEBUG: No se encontró origen para try en {try_time:.1f}s")
+            return None
+        
+        # Retornar el evento más cercano al try
+        origin = max(candidates, key=lambda x: x.get('timestamp_sec', 0))
+        print(f"✅ DEBUG: Origen encontrado: {origin.get('event_type')} en {origin.get('timestamp_sec'):.1f}s")
+        return origin
+    
+    # Función para contar fases (rucks + 1) entre origen y try
+    def count_phases(try_event, origin_event, all_events):
+        if not origin_event:
+            return 1
+        
+        try_time = try_event.get('timestamp_sec', 0)
+        origin_time = origin_event.get('timestamp_sec', 0)
+        try_team = try_event.get('team', '')
+        
+        # Contar eventos RUCK entre origen y try del mismo equipo
+        ruck_count = 0
+        for event in all_events:
+            event_time = event.get('timestamp_sec', 0)
+            if (event.get('event_type', '').upper() == 'RUCK' and
+                origin_time < event_time < try_time and
+                event.get('team', '') == try_team):
+                ruck_count += 1
+        
+        return ruck_count + 1  # Fases = rucks + 1
+    
+    # Procesar todos los eventos
+    for event in events:
+        if is_try_event(event):
+            # Encontrar origen
+            origin_event = find_origin_event(event, events)
+            
+            # Calcular fases
+            phases = count_phases(event, origin_event, events)
+            
+            # Añadir datos calculados a extra_data
+            if 'extra_data' not in event:
+                event['extra_data'] = {}
+            
+            if origin_event:
+                event['extra_data']['TRY_ORIGIN'] = origin_event.get('event_type', '').upper()
+                print(f"DEBUG: Try en {event.get('timestamp_sec'):.1f}s - origen: {origin_event.get('event_type')} en {origin_event.get('timestamp_sec'):.1f}s, fases: {phases}")
+            else:
+                event['extra_data']['TRY_ORIGIN'] = 'UNKNOWN'
+                print(f"DEBUG: Try en {event.get('timestamp_sec'):.1f}s - sin origen identificado, fases: {phases}")
+            
+            event['extra_data']['TRY_PHASES'] = phases
+    
+    return events
+
+
+def legacy_break_result(events):
+    """
+    Calcula el resultado de cada quiebre analizando los eventos posteriores.
+    
+    Args:
+        events: Lista de eventos ya normalizados y enriquecidos
+        
+    Returns:
+        Lista de eventos con BREAK_RESULT añadido en extra_data
+    """
+    if not events:
+        return events
+    
+    # Función para detectar si un evento es un quiebre
+    def is_break_event(event):
+        return event.get('event_type', '').upper() == 'BREAK'
+    
+    # Función para determinar el resultado del quiebre
+    def find_break_result(break_event, all_events):
+        break_time = break_event.get('timestamp_sec', 0)
+        break_team = break_event.get('team', '')
+        
+        # Ventana de 120 segundos después del quiebre
+        max_time_window = 120
+        
+        # Buscar eventos posteriores
+        for event in all_events:
+            event_time = event.get('timestamp_sec', 0)
+            time_diff = event_time - break_time
+            
+            # Solo eventos dentro de la ventana de tiempo
+            if time_diff <= 0 or time_diff > max_time_window:
+                continue
+            
+            event_type = event.get('event_type', '').upper()
+            event_team = event.get('team', '')
+            extra_data = event.get('extra_data', {})
+            
+            # TRY - Puntos anotados (del mismo equipo del quiebre)
+            if event_type == 'POINTS':
+                points_type = (extra_data.get('TIPO-PUNTOS') or 
+                             extra_data.get('TIPO_PUNTOS') or 
+                             extra_data.get('POINTS_TYPE') or '').upper()
+                if points_type == 'TRY' and event_team == break_team:
+                    return 'TRY', time_diff
+            
+            # PENALTY - Penal concedido (cualquier equipo)
+            if event_type == 'PENALTY':
+                # Si es penal a favor (del equipo del quiebre)
+                if event_team == break_team:
+                    return 'PENALTY_FOR', time_diff
+                # Si es penal en contra
+                elif event_team and event_team != break_team:
+                    return 'PENALTY_AGAINST', time_diff
+            
+            # TURNOVER - Pérdida de posesión
+            if event_type in ['TURNOVER-', 'TURNOVER']:
+                turnover_type = extra_data.get('TIPO-PERDIDA/RECUPERACION') or extra_data.get('TURNOVER_TYPE') or ''
+                # Si es pérdida del equipo del quiebre
+                if event_team == break_team:
+                    return f'TURNOVER_{turnover_type}', time_diff
+            
+            # KICK - Patada en juego
+            if event_type == 'KICK':
+                if event_team == break_team:
+                    return 'KICK', time_diff
+            
+            # GOAL-KICK - Patada a los palos
+            if event_type == 'GOAL-KICK':
+                if event_team == break_team:
+                    return 'GOAL_KICK_ATTEMPT', time_diff
+        
+        # Si no se encontró resultado específico
+        return 'CONTINUES', None
+    
+    # Procesar todos los eventos BREAK
+    for event in events:
+        if is_break_event(event):
+            # Encontrar resultado
+            result, time_to_result = find_break_result(event, events)
+            
+            # Añadir datos calculados a extra_data
+            if 'extra_data' not in event:
+                event['extra_data'] = {}
+            
+            event['extra_data']['BREAK_RESULT'] = result
+            if time_to_result:
+                event['extra_data']['BREAK_RESULT_TIME'] = round(time_to_result, 1)
+            
+            print(f"DEBUG: Break en {event.get('timestamp_sec'):.1f}s - resultado: {result}" + 
+                  (f" ({time_to_result:.1f}s después)" if time_to_result else ""))
+    
+    return events
+
+
+# ----------------------------------------------------------------------------------
+
+
+def build_synthetic_events(n_events, seed=7):
+    """Eventos desordenados a propósito, con tiempos repetidos y equipos vacíos/None"""
+    rng = random.Random(seed)
+    events = []
+    t = 0.0
+    for _ in range(n_events):
+        t += rng.choice([0, 0.5, 1, 2.5, 4, 7, 12.3])
+        event_type = rng.choice(TYPES)
+        extra_data = {}
+        if event_type == "POINTS":
+            key = rng.choice(["TIPO-PUNTOS", "TIPO_PUNTOS", "POINTS_TYPE", "TIPO-PERDIDA/RECUPERACIN"])
+            extra_data[key] = rng.choice(["TRY", "try", "CONVERSION", "PENALTY"])
+        if event_type.startswith("TURNOVER"):
+            extra_data["TIPO-PERDIDA/RECUPERACION"] = rng.choice(["KNOCK-ON", "RUCK", ""])
+        event = {"event_type": event_type, "extra_data": extra_data,
+                 "timestamp_sec": int(t) if rng.random() < 0.2 else round(t, 2)}
+        team = rng.choice(TEAMS)
+        if team != "<sin clave>":
+            event["team"] = team
+        events.append(event)
+    # Intercambios locales: la lista no queda ordenada por tiempo
+    for _ in range(n_events // 10):
+        i = rng.randrange(n_events - 1)
+        events[i], events[i + 1] = events[i + 1], events[i]
+    return events
+
+
+def load_file_events(path):
+    from enricher import calculate_game_time_from_zero
+    from normalizer import normalize_xml_to_json
+
+    profile = {"file_type": "xml"}
+    data = normalize_xml_to_json(path, profile)
+    return calculate_game_time_from_zero(data["events"], data["match"], profile)
+
+
+def run_pair(fn_try, fn_break, events):
+    events = copy.deepcopy(events)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn_break(fn_try(events))
+    return events, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5000, help="Eventos de la lista sintética")
+    parser.add_argument("--file", help="XML real a usar en lugar de la lista sintética")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.file:
+        with contextlib.redirect_stdout(io.StringIO()):
+            events = load_file_events(args.file)
+        print(f"📄 {args.file}: {len(events)} eventos")
+    else:
+        events = build_synthetic_events(args.events, args.seed)
+        print(f"📄 Lista sintética: {len(events)} eventos")
+
+    legacy, legacy_time = run_pair(legacy_try_origin_and_phases, legacy_break_result, events)
+    new, new_time = run_pair(calculate_try_origin_and_phases, calculate_break_result, events)
+
+    if legacy != new:
+        mismatch = next(i for i, (a, b) in enumerate(zip(legacy, new)) if a != b)
+        print(f"❌ Los resultados difieren en el evento {mismatch}:")
+        print(f"   original: {legacy[mismatch]}")
+        print(f"   nuevo:    {new[mismatch]}")
+        sys.exit(1)
+
+    tries = sum(1 for ev in new if "TRY_ORIGIN" in ev.get("extra_data", {}))
+    breaks = sum(1 for ev in new if "BREAK_RESULT" in ev.get("extra_data", {}))
+    print(f"✅ Resultados idénticos ({tries} tries, {breaks} quiebres)")
+    print(f"⏱️  original:  {legacy_time * 1000:8.1f} ms")
+    print(f"⏱️  indexado:  {new_time * 1000:8.1f} ms")
+    print(f"🚀 Aceleración: {legacy_time / new_time:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Importa en un solo comando varios archivos XML/Excel (p. ej. los partidos
+históricos de un club nuevo).
+
+Uso:
+    python scripts/bulk_import.py /app/uploads/temporada --profile "Sportscode XML"
+    python scripts/bulk_import.py a.xml b.xml --profile "Sportscode XML" --workers 4
+    python scripts/bulk_import.py --manifest temporada.json
+
+El manifest es una lista JSON de archivos con su perfil y, opcionalmente, los
+datos del partido que el archivo no trae:
+    [
+        {"path": "20251019 Az-Pescara (2).xml", "profile": "Sportscode XML",
+         "match": {"team": "Pescara", "opponent_name": "Avezzano", "date": "2025-10-19"}},
+        {"path": "partido.xlsx", "profile": "Excel"}
+    ]
+"""
+import argparse
+import json
+import os
+import sys
+
+backend_path = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, backend_path)
+
+from bulk_import import collect_bulk_files, run_bulk_import
+from log_config import configure_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="Archivos o directorios a importar")
+    parser.add_argument("--profile", help="Perfil de import por defecto")
+    parser.add_argument("--manifest", help="JSON con la lista de archivos y su perfil")
+    parser.add_argument("--workers", type=int, help="Procesos de normalización")
+    parser.add_argument("--force", action="store_true", help="Reimportar archivos ya importados")
+    args = parser.parse_args()
+    configure_logging()
+
+    entries = []
+    if args.manifest:
+        with open(args.manifest, "r", encoding="utf-8") as fh:
+            entries.extend(collect_bulk_files(json.load(fh), profile=args.profile))
+    for path in args.paths:
+        if os.path.isdir(path):
+            entries.extend(collect_bulk_files(directory=os.path.abspath(path), profile=args.profile))
+        else:
+            entries.extend(collect_bulk_files([os.path.abspath(path)], profile=args.profile))
+
+    if not entries:
+        parser.error("No hay archivos para importar")
+
+    print("=" * 80)
+    print(f"🏉 IMPORTACIÓN MASIVA: {len(entries)} archivos")
+    print("=" * 80)
+
+    summary = run_bulk_import(entries, force=args.force, workers=args.workers)
+
+    print("\n" + "=" * 80)
+    for item in summary["files"]:
+        icon = {"imported": "✅", "already_imported": "♻️ ", "skipped": "♻️ "}.get(item["status"], "❌")
+        detail = f"partido {item['match_id']}" if item.get("match_id") else item.get("error", "")
+        events = f"{item['events']:5d} eventos" if item.get("events") is not None else " " * 13
+        print(f"{icon} {item['file'][:50]:50s} {events}  {detail}")
+    print("=" * 80)
+    print(f"📊 Importados: {summary['imported']} | Ya importados: {summary['already_imported']} | "
+          f"Fallidos: {summary['failed']}")
+    print(f"⚡ {summary['events']} eventos en {summary['elapsed_seconds']}s ({summary['events_per_sec']} eventos/s)")
+
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Comprobación de game_time_sql contra una base Postgres real (DATABASE_URL).
+
+Crea un partido sintético con eventos difíciles (medios segundos, timestamps
+negativos o nulos, eventos sin tipo, KICK OFF / END cerca de los hitos), ejecuta
+los UPDATE ... FROM de game_time_sql con varios juegos de hitos y compara los
+extra_data resultantes con los recálculos por fila en Python que reemplazan:
+
+    - update_match: calculate_game_time_from_zero con method=manual
+      (Game_Time redondeado al segundo, al par)
+    - POST /matches/<id>/recalculate-times: el bucle original del endpoint
+      (Game_Time truncado, KICK OFF / END ajustados a los hitos)
+
+Las claves que no calcula el UPDATE deben quedar como estaban. Además comprueba
+only_changed en recalculate_game_time: repetir los mismos hitos o mover solo end_2
+no reescribe ninguna fila (el ctid no cambia), y al mover kick_off_2 se reescriben
+exactamente las filas cuyo valor cambia. Todo corre en una transacción que se
+descarta al final: la base queda igual.
+
+Uso:
+    python scripts/check_game_time_sql.py                  # 3000 eventos
+    python scripts/check_game_time_sql.py --events 20000 --seed 7
+"""
+import argparse
+import contextlib
+import copy
+import io
+import logging
+import os
+import random
+import sys
+import time
+
+backend_path = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, backend_path)
+
+from sqlalchemy import literal_column, select
+
+from db import SessionLocal, engine
+from enricher import calculate_game_time_from_zero
+from game_time_sql import recalculate_game_time, recalculate_times_values, update_extra_data
+from models import Event, Match
+
+CATEGORIES = ["TACKLE", "RUCK", "PENALTY", "LINEOUT", "SCRUM", "BREAK", "KICK", "POINTS", "KICK OFF", "END"]
+GAME_TIME_KEYS = ("Game_Time", "DETECTED_PERIOD", "Time_Group", "_delay_applied")
+
+# (kick_off_1, end_1, kick_off_2, end_2): típicos, partido empezado antes del video
+# y hitos degenerados (fin del 1er tiempo antes del inicio, 2º tiempo solapado)
+BOUND_SETS = [
+    (0, 2400, 2700, 4800),
+    (-120, 2280, 2900, 5300),
+    (315, 2741, 3512, 6020),
+    (100, 50, 3000, 2000),
+    (600, 3100, 2900, 5200),
+]
+
+
+def build_events(n_events, seed):
+    """Eventos sintéticos con los casos borde de los dos recálculos"""
+    rng = random.Random(seed)
+    milestones = sorted({value for bounds in BOUND_SETS for value in bounds})
+    events = []
+    for i in range(n_events):
+        roll = rng.random()
+        if roll < 0.02:
+            timestamp = None
+        elif roll < 0.15:
+            # Medios segundos exactos: el redondeo al par de Game_Time
+            timestamp = rng.randint(-300, 6000) + 0.5
+        elif roll < 0.25:
+            # Alrededor de un hito (la tolerancia de 1s de KICK OFF / END)
+            timestamp = rng.choice(milestones) + rng.choice([-1.5, -1.0, -0.5, -0.25, 0.0, 0.25, 0.5, 0.99, 1.0])
+        else:
+            timestamp = round(rng.uniform(-300, 6000), rng.choice([0, 1, 3]))
+        event_type = rng.choice(CATEGORIES) if rng.random() > 0.02 else rng.choice(["", None])
+        if event_type and rng.random() < 0.1:
+            event_type = event_type.lower()
+        extra_data = {"EQUIPO": rng.choice(["BENCH", "RIVAL"]), "clip_start": i * 5.0}
+        if rng.random() < 0.3:
+            # Valores viejos que el recálculo tiene que pisar
+            extra_data.update(Game_Time="99:99", DETECTED_PERIOD=3, Time_Group="viejo")
+        events.append({"event_type": event_type, "timestamp_sec": timestamp, "extra_data": extra_data})
+    return events
+
+
+def legacy_update_match(events, bounds):
+    """Recálculo de update_match antes de game_time_sql: calculate_game_time_from_zero por fila"""
+    kick_off_1, end_1, kick_off_2, end_2 = bounds
+    profile = {"time_mapping": {"method": "manual", "manual_times": {
+        "kick_off_1": kick_off_1, "end_1": end_1, "kick_off_2": kick_off_2, "end_2": end_2}}}
+    # event_type None como "": el recálculo viejo fallaba con él y el UPDATE lo trata como sin tipo
+    events_data = [{
+        "timestamp_sec": ev["timestamp_sec"],
+        "event_type": ev["event_type"] or "",
+        "extra_data": dict(ev["extra_data"]),
+    } for ev in events]
+    updated = calculate_game_time_from_zero(events_data, match_info={}, profile=profile)
+    return [{key: ev["extra_data"][key] for key in GAME_TIME_KEYS if key in ev["extra_data"]} for ev in updated]
+
+
+def legacy_recalculate_times(events, bounds):
+    """
+    Bucle original de POST /matches/<id>/recalculate-times. Los eventos sin
+    timestamp (el bucle fallaba con ellos) quedan fuera, como en el UPDATE.
+    """
+    kick_off_1, end_1, kick_off_2, end_2 = bounds
+    first_half_duration = end_1 - kick_off_1
+    results = []
+    for event in events:
+        timestamp = event["timestamp_sec"]
+        if timestamp is None:
+            results.append(None)
+            continue
+        event_type = (event["event_type"] or "").upper()
+        period = 1 if timestamp < kick_off_2 else 2
+
+        def regular():
+            if period == 1:
+                return max(0, timestamp - kick_off_1)
+            return first_half_duration + (timestamp - kick_off_2)
+
+        if event_type == 'KICK OFF':
+            if abs(timestamp - kick_off_1) < 1:
+                game_time_sec = 0
+            elif abs(timestamp - kick_off_2) < 1:
+                game_time_sec = first_half_duration
+            else:
+                game_time_sec = regular()
+        elif event_type == 'END':
+            if abs(timestamp - end_1) < 1:
+                game_time_sec = first_half_duration
+            elif abs(timestamp - end_2) < 1:
+                game_time_sec = first_half_duration + (end_2 - kick_off_2)
+            else:
+                game_time_sec = regular()
+        else:
+            game_time_sec = regular()
+
+        minutes = int(game_time_sec // 60)
+        seconds = int(game_time_sec % 60)
+        if game_time_sec < 1200:
+            time_group = "0'- 20'"
+        elif game_time_sec < 2400:
+            time_group = "20' - 40'"
+        elif game_time_sec < 3600:
+            time_group = "40' - 60'"
+        else:
+            time_group = "60' - 80'"
+        results.append({
+            "Game_Time": f"{minutes:02d}:{seconds:02d}",
+            "DETECTED_PERIOD": period,
+            "Time_Group": time_group,
+        })
+    return results
+
+
+def reset_events(db, ids, events):
+    """Vuelve extra_data de cada evento a su valor original"""
+    db.bulk_update_mappings(Event, [
+        {"id": event_id, "extra_data": copy.deepcopy(ev["extra_data"])} for event_id, ev in zip(ids, events)
+    ])
+    db.flush()
+
+
+def stored_extra_data(db, match_id):
+    rows = db.execute(select(Event.id, Event.extra_data).where(Event.match_id == match_id)).all()
+    return {row.id: row.extra_data for row in rows}
+
+
+def compare(label, ids, events, stored, expected):
+    """Cuenta diferencias entre lo guardado por el UPDATE y el recálculo en Python"""
+    mismatches = 0
+    for event_id, ev, values in zip(ids, events, expected):
+        actual = stored[event_id]
+        # El UPDATE mezcla con ||: las demás claves quedan como estaban
+        wanted = ev["extra_data"] if values is None else {**ev["extra_data"], **values}
+        if actual != wanted:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"   ✗ {label} evento {event_id} ({ev['event_type']!r}, {ev['timestamp_sec']!r}): "
+                      f"esperado {wanted}, guardado {actual}")
+    return mismatches
+
+
+def row_versions(db, match_id):
+    """ctid de cada evento: cambia cuando el UPDATE reescribe la fila"""
+    rows = db.execute(
+        select(Event.id, literal_column("events.ctid::text").label("ctid")).where(Event.match_id == match_id)
+    ).all()
+    return {row.id: row.ctid for row in rows}
+
+
+def set_bounds(db, match, bounds):
+    match.kick_off_1_seconds, match.end_1_seconds, match.kick_off_2_seconds, match.end_2_seconds = bounds
+    db.flush()
+
+
+def check_only_changed(db, match, ids, events):
+    """
+    recalculate_game_time con only_changed: solo reescribe las filas cuyo
+    Game_Time, DETECTED_PERIOD o Time_Group cambia. Devuelve las diferencias.
+    """
+    base = BOUND_SETS[0]
+    kick_off_1, end_1, kick_off_2, end_2 = base
+    steps = [
+        ("mismos hitos", base),
+        ("solo end_2", (kick_off_1, end_1, kick_off_2, end_2 + 300)),
+        ("kick_off_2 +45s", (kick_off_1, end_1, kick_off_2 + 45, end_2 + 300)),
+        ("end_1 -30s", (kick_off_1, end_1 - 30, kick_off_2 + 45, end_2 + 300)),
+    ]
+
+    reset_events(db, ids, events)
+    set_bounds(db, match, base)
+    with contextlib.redirect_stdout(io.StringIO()):
+        previous = legacy_update_match(events, base)
+    recalculate_game_time(db, match)
+
+    failures = 0
+    for label, bounds in steps:
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = legacy_update_match(events, bounds)
+        should_change = {event_id for event_id, old, new in zip(ids, previous, expected) if old != new}
+        before = row_versions(db, match.id)
+        set_bounds(db, match, bounds)
+        updated = recalculate_game_time(db, match)
+        after = row_versions(db, match.id)
+        rewritten = {event_id for event_id in ids if before[event_id] != after[event_id]}
+
+        mismatches = compare(f"only_changed {label}", ids, events, stored_extra_data(db, match.id), expected)
+        if updated != len(should_change) or rewritten != should_change:
+            print(f"   ✗ only_changed {label}: {updated} filas actualizadas y {len(rewritten)} reescritas, "
+                  f"se esperaban {len(should_change)}")
+            mismatches += 1
+        print(f"{'✅' if not mismatches else '❌'} only_changed {label} {bounds}: {updated} filas "
+              f"de {len(ids)}, {mismatches} diferencias")
+        failures += mismatches
+        previous = expected
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print(f"❌ Hace falta una base Postgres en DATABASE_URL (dialecto actual: {engine.dialect.name})")
+        sys.exit(1)
+
+    # calculate_game_time_from_zero avisa de los eventos sin timestamp o sin tipo en cada llamada
+    logging.getLogger("enricher").setLevel(logging.ERROR)
+
+    events = build_events(args.events, args.seed)
+    print(f"📄 {len(events)} eventos sintéticos, {len(BOUND_SETS)} juegos de hitos")
+
+    failures = 0
+    db = SessionLocal()
+    try:
+        match = Match(opponent_name="CHECK GAME TIME SQL")
+        db.add(match)
+        db.flush()
+        rows = [Event(match_id=match.id, event_type=ev["event_type"], timestamp_sec=ev["timestamp_sec"],
+                      extra_data=copy.deepcopy(ev["extra_data"])) for ev in events]
+        db.add_all(rows)
+        db.flush()
+        ids = [row.id for row in rows]
+
+        for bounds in BOUND_SETS:
+            set_bounds(db, match, bounds)
+
+            # update_match: recalculate_game_time (game_time_values + update_extra_data)
+            reset_events(db, ids, events)
+            with contextlib.redirect_stdout(io.StringIO()):
+                expected = legacy_update_match(events, bounds)
+            start = time.perf_counter()
+            updated = recalculate_game_time(db, match)
+            elapsed = time.perf_counter() - start
+            mismatches = compare("update_match", ids, events, stored_extra_data(db, match.id), expected)
+            print(f"{'✅' if not mismatches else '❌'} update_match {bounds}: {updated} filas en "
+                  f"{elapsed * 1000:.1f} ms, {mismatches} diferencias")
+            failures += mismatches
+
+            # recalculate-times: recalculate_times_values + update_extra_data sin only_changed
+            reset_events(db, ids, events)
+            expected = legacy_recalculate_times(events, bounds)
+            start = time.perf_counter()
+            values = recalculate_times_values(match.id, *bounds)
+            updated = db.execute(update_extra_data(values, only_changed=False)).rowcount
+            elapsed = time.perf_counter() - start
+            mismatches = compare("recalculate-times", ids, events, stored_extra_data(db, match.id), expected)
+            with_timestamp = sum(1 for ev in events if ev["timestamp_sec"] is not None)
+            if updated != with_timestamp:
+                print(f"   ✗ recalculate-times actualizó {updated} filas, se esperaban {with_timestamp}")
+                mismatches += 1
+            print(f"{'✅' if not mismatches else '❌'} recalculate-times {bounds}: {updated} filas en "
+                  f"{elapsed * 1000:.1f} ms, {mismatches} diferencias")
+            failures += mismatches
+
+        failures += check_only_changed(db, match, ids, events)
+    finally:
+        db.rollback()
+        db.close()
+
+    if failures:
+        print(f"❌ {failures} diferencias con el recálculo en Python")
+        sys.exit(1)
+    print("✅ game_time_sql coincide con el recálculo en Python")
+
+
+if __name__ == "__main__":
+    main()
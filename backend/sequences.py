@@ -0,0 +1,205 @@
+"""
+Motor de secuencias: cadenas de posesión y métricas por cadena.
+
+Cada partido se segmenta una sola vez (en orden de timestamp) en cadenas de
+posesión. Una cadena empieza con un evento de origen (scrum, lineout, kick off,
+penal, recuperación), cuando cambia el equipo que ataca, o tras un evento que
+cierra la posesión (patada, pérdida, puntos).
+
+Las métricas se calculan con reglas registradas: funciones rule(chain, events)
+que reciben una cadena y devuelven un valor. Cada regla recorre solo los eventos
+de su cadena, así que añadir un KPI nuevo cuesta O(n) sobre el partido:
+
+    @sequence_rule("offloads")
+    def offloads(chain, events):
+        return sum(1 for i in chain["indices"] if events[i].get("event_type") == "OFFLOAD")
+
+El origen y las fases de cada try (TRY_ORIGIN/TRY_PHASES) y el resultado de los
+quiebres (BREAK_RESULT) no son reglas de cadena: se calculan en el enricher, se
+guardan en extra_data y su ventana de 120 segundos cruza los límites de posesión.
+"""
+from enricher import TRY_ORIGIN_CATEGORIES, event_timestamp
+
+# Eventos tras los que el equipo pierde (o cede) la posesión
+POSSESSION_END_CATEGORIES = {"KICK", "GOAL-KICK", "TURNOVER-", "POINTS"}
+
+# Acciones del equipo que defiende: no indican cambio de posesión
+DEFENSIVE_CATEGORIES = {"TACKLE", "MISSED-TACKLE", "MISSED TACKLE", "DEFENSE", "DEFENCE"}
+
+SEQUENCE_RULES = {}
+
+
+def sequence_rule(name):
+    """Registra una regla de métrica por cadena bajo name"""
+    def decorator(fn):
+        SEQUENCE_RULES[name] = fn
+        return fn
+    return decorator
+
+
+def _event_type(event):
+    return str(event.get('event_type') or '').upper()
+
+
+def _is_try(event):
+    extra_data = event.get('extra_data') or {}
+    points_type = (event.get('POINTS') or
+                   extra_data.get('TIPO-PUNTOS') or
+                   extra_data.get('TIPO_PUNTOS') or
+                   extra_data.get('POINTS_TYPE'))
+    return bool(points_type) and str(points_type).upper() == 'TRY'
+
+
+def build_possession_chains(events):
+    """
+    Segmenta los eventos en cadenas de posesión.
+
+    Returns:
+        list[dict]: cadenas con id, team, start, end, indices (posiciones en
+        events, en orden temporal) y next_index (primer evento de la cadena
+        siguiente, o None)
+    """
+    timeline = sorted(
+        ((t, i) for i, t in ((i, event_timestamp(ev)) for i, ev in enumerate(events)) if t is not None),
+        key=lambda item: (item[0], item[1])
+    )
+
+    chains = []
+    current = None
+    team_known = False
+    closed = False
+    for event_time, index in timeline:
+        event = events[index]
+        event_type = _event_type(event)
+        # Sin equipo también es un valor: en las exportaciones con IS_OPPONENT
+        # solo se marca al rival y los eventos propios llegan sin equipo
+        team = event.get('team') or None
+        attacking = event_type not in DEFENSIVE_CATEGORIES
+
+        starts_chain = (
+            current is None
+            or closed
+            or event_type in TRY_ORIGIN_CATEGORIES
+            or (attacking and team_known and team != current["team"])
+        )
+        if starts_chain:
+            if current is not None:
+                current["next_index"] = index
+            current = {"id": len(chains) + 1, "team": None, "start": event_time, "end": event_time,
+                       "indices": [], "next_index": None}
+            chains.append(current)
+            team_known = False
+
+        current["indices"].append(index)
+        current["end"] = event_time
+        if attacking and not team_known:
+            current["team"] = team
+            team_known = True
+        closed = event_type in POSSESSION_END_CATEGORIES
+
+    return chains
+
+
+def analyze_sequences(events, rules=None):
+    """
+    Segmenta los eventos y aplica las reglas registradas a cada cadena.
+
+    Args:
+        events: lista de eventos (dicts con event_type, timestamp_sec, team, x, extra_data)
+        rules: nombres de reglas a aplicar (todas las registradas por defecto)
+
+    Returns:
+        list[dict]: cadenas con sus métricas en chain["metrics"]
+    """
+    selected = {name: SEQUENCE_RULES[name] for name in (rules or SEQUENCE_RULES) if name in SEQUENCE_RULES}
+    chains = build_possession_chains(events)
+    for chain in chains:
+        chain["metrics"] = {name: rule(chain, events) for name, rule in selected.items()}
+    return chains
+
+
+def summarize_sequences(chains):
+    """Agregados por equipo: número de posesiones, fases medias y resultados"""
+    summary = {}
+    for chain in chains:
+        team = chain["team"] or "SIN_EQUIPO"
+        stats = summary.setdefault(team, {"possessions": 0, "phases": 0, "duration": 0.0, "results": {}})
+        metrics = chain.get("metrics", {})
+        stats["possessions"] += 1
+        stats["phases"] += metrics.get("phases") or 0
+        stats["duration"] += metrics.get("duration") or 0
+        result = metrics.get("result")
+        if result:
+            stats["results"][result] = stats["results"].get(result, 0) + 1
+    for stats in summary.values():
+        stats["avg_phases"] = round(stats["phases"] / stats["possessions"], 2) if stats["possessions"] else 0
+        stats["duration"] = round(stats["duration"], 1)
+    return summary
+
+
+# --- Reglas incluidas ----------------------------------------------------------
+
+@sequence_rule("origin")
+def chain_origin(chain, events):
+    """Evento de origen de la cadena (None si empezó por cambio de equipo)"""
+    first = _event_type(events[chain["indices"][0]])
+    return first if first in TRY_ORIGIN_CATEGORIES else None
+
+
+@sequence_rule("phases")
+def chain_phases(chain, events):
+    """Rucks del equipo en posesión + 1"""
+    team = chain["team"]
+    rucks = sum(
+        1 for i in chain["indices"]
+        if _event_type(events[i]) == 'RUCK' and (events[i].get('team') or None) == team
+    )
+    return rucks + 1
+
+
+@sequence_rule("duration")
+def chain_duration(chain, events):
+    """Segundos entre el primer y el último evento de la cadena"""
+    return round(chain["end"] - chain["start"], 1)
+
+
+@sequence_rule("meters")
+def chain_meters(chain, events):
+    """Avance según la coordenada x de los eventos del equipo en posesión (None sin coordenadas)"""
+    xs = [
+        events[i].get('x') for i in chain["indices"]
+        if isinstance(events[i].get('x'), (int, float)) and (events[i].get('team') or None) == chain["team"]
+    ]
+    if len(xs) < 2:
+        return None
+    return round(xs[-1] - xs[0], 1)
+
+
+@sequence_rule("result")
+def chain_result(chain, events):
+    """Cómo terminó la posesión: por su último evento o por el que abrió la siguiente"""
+    last = events[chain["indices"][-1]]
+    last_type = _event_type(last)
+    if last_type == 'POINTS':
+        return 'TRY' if _is_try(last) else 'POINTS'
+    if last_type == 'KICK':
+        return 'KICK'
+    if last_type == 'GOAL-KICK':
+        return 'GOAL_KICK_ATTEMPT'
+    if last_type == 'TURNOVER-':
+        return 'TURNOVER'
+
+    if chain["next_index"] is None:
+        return 'END'
+    following = events[chain["next_index"]]
+    following_type = _event_type(following)
+    following_team = following.get('team') or None
+    if following_type == 'PENALTY':
+        return 'PENALTY_FOR' if following_team == chain["team"] else 'PENALTY_AGAINST'
+    if following_type in ('TURNOVER', 'TURNOVER+'):
+        return 'TURNOVER'
+    if following_type in ('SCRUM', 'LINEOUT'):
+        return following_type
+    if following_team != chain["team"]:
+        return 'POSSESSION_LOST'
+    return 'CONTINUES'
@@ -8,43 +8,103 @@ Ejemplo:
     'Tackle', 'Placcaggio', 'Placaje' → 'TACKLE'
 """
 
-from typing import Dict, List, Optional
+import threading
+from typing import Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
 from models import CategoryMapping
+from mapping_notify import ensure_listener, listener_active, publish_mappings_change
+
+# Tabla de traducción compartida por el proceso: (versión, {clave normalizada: categoría}).
+# Las escrituras en category_mappings suben _mappings_version (en los demás
+# procesos, vía NOTIFY: ver mapping_notify) y la próxima lectura la reconstruye
+# con un único SELECT.
+_table_lock = threading.Lock()
+_mappings_version = 0
+_shared_table: Optional[Tuple[int, Dict[str, str]]] = None
+
+_MISSING = object()
+
+
+def _normalize_key(term: str, mapping_type: str = 'event_type') -> str:
+    """Normaliza término para búsqueda case-insensitive"""
+    return f"{mapping_type}:{term.lower().strip()}"
+
+
+def bump_mappings_version() -> int:
+    """Invalida la tabla compartida. Llamar después de cada commit que modifique category_mappings."""
+    global _mappings_version
+    with _table_lock:
+        _mappings_version += 1
+        return _mappings_version
+
+
+def mappings_changed(db: Session) -> int:
+    """Invalida la tabla en este proceso y avisa a los demás. Llamar después del commit."""
+    version = bump_mappings_version()
+    publish_mappings_change(db)
+    return version
+
+
+def _build_translation_table(db: Session) -> Dict[str, str]:
+    """Carga todos los mapeos desde BD"""
+    table = {}
+    mappings = db.query(CategoryMapping).order_by(
+        CategoryMapping.priority.desc()
+    ).all()
+
+    for mapping in mappings:
+        # Normalizar clave: lowercase y sin espacios extras
+        key = _normalize_key(mapping.source_term, mapping.mapping_type)
+        table[key] = mapping.target_category
+
+    print(f"✅ Cargados {len(table)} mapeos de categorías")
+    return table
+
+
+def load_translation_table(db: Session, force: bool = False) -> Tuple[int, Dict[str, str]]:
+    """
+    Tabla de traducción vigente del proceso, reconstruida solo si cambió la versión.
+
+    Returns:
+        tuple: (versión, tabla). La tabla es compartida: no modificarla.
+    """
+    global _shared_table
+    ensure_listener(bump_mappings_version)
+    # Sin listener no se enteraría de cambios hechos en otros procesos
+    force = force or not listener_active()
+    with _table_lock:
+        if not force and _shared_table is not None and _shared_table[0] == _mappings_version:
+            return _shared_table
+        version = _mappings_version
+        _shared_table = (version, _build_translation_table(db))
+        return _shared_table
 
 
 class Translator:
     """
     Traductor inteligente que mapea términos externos a categorías estándar.
+
+    Usa la tabla compartida del proceso tal como estaba al crearlo y recuerda los
+    términos ya traducidos, así que conviene una instancia por import.
     """
     
     def __init__(self, db: Session = None):
         self.db = db
-        self._cache: Dict[str, str] = {}  # Cache en memoria para performance
+        self.version: Optional[int] = None
+        self._cache: Dict[str, str] = {}  # Tabla compartida (solo lectura)
+        self._memo: Dict[Tuple[str, str], object] = {}  # (mapping_type, término crudo) → categoría
         self._load_mappings()
     
-    def _load_mappings(self):
-        """Carga todos los mapeos desde BD al cache"""
+    def _load_mappings(self, force: bool = False):
+        """Toma la tabla de mapeos compartida (la carga desde BD si hace falta)"""
         if not self.db:
             return
-        
-        mappings = self.db.query(CategoryMapping).order_by(
-            CategoryMapping.priority.desc()
-        ).all()
-        
-        for mapping in mappings:
-            # Normalizar clave: lowercase y sin espacios extras
-            key = self._normalize_key(
-                mapping.source_term, 
-                mapping.mapping_type
-            )
-            self._cache[key] = mapping.target_category
-        
-        print(f"✅ Cargados {len(self._cache)} mapeos de categorías")
+        self.version, self._cache = load_translation_table(self.db, force=force)
+        self._memo = {}
     
     def _normalize_key(self, term: str, mapping_type: str = 'event_type') -> str:
         """Normaliza término para búsqueda case-insensitive"""
-        return f"{mapping_type}:{term.lower().strip()}"
+        return _normalize_key(term, mapping_type)
     
     def translate(
         self, 
@@ -76,10 +136,14 @@ class Translator:
         if not term:
             return default if default is not None else term
         
-        key = self._normalize_key(term, mapping_type)
+        memo_key = (mapping_type, term)
+        translated = self._memo.get(memo_key, _MISSING)
+        if translated is _MISSING:
+            translated = self._cache.get(_normalize_key(term, mapping_type), _MISSING)
+            self._memo[memo_key] = translated
         
-        if key in self._cache:
-            return self._cache[key]
+        if translated is not _MISSING:
+            return translated
         
         # Si no hay traducción, retornar default o el término original
         return default if default is not None else term
@@ -182,6 +246,21 @@ class Translator:
         if not self.db:
             raise ValueError("DB session required to add mapping")
         
+        mapping, created = self._stage_mapping(
+            source_term, target_category, mapping_type, language, priority, notes
+        )
+        if not created:
+            return mapping
+        
+        self.db.commit()
+        mappings_changed(self.db)
+        self._remember_mappings([mapping])
+        
+        print(f"✅ Mapeo agregado: {source_term} → {target_category}")
+        return mapping
+    
+    def _stage_mapping(self, source_term, target_category, mapping_type, language, priority, notes):
+        """Agrega el mapeo a la sesión sin commit. Devuelve (mapeo, si es nuevo)"""
         # Verificar si ya existe
         existing = self.db.query(CategoryMapping).filter_by(
             source_term=source_term,
@@ -191,7 +270,7 @@ class Translator:
         
         if existing:
             print(f"⚠️  Mapeo ya existe: {source_term} → {target_category}")
-            return existing
+            return existing, False
         
         mapping = CategoryMapping(
             source_term=source_term,
@@ -201,16 +280,16 @@ class Translator:
             priority=priority,
             notes=notes
         )
-        
         self.db.add(mapping)
-        self.db.commit()
-        
-        # Actualizar cache
-        key = self._normalize_key(source_term, mapping_type)
-        self._cache[key] = target_category
-        
-        print(f"✅ Mapeo agregado: {source_term} → {target_category}")
-        return mapping
+        return mapping, True
+    
+    def _remember_mappings(self, mappings):
+        """Actualiza el cache propio (la tabla compartida se reconstruye en la próxima carga)"""
+        cache = dict(self._cache)
+        for mapping in mappings:
+            cache[_normalize_key(mapping.source_term, mapping.mapping_type)] = mapping.target_category
+        self._cache = cache
+        self._memo = {}
     
     def bulk_add_mappings(self, mappings: List[Dict]) -> int:
         """
@@ -231,21 +310,33 @@ class Translator:
         if not self.db:
             raise ValueError("DB session required")
         
+        # Un solo commit y un solo aviso a los demás procesos para todo el lote;
+        # cada mapeo va en un savepoint para que uno inválido no arrastre al resto
         count = 0
+        added = []
         for mapping_data in mappings:
             try:
-                self.add_mapping(
-                    source_term=mapping_data['source_term'],
-                    target_category=mapping_data['target_category'],
-                    mapping_type=mapping_data.get('mapping_type', 'event_type'),
-                    language=mapping_data.get('language'),
-                    priority=mapping_data.get('priority', 0),
-                    notes=mapping_data.get('notes')
-                )
+                with self.db.begin_nested():
+                    mapping, created = self._stage_mapping(
+                        source_term=mapping_data['source_term'],
+                        target_category=mapping_data['target_category'],
+                        mapping_type=mapping_data.get('mapping_type', 'event_type'),
+                        language=mapping_data.get('language'),
+                        priority=mapping_data.get('priority', 0),
+                        notes=mapping_data.get('notes')
+                    )
                 count += 1
+                if created:
+                    added.append(mapping)
             except Exception as e:
                 print(f"❌ Error agregando mapeo {mapping_data}: {e}")
         
+        if added:
+            self.db.commit()
+            mappings_changed(self.db)
+            self._remember_mappings(added)
+            print(f"✅ {len(added)} mapeos agregados")
+        
         return count
     
     def get_all_mappings(self, mapping_type: str = None) -> List[Dict]:
@@ -304,29 +395,24 @@ class Translator:
     
     def reload_cache(self):
         """Recarga el cache desde la base de datos"""
-        self._cache.clear()
-        self._load_mappings()
-
+        self._cache = {}
+        self._load_mappings(force=True)
 
-# Singleton global (para usar sin instanciar cada vez)
-_translator_instance: Optional[Translator] = None
 
-def get_translator(db: Session = None) -> Translator:
+def get_translator(db: Session = None) -> Optional[Translator]:
     """
-    Obtiene la instancia singleton del traductor.
+    Traductor para un import: usa la tabla compartida del proceso (sin consultar
+    la BD si no cambió) con su propia memoria de términos ya vistos.
     
     Args:
-        db: Sesión de base de datos (opcional, solo para primera inicialización)
+        db: Sesión de base de datos (solo se usa si hay que recargar la tabla)
         
     Returns:
-        Instancia de Translator
+        Instancia de Translator, o None sin sesión
     """
-    global _translator_instance
-    
-    if _translator_instance is None and db is not None:
-        _translator_instance = Translator(db)
-    
-    return _translator_instance
+    if db is None:
+        return None
+    return Translator(db)
 
 
 # Mapeos por defecto (Rugby en español, italiano, inglés)
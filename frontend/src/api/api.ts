@@ -40,3 +40,42 @@ export async function fetchEvents(matchId: number) {
   if (!response.ok) throw new Error("Error al obtener los eventos");
   return response.json();
 }
+
+// Filtros que GET /matches/:id/events resuelve en SQL (ver backend/event_filters.py)
+export type EventFilters = {
+  event_type?: string[];
+  team?: string[];
+  period?: number[];
+  player?: string[];
+  from_sec?: number;
+  to_sec?: number;
+  fields?: string[];
+};
+
+const EVENTS_PAGE_SIZE = 5000;
+
+// Eventos del partido filtrados en el servidor; recorre las páginas siguiendo next_cursor
+export async function fetchFilteredEvents(matchId: number, filters: EventFilters, signal?: AbortSignal) {
+  const events: any[] = [];
+  let cursor: number | null = null;
+  do {
+    const qs = new URLSearchParams();
+    Object.entries(filters).forEach(([k, v]) => {
+      if (v === undefined || v === null) return;
+      if (Array.isArray(v)) {
+        if (v.length > 0) qs.append(k, v.join(","));
+      } else {
+        qs.append(k, String(v));
+      }
+    });
+    qs.append("limit", String(EVENTS_PAGE_SIZE));
+    if (cursor !== null) qs.append("cursor", String(cursor));
+
+    const response = await authFetch(`/matches/${matchId}/events?${qs.toString()}`, { signal });
+    if (!response.ok) throw new Error("Error al obtener los eventos filtrados");
+    const page = await response.json();
+    events.push(...(page.events || []));
+    cursor = page.next_cursor ?? null;
+  } while (cursor !== null);
+  return events;
+}
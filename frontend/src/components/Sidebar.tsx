@@ -7,6 +7,8 @@ import { useMatches } from "@/hooks/useMatches";
 import { useContext } from "react";
 import { usePlayback } from "@/context/PlaybackContext";
 import { FiX } from "react-icons/fi";
+import { useParams } from "react-router-dom";
+import { fetchFilteredEvents } from "@/api/api";
 
 
 
@@ -57,6 +59,39 @@ const Sidebar = React.memo(({ sidebarOpen, setSidebarOpen }: { sidebarOpen: bool
 
   const camposExtra = ["TRY_ORIGIN", "Time_Group", "player_name", "player_position"];
 
+  // Filtro por categoría resuelto en el servidor (páginas de un partido, /analysis/:matchId):
+  // solo viajan los eventos de esas categorías. Mientras llega la respuesta (o si falla)
+  // se filtra sobre los eventos ya cargados.
+  const { matchId: matchIdParam } = useParams<{ matchId: string }>();
+  const matchId = Number(matchIdParam) || null;
+  const [categoryEvents, setCategoryEvents] = useState<any[] | null>(null);
+
+  useEffect(() => {
+    if (!matchId || filterCategory.length === 0) {
+      setCategoryEvents(null);
+      return;
+    }
+    const eventTypes = Array.from(new Set(
+      filterCategory.flatMap((c: any) => {
+        const raw = (c || "").toString().trim();
+        return raw ? [raw, raw.toUpperCase()] : [];
+      })
+    ));
+    // Hasta que llegue la respuesta, las categorías nuevas se filtran sobre todos los eventos
+    setCategoryEvents(null);
+    const controller = new AbortController();
+    fetchFilteredEvents(matchId, { event_type: eventTypes }, controller.signal)
+      .then((result) => setCategoryEvents(result))
+      .catch((err) => {
+        if (err?.name !== "AbortError") {
+          console.warn("⚠️ Filtro por categoría en el servidor no disponible, se filtra localmente:", err);
+          setCategoryEvents(null);
+        }
+      });
+    return () => controller.abort();
+    // Solo depende del partido y de las categorías: cambios en events no vuelven a pedir
+  }, [matchId, filterCategory]);
+
 
   const computedFilteredEvents = useMemo(() => {
     let result = [...events];
@@ -168,7 +203,7 @@ const Sidebar = React.memo(({ sidebarOpen, setSidebarOpen }: { sidebarOpen: bool
   }, [computedFilteredEvents, selectedDescriptor, events]);
 
   useEffect(() => {
-    let result = [...events];
+    let result = [...(categoryEvents ?? events)];
 
     // Filtrar por categoría
     if (filterCategory.length > 0) {
@@ -244,7 +279,7 @@ const Sidebar = React.memo(({ sidebarOpen, setSidebarOpen }: { sidebarOpen: bool
     } catch (err) {
       setFilteredEvents(result);
     }
-  }, [events, filterCategory, filterDescriptors, selectedTeam, myTeams, setFilteredEvents]);
+  }, [events, categoryEvents, filterCategory, filterDescriptors, selectedTeam, myTeams, setFilteredEvents]);
 
   const applyFilter = () => {
     if (
@@ -62,6 +62,10 @@ export const PlaybackProvider = ({ children }: { children: ReactNode }) => {
 
   const computePendingDelay = useCallback((ev: MatchEvent | null | undefined): number => {
     if (!ev) return 0;
+    // El backend ya calcula el delay pendiente de cada evento (delay_offset_sec)
+    if (typeof ev.delay_offset_sec === "number" && Number.isFinite(ev.delay_offset_sec)) {
+      return ev.delay_offset_sec;
+    }
     const extra = ev.extra_data || {};
     const already = Number(extra._delay_applied || 0) || 0;
     const globalDelay =
@@ -201,7 +201,10 @@ const PreviewImport = () => {
             // Incluir tiempos manuales si el perfil los requiere
             ...(isManualProfile && { manual_period_times: manualTimes })
             }, 
-            events: eventsToImport,
+            // Con preview_token el backend recupera los eventos de su cache: solo se envían las categorías descartadas
+            ...(previewData.preview_token
+              ? { preview_token: previewData.preview_token, discard_categories: discardedCategories }
+              : { events: eventsToImport }),
             profile: profile?.name || profile,  // Enviar solo el nombre del perfil
             team_id: teamId ? Number(teamId) : undefined,
             ...(teamInference && teamInference.length > 0 && { team_inference: teamInference })
@@ -211,7 +214,12 @@ const PreviewImport = () => {
         const msg = await res.text();
         throw new Error(msg || "Error al guardar los datos");
       }
-      toast.success("Importación exitosa");
+      const body = await res.json().catch(() => ({}));
+      if (body.already_imported) {
+        toast.info(body.message || "Este archivo ya estaba importado");
+      } else {
+        toast.success("Importación exitosa");
+      }
       navigate("/");
     } catch (err: any) {
       setError(err.message || "Fallo al guardar en base de datos");
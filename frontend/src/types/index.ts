@@ -6,6 +6,8 @@ export type MatchEvent = {
   player_name?: string;
   player_id?: number | null;
   timestamp_sec?: number;
+  delay_offset_sec?: number; // delays del partido pendientes de aplicar (calculado al leer)
+  effective_timestamp_sec?: number | null; // timestamp_sec + delay_offset_sec
   extra_data?: any;
   match_id?: number;
   notes?: string | null;